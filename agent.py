@@ -6,54 +6,32 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from openai import OpenAI
 import json
 import time
+from urllib.parse import urlsplit
 
-# Set OpenAI API key
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+from crawl_pool import CrawlPool, Frontier, merge_requests
+from crawl_state import CrawlState, content_hash
+from endpoint_templates import normalize_collection
+from network_capture import API_TYPES, NetworkCapture, enable_capture
+from suggestions import DEFAULT_MODEL, CachedSuggester, OpenAISuggester, RuleBasedSuggester, SuggestionCache
+import tracing
+from tracing import PROFILE_MODES
 
-if not client.api_key:
-    print("Error: Set OPENAI_API_KEY environment variable.")
-    exit(1)
-
-def get_llm_suggestion(html, current_url):
-    prompt = f"""
-Analyze this HTML page from {current_url}. What is this page (e.g., homepage, user list)?
-Suggest ONE next action to explore the app. Examples:
-- "click link /users/" (if there's a link to /users/)
-- "fill form with name: Test User, email: test@example.com and submit" (if there's a form)
-- "click link /users/create/" (if there's a create link)
-Be concise and specific. If no actions, say "stop".
-"""
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",  # Use gpt-4 for better results if available
-            messages=[{"role": "user", "content": prompt + "\n\nHTML:\n" + html[:3000]}],
-            max_tokens=100
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"LLM error: {e}")
-        return "stop"
-
-def perform_action(driver, suggestion, collection):
+def perform_action(driver, suggestion, capture):
+    """Carry out a suggested action; the requests it causes are recorded by the capture"""
     suggestion = suggestion.lower()
     if "click link" in suggestion:
-        # Extract link text or URL
-        if "/" in suggestion:
-            link_url = suggestion.split("/")[-1].strip().replace('"', '')
+        # Extract the link's URL (the first word after "click link")
+        words = suggestion.split("click link", 1)[1].replace('"', '').split()
+        if words and "/" in words[0]:
+            link_url = words[0]
             try:
                 link = WebDriverWait(driver, 5).until(
                     EC.element_to_be_clickable((By.XPATH, f"//a[contains(@href, '{link_url}')]"))
                 )
                 link.click()
-                time.sleep(2)  # Wait for load
-                # Record as GET request
-                collection['item'].append({
-                    'name': f'Navigate to {link_url}',
-                    'request': {'method': 'GET', 'url': driver.current_url}
-                })
+                capture.wait_for_idle()  # Wait for the page and its API calls
                 return True
             except:
                 print(f"Could not click link: {link_url}")
@@ -66,27 +44,63 @@ def perform_action(driver, suggestion, collection):
             email_field.send_keys('test@example.com')
             submit_button = driver.find_element(By.XPATH, "//input[@type='submit'] | //button[@type='submit']")
             submit_button.click()
-            time.sleep(2)
-            # Record as POST request (simplified)
-            collection['item'].append({
-                'name': 'Submit Form',
-                'request': {
-                    'method': 'POST',
-                    'url': driver.current_url,
-                    'body': {
-                        'mode': 'urlencoded',
-                        'urlencoded': [
-                            {'key': 'name', 'value': 'Test User'},
-                            {'key': 'email', 'value': 'test@example.com'}
-                        ]
-                    }
-                }
-            })
+            capture.wait_for_idle()
             return True
         except:
             print("Could not fill/submit form")
     return False
 
+def make_driver(driver_path):
+    """Headless Chrome for one crawl worker"""
+    options = Options()
+    options.add_argument("--headless")  # Run without UI
+    options.add_argument("--disable-gpu")
+    enable_capture(options)  # DevTools network events for NetworkCapture
+    return webdriver.Chrome(service=Service(driver_path), options=options)
+
+def page_links(driver, origin):
+    """Links on the current page that stay on the crawled site"""
+    hrefs = driver.execute_script("return Array.from(document.links, a => a.href);") or []
+    return [href for href in hrefs
+            if href.startswith(('http://', 'https://')) and urlsplit(href).netloc.lower() == origin]
+
+def visit_page(driver, url, origin, hosts, resource_types, suggester, state):
+    """Visit one page: record its requests, follow the LLM's suggested action and collect links to explore"""
+    capture = NetworkCapture(driver, hosts, resource_types)
+    capture.reset()
+    tracing.count('pages.visited')
+    with tracing.span('page.load', url=url):
+        driver.get(url)
+    with tracing.span('page.network_idle', url=url):
+        if not capture.wait_for_idle():
+            print(f"Network still busy on {url}; continuing")
+    html = driver.page_source
+    digest = content_hash(html)
+    known = state.page(url)
+    if known is not None and known[0] == digest:
+        # Unchanged since the last crawl: keep what it produced then
+        print(f"Unchanged: {url}")
+        tracing.count('pages.unchanged')
+        return known[1], known[2]
+    with tracing.span('page.links'):
+        links = page_links(driver, origin)
+    
+    with tracing.span('page.suggest', url=url):
+        suggestion = suggester.suggest(html, url)
+    print(f"Suggestion for {url}: {suggestion}")
+    
+    with tracing.span('page.action', url=url) as action:
+        if "stop" not in suggestion.lower() and perform_action(driver, suggestion, capture):
+            # The action may have led to a new page
+            links.append(driver.current_url)
+            action.set(performed=True)
+    with tracing.span('page.save'):
+        capture.drain()
+        items = capture.postman_items()
+        state.save_page(url, digest, items, links)
+    tracing.count('requests.captured', len(items))
+    return items, links
+
 def main():
     # allow CLI arguments so that this can be scripted or integrated into other tooling
     import argparse
@@ -103,6 +117,42 @@ def main():
     parser.add_argument("-m", "--max-pages", type=int,
                         help="Maximum number of pages to explore",
                         default=10)
+    parser.add_argument("-w", "--workers", type=int,
+                        help="Number of browsers crawling in parallel",
+                        default=1)
+    parser.add_argument("--per-host", type=int,
+                        help="Pages of one host loading at the same time (default: one per worker)")
+    parser.add_argument("--host-delay", type=float,
+                        help="Least number of seconds between two page loads on one host",
+                        default=0.0)
+    parser.add_argument("--capture-host", action="append", default=[],
+                        help="Also record requests to this host (e.g. a separate API host); repeatable")
+    parser.add_argument("--capture-static", action="store_true",
+                        help="Also record scripts, stylesheets, images and fonts")
+    parser.add_argument("--templates", action="store_true",
+                        help="Also write <output>.templates.json with repeated URLs collapsed into "
+                             "route templates, plus feeder CSVs of the observed ids")
+    parser.add_argument("--state", default=os.path.join("data", "output", ".crawl_state.sqlite"),
+                        help="SQLite file keeping the frontier, visited pages and recorded requests")
+    resume_group = parser.add_mutually_exclusive_group()
+    resume_group.add_argument("--resume", action="store_true",
+                              help="Continue the previous crawl: visited pages are not loaded again")
+    resume_group.add_argument("--recrawl", action="store_true",
+                              help="Reload every known page but only explore the pages whose content changed")
+    parser.add_argument("--suggester", choices=["openai", "rules"], default="openai",
+                        help="Where next actions come from: an OpenAI model or local deterministic rules")
+    parser.add_argument("--model", default=DEFAULT_MODEL,
+                        help="OpenAI model for --suggester openai")
+    parser.add_argument("--suggestion-cache", default=os.path.join("data", "output", ".suggestions.sqlite"),
+                        help="SQLite file caching suggestions by page structure")
+    parser.add_argument("--no-suggestion-cache", action="store_true",
+                        help="Ask the suggester for every page")
+    parser.add_argument("--suggestion-ttl", type=float, default=168,
+                        help="Hours a cached suggestion stays valid")
+    parser.add_argument("--trace", metavar="DIR",
+                        help="Write a timing trace of the crawl (page loads, network waits, suggestions) to DIR")
+    parser.add_argument("--trace-profile", choices=PROFILE_MODES,
+                        help="With --trace, also capture a CPU profile (cProfile) and/or memory peaks (tracemalloc)")
 
     args = parser.parse_args()
 
@@ -119,45 +169,63 @@ def main():
     if out_dir and not os.path.exists(out_dir):
         os.makedirs(out_dir, exist_ok=True)
     
-    # Selenium setup
-    options = Options()
-    options.add_argument("--headless")  # Run without UI
-    options.add_argument("--disable-gpu")
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-    
-    collection = {
-        'info': {'name': 'LLM-Explored APIs', 'schema': 'https://schema.getpostman.com/json/collection/v2.1.0/collection.json'},
-        'item': []
-    }
+    if args.suggester == "openai":
+        try:
+            backend = OpenAISuggester(args.model)
+        except ValueError as e:
+            print(f"Error: {e}")
+            exit(1)
+    else:
+        backend = RuleBasedSuggester()
+    cache = None if args.no_suggestion_cache else SuggestionCache(args.suggestion_cache, ttl=args.suggestion_ttl * 3600)
+    suggester = CachedSuggester(backend, cache)
     
-    visited = set()
-    to_visit = [url]
-    max_pages = 10  # Limit exploration
+    with tracing.trace_run('crawl', args.trace, args.trace_profile, base_url=url, workers=args.workers) as tracer:
+        # Selenium setup: the driver is installed once and shared by all workers
+        with tracing.span('crawl.driver_install'):
+            driver_path = ChromeDriverManager().install()
+        origin = urlsplit(url).netloc.lower()
+        hosts = [origin] + [host.lower() for host in args.capture_host]
+        resource_types = None if args.capture_static else API_TYPES
     
-    while to_visit and len(visited) < max_pages:
-        current_url = to_visit.pop(0)
-        if current_url in visited:
-            continue
-        visited.add(current_url)
-        
-        print(f"Visiting: {current_url}")
-        driver.get(current_url)
-        html = driver.page_source
-        
-        suggestion = get_llm_suggestion(html, current_url)
-        print(f"Suggestion: {suggestion}")
-        
-        if "stop" in suggestion.lower():
-            break
-        
-        if perform_action(driver, suggestion, collection):
-            # Add new URL to visit if changed
-            new_url = driver.current_url
-            if new_url not in visited and new_url not in to_visit:
-                to_visit.append(new_url)
+        collection = {
+            'info': {'name': 'LLM-Explored APIs', 'schema': 'https://schema.getpostman.com/json/collection/v2.1.0/collection.json'},
+            'item': []
+        }
     
-    driver.quit()
+        state = CrawlState(args.state)
+        state.start(url, fresh=not (args.resume or args.recrawl))
+        frontier = Frontier(max_pages, per_host=args.per_host or args.workers, host_delay=args.host_delay)
+        if args.recrawl:
+            for page_url in state.urls(visited=True) + state.urls(visited=False):
+                frontier.add(page_url)
+        else:
+            for page_url in state.urls(visited=True):
+                frontier.skip(page_url)
+            for page_url in state.urls(visited=False):
+                frontier.add(page_url)
+        pool = CrawlPool(frontier,
+                         visit=lambda driver, page_url: visit_page(driver, page_url, origin, hosts, resource_types,
+                                                                   suggester, state),
+                         make_driver=lambda: make_driver(driver_path),
+                         workers=args.workers)
+        started = time.time()
+        with tracing.span('crawl.pages'):
+            pool.run()
+        # Pages of earlier runs count too when resuming or recrawling
+        collection['item'] = merge_requests(state.collection_pages())
+        pending = len(state.urls(visited=False))
+        state.close()
+    print(f"Visited {frontier.claimed} pages with {pool.workers} worker(s) in {time.time() - started:.1f}s")
+    if cache is not None:
+        stats = suggester.stats()
+        print(f"Suggestion cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} entries")
+        cache.close()
+    if pending:
+        print(f"{pending} pages left in the frontier; continue with --resume")
+    if tracer is not None:
+        print(f"Trace saved to {tracer.path}")
     
     # Save collection
     with open(output_path, 'w', encoding='utf-8') as f:
@@ -166,6 +234,13 @@ def main():
         print(f"Collection saved to {output_path} with {len(collection['item'])} requests.")
     else:
         print(f"No requests captured. Empty collection saved to {output_path}.")
+    
+    if args.templates and collection['item']:
+        templates_path = os.path.splitext(output_path)[0] + '.templates.json'
+        requests, templates, feeders = normalize_collection(output_path, templates_path)
+        print(f"Collapsed {requests} requests into {templates} templates in {templates_path}")
+        for feeder in feeders:
+            print(f"  feeder {feeder.path}: {', '.join(feeder.variables)}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
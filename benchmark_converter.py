@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Converter benchmark
+Generates synthetic Postman collections from a seed and times each stage of
+PostmanToJMeterConverter.convert() on them (load, prepare, build, serialize,
+write; taken from the converter's own tracing spans), together with the
+end-to-end convert() time and peak RSS. Results can be saved as a baseline
+and later runs compared against it. Runs offline and deterministically.
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional
+
+import tracing
+from convert_postman_to_jmx import PostmanToJMeterConverter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ('load', 'prepare', 'build', 'serialize', 'write')
+# Converter spans whose self time (time outside nested spans) makes up each stage
+STAGE_SPANS = {
+    'load': ('convert.read_header', 'convert.parse'),
+    'prepare': ('convert.variables', 'convert.shared_config', 'convert.structure'),
+    'build': ('convert.build', 'convert.cache_lookup', 'convert.cache_store'),
+    'serialize': ('convert.render',),
+    'write': ('convert.folder', 'convert.write'),
+}
+BODY_MODES = ('none', 'raw', 'formdata', 'urlencoded')
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def _synthetic_request(rng: random.Random, index: int, headers: int, body_modes: List[str]) -> Dict:
+    """One deterministic Postman request item"""
+    resource_name = rng.choice(['users', 'orders', 'items', 'accounts', 'sessions'])
+    request: Dict[str, Any] = {
+        'method': rng.choice(METHODS),
+        'header': [{'key': f'X-Header-{h}', 'value': f'value-{rng.randrange(1000)}'} for h in range(headers)],
+        'url': {
+            'raw': f'{{{{baseUrl}}}}/{resource_name}/{index}?page={rng.randrange(100)}',
+            'host': ['{{baseUrl}}'],
+            'path': [resource_name, str(index)],
+            'query': [{'key': 'page', 'value': str(rng.randrange(100))}],
+        },
+    }
+
+    mode = rng.choice(body_modes)
+    if mode == 'raw':
+        payload = {'id': index, 'name': f'name-{rng.randrange(10 ** 6)}', 'tags': [rng.randrange(100) for _ in range(5)]}
+        request['body'] = {'mode': 'raw', 'raw': json.dumps(payload, indent=2)}
+    elif mode in ('formdata', 'urlencoded'):
+        request['body'] = {'mode': mode, mode: [
+            {'key': f'field{f}', 'value': f'{rng.randrange(10 ** 6)}'} for f in range(4)
+        ]}
+
+    item = {'name': f'{request["method"]} {resource_name} {index}', 'request': request}
+    if index % 2 == 0:
+        item['event'] = [{'listen': 'test', 'script': {'exec': ['pm.response.to.have.status(200);']}}]
+    return item
+
+
+def generate_collection(path: str, requests: int, depth: int = 2, folder_size: int = 100,
+                        headers: int = 3, body_modes: Optional[List[str]] = None, seed: int = 42):
+    """Write a synthetic collection to path without holding it in memory
+
+    Requests are grouped folder_size at a time; each group sits depth folders deep.
+    """
+    rng = random.Random(seed)
+    body_modes = list(body_modes or BODY_MODES)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"info": ' + json.dumps({
+            'name': f'Synthetic {requests} requests',
+            'schema': 'https://schema.getpostman.com/json/collection/v2.1.0/collection.json',
+        }) + ', "item": [')
+
+        written = 0
+        group = 0
+        while written < requests:
+            if group:
+                f.write(', ')
+            for level in range(depth):
+                f.write('{"name": ' + json.dumps(f'Folder {group}.{level}') + ', "item": [')
+            count = min(folder_size, requests - written)
+            f.write(', '.join(json.dumps(_synthetic_request(rng, written + i, headers, body_modes))
+                              for i in range(count)))
+            f.write(']}' * depth)
+            written += count
+            group += 1
+
+        f.write('], "variable": [{"key": "baseUrl", "value": "https://api.example.com"}]}')
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def time_stages(collection_path: str, output_path: str) -> Dict[str, float]:
+    """Convert a collection once with convert() and split its time into stages
+
+    load covers reading the header and parsing items (both passes), prepare
+    the variables, shared config and plan structure, build the per-request
+    values, serialize the template rendering and write the output.
+    """
+    with tracing.collect('benchmark') as tracer, redirect_stdout(io.StringIO()):
+        if not PostmanToJMeterConverter().convert(collection_path, output_path):
+            raise RuntimeError(f"Converting '{collection_path}' failed")
+    stages: Dict[str, float] = {stage: sum(tracer.stages[name][2] for name in names if name in tracer.stages)
+                                for stage, names in STAGE_SPANS.items()}
+    stages['requests'] = tracer.counters.get('convert.requests', 0)
+    return stages
+
+
+def _run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """Benchmark one case; runs in a fresh process so peak RSS is its own"""
+    workdir = case['workdir']
+    collection_path = os.path.join(workdir, f"{case['name']}.json")
+    output_path = os.path.join(workdir, f"{case['name']}.jmx")
+
+    if not os.path.exists(collection_path):
+        generate_collection(collection_path, case['requests'], case['depth'], case['folder_size'],
+                            case['headers'], case['body_modes'], case['seed'])
+
+    best: Dict[str, float] = {}
+    for _ in range(case['repeat']):
+        stages = time_stages(collection_path, output_path)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            PostmanToJMeterConverter().convert(collection_path, output_path)
+        stages['total'] = time.perf_counter() - start
+        for key, value in stages.items():
+            best[key] = min(best.get(key, value), value)
+
+    best['output_mb'] = os.path.getsize(output_path) / (1024 * 1024)
+    best['peak_rss_mb'] = _peak_rss_mb()
+    if not case['keep']:
+        os.unlink(collection_path)
+        os.unlink(output_path)
+    return best
+
+
+def run_benchmarks(request_counts: List[int], depth: int = 2, folder_size: int = 100, headers: int = 3,
+                   body_modes: Optional[List[str]] = None, seed: int = 42, repeat: int = 3,
+                   workdir: Optional[str] = None) -> Dict[str, Any]:
+    """Run one benchmark case per request count and return the results"""
+    body_modes = list(body_modes or BODY_MODES)
+    keep = workdir is not None
+    workdir = workdir or tempfile.mkdtemp(prefix='jmx_bench_')
+    os.makedirs(workdir, exist_ok=True)
+
+    results = {'seed': seed, 'cases': {}}
+    for requests in request_counts:
+        name = f"requests={requests},depth={depth},headers={headers},body={'+'.join(body_modes)}"
+        case = {
+            'name': f'synthetic_{requests}_{depth}_{headers}_{seed}', 'workdir': workdir, 'keep': keep,
+            'requests': requests, 'depth': depth, 'folder_size': folder_size, 'headers': headers,
+            'body_modes': body_modes, 'seed': seed, 'repeat': repeat,
+        }
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results['cases'][name] = pool.submit(_run_case, case).result()
+        print_case(name, results['cases'][name])
+
+    if not keep:
+        os.rmdir(workdir)
+    return results
+
+
+def print_case(name: str, result: Dict[str, Any]):
+    stages = '  '.join(f"{stage} {result[stage]:.3f}s" for stage in STAGES)
+    rate = result['requests'] / result['total'] if result['total'] else 0
+    rss = f"{result['peak_rss_mb']:.1f} MB" if result.get('peak_rss_mb') is not None else 'n/a'
+    print(f"{name}\n  {stages}  total {result['total']:.3f}s  "
+          f"({rate:,.0f} requests/s, peak RSS {rss}, output {result['output_mb']:.1f} MB)")
+
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10) -> bool:
+    """Print the change against a baseline; returns False if anything regressed past threshold"""
+    ok = True
+    print(f"\nComparison with baseline (regression threshold {threshold:.0%}):")
+    for name, result in results['cases'].items():
+        base = baseline.get('cases', {}).get(name)
+        if base is None:
+            print(f"{name}: not in baseline")
+            continue
+        print(name)
+        for metric in STAGES + ('total', 'peak_rss_mb'):
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = change > threshold
+            ok = ok and not regressed
+            flag = '  REGRESSION' if regressed else ''
+            print(f"  {metric:<12} {old:>10.3f} -> {new:>10.3f}  {change:+.1%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the Postman to JMX converter on synthetic collections',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python benchmark_converter.py --requests 1000 10000 --save-baseline bench.json
+  python benchmark_converter.py --requests 1000 10000 --baseline bench.json
+  python benchmark_converter.py --generate collection.json --requests 50000 --depth 4
+        '''
+    )
+    parser.add_argument('-n', '--requests', type=int, nargs='+', default=[1000, 10000],
+                        help='Request counts to benchmark, one case each (default: 1000 10000)')
+    parser.add_argument('-d', '--depth', type=int, default=2, help='Folder nesting depth (default: 2)')
+    parser.add_argument('--folder-size', type=int, default=100, help='Requests per innermost folder (default: 100)')
+    parser.add_argument('--headers', type=int, default=3, help='Headers per request (default: 3)')
+    parser.add_argument('--body-modes', nargs='+', choices=BODY_MODES, default=list(BODY_MODES),
+                        help='Body modes to mix (default: all)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs per case; the best is kept (default: 3)')
+    parser.add_argument('--workdir', help='Keep generated collections and plans in this directory')
+    parser.add_argument('--save-baseline', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare the results with this saved baseline')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown reported as a regression (default: 0.10)')
+    parser.add_argument('--generate', metavar='PATH',
+                        help='Only write a synthetic collection (first --requests value) to PATH')
+
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_collection(args.generate, args.requests[0], args.depth, args.folder_size,
+                            args.headers, args.body_modes, args.seed)
+        print(f"✓ Wrote synthetic collection with {args.requests[0]} requests to '{args.generate}'")
+        return
+
+    results = run_benchmarks(args.requests, args.depth, args.folder_size, args.headers,
+                             args.body_modes, args.seed, args.repeat, args.workdir)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if not compare_results(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
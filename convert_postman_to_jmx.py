@@ -8,20 +8,180 @@ Supports: headers, params, body, folders, environment variables, and basic asser
 import json
 import sys
 import os
+import glob
+import hashlib
+import io
+import tempfile
+import time
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from typing import Dict, List, Any, Iterable, Optional, Tuple
 import argparse
-import re
+
+from feeders import SHARE_MODES, Feeder, bound_variables
+from fragment_cache import FragmentCache
+from jmx_writer import SLOT, JMXTemplate, JMXWriter, slot
+from load_profiles import PROFILE_FIELDS, LoadProfile, resolve_profile
+from postman_reader import Event, PostmanCollectionReader, is_collection, iter_items
+from shared_config import SharedConfig
+import tracing
+from tracing import PROFILE_MODES
+from variables import VARIABLE_MODES, VariableResolver
+
+__version__ = '1.0.0'
+
+# Every sample sends a fresh id in this header and keeps it in a JMeter variable;
+# run JMeter with -Jsample_variables=correlation_id to save it as a results column
+CORRELATION_HEADER = 'X-Correlation-ID'
+CORRELATION_VARIABLE = 'correlation_id'
+
+# Mode for written plans: mkstemp's temporary files are private (0600)
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+
+def converter_version() -> str:
+    """Release plus a digest of the converter sources, used to tag cached output"""
+    digest = hashlib.blake2b(digest_size=8)
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in ('convert_postman_to_jmx.py', 'jmx_writer.py', 'variables.py'):
+        with open(os.path.join(here, module), 'rb') as f:
+            digest.update(f.read())
+    return f"{__version__}+{digest.hexdigest()}"
+
+
+def _build_templates() -> Dict[str, JMXTemplate]:
+    """Build the fixed parts of samplers, headers and assertions once"""
+    templates = {}
+    
+    # HTTP Sampler
+    sampler = ET.Element('HTTPSamplerProxy', {
+        'guiclass': 'HttpTestSampleGui',
+        'testclass': 'HTTPSamplerProxy',
+        'testname': slot('testname'),
+        'enabled': 'true'
+    })
+    ET.SubElement(sampler, 'elementProp', {
+        'name': 'HTTPsampler.Arguments',
+        'elementType': 'Arguments',
+        'guiclass': 'HTTPArgumentsPanel',
+        'testclass': 'Arguments',
+        'testname': 'User Defined Variables',
+        'enabled': 'true'
+    })
+    arguments = ET.SubElement(sampler, 'elementProp', {
+        'name': 'HTTPsampler.Arguments',
+        'elementType': 'Arguments'
+    })
+    args_collection = ET.SubElement(arguments, 'collectionProp', {'name': 'Arguments.arguments'})
+    ET.SubElement(args_collection, SLOT).text = 'arguments'
+    ET.SubElement(sampler, SLOT).text = 'raw_flag'
+    # Domain, port and protocol; left out where HTTP Request Defaults supply them
+    ET.SubElement(sampler, SLOT).text = 'target'
+    ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.contentEncoding'})
+    ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.path'}).text = slot('path')
+    ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.method'}).text = slot('method')
+    ET.SubElement(sampler, 'boolProp', {'name': 'HTTPSampler.follow_redirects'}).text = 'true'
+    ET.SubElement(sampler, 'boolProp', {'name': 'HTTPSampler.auto_redirects'}).text = 'false'
+    ET.SubElement(sampler, 'boolProp', {'name': 'HTTPSampler.use_keepalive'}).text = 'true'
+    ET.SubElement(sampler, 'boolProp', {'name': 'HTTPSampler.DO_MULTIPART_POST'}).text = 'false'
+    ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.embedded_url_re'})
+    ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.connect_timeout'})
+    ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.response_timeout'})
+    templates['sampler'] = JMXTemplate(sampler)
+    
+    string_prop = ET.Element('stringProp', {'name': slot('name')})
+    string_prop.text = slot('value')
+    templates['string_prop'] = JMXTemplate(string_prop)
+    
+    post_body_raw = ET.Element('boolProp', {'name': 'HTTPSampler.postBodyRaw'})
+    post_body_raw.text = 'true'
+    templates['post_body_raw'] = JMXTemplate(post_body_raw)
+    
+    # Body arguments
+    arg = ET.Element('elementProp', {'name': '', 'elementType': 'HTTPArgument'})
+    ET.SubElement(arg, 'boolProp', {'name': 'HTTPArgument.always_encode'}).text = 'false'
+    ET.SubElement(arg, 'stringProp', {'name': 'Argument.value'}).text = slot('value')
+    ET.SubElement(arg, 'stringProp', {'name': 'Argument.metadata'}).text = '='
+    templates['raw_argument'] = JMXTemplate(arg)
+    
+    arg = ET.Element('elementProp', {'name': slot('name'), 'elementType': 'HTTPArgument'})
+    ET.SubElement(arg, 'boolProp', {'name': 'HTTPArgument.always_encode'}).text = 'true'
+    ET.SubElement(arg, 'stringProp', {'name': 'Argument.value'}).text = slot('value')
+    ET.SubElement(arg, 'stringProp', {'name': 'Argument.metadata'}).text = '='
+    ET.SubElement(arg, 'boolProp', {'name': 'HTTPArgument.use_equals'}).text = 'true'
+    ET.SubElement(arg, 'stringProp', {'name': 'Argument.name'}).text = slot('name')
+    templates['form_argument'] = JMXTemplate(arg)
+    
+    # Sampler hashtree (self-closing when it has no children) and empty hashtree
+    sampler_tree = ET.Element('hashTree')
+    ET.SubElement(sampler_tree, SLOT).text = 'children'
+    templates['hash_tree_slot'] = JMXTemplate(sampler_tree)
+    templates['hash_tree'] = JMXTemplate(ET.Element('hashTree'))
+    
+    # Headers
+    header_manager = ET.Element('HeaderManager', {
+        'guiclass': 'HeaderPanel',
+        'testclass': 'HeaderManager',
+        'testname': 'HTTP Header Manager',
+        'enabled': 'true'
+    })
+    headers_collection = ET.SubElement(header_manager, 'collectionProp', {'name': 'HeaderManager.headers'})
+    ET.SubElement(headers_collection, SLOT).text = 'headers'
+    templates['header_manager'] = JMXTemplate(header_manager)
+    
+    header_elem = ET.Element('elementProp', {'name': '', 'elementType': 'Header'})
+    ET.SubElement(header_elem, 'stringProp', {'name': 'Header.name'}).text = slot('name')
+    ET.SubElement(header_elem, 'stringProp', {'name': 'Header.value'}).text = slot('value')
+    templates['header'] = JMXTemplate(header_elem)
+    
+    # Response assertion
+    assertion = ET.Element('ResponseAssertion', {
+        'guiclass': 'AssertionGui',
+        'testclass': 'ResponseAssertion',
+        'testname': slot('testname'),
+        'enabled': 'true'
+    })
+    test_strings = ET.SubElement(assertion, 'collectionProp', {'name': 'Asserion.test_strings'})
+    ET.SubElement(test_strings, 'stringProp', {'name': '49586'}).text = slot('expected')
+    ET.SubElement(assertion, 'stringProp', {'name': 'Assertion.custom_message'})
+    ET.SubElement(assertion, 'stringProp', {'name': 'Assertion.test_field'}).text = slot('test_field')
+    ET.SubElement(assertion, 'boolProp', {'name': 'Assertion.assume_success'}).text = 'false'
+    ET.SubElement(assertion, 'intProp', {'name': 'Assertion.test_type'}).text = '8'  # Equals
+    templates['response_assertion'] = JMXTemplate(assertion)
+    
+    return templates
 
 
 class PostmanToJMeterConverter:
-    def __init__(self):
+    _templates = None
+    
+    def __init__(self, cache: Optional[FragmentCache] = None, variable_mode: str = 'resolve',
+                 load_profile: Optional[LoadProfile] = None, shared_config: bool = True,
+                 feeders: Optional[List[Feeder]] = None, correlation_header: Optional[str] = CORRELATION_HEADER):
         self.jmx_root = None
         self.test_plan = None
         self.thread_group = None
         self.hash_tree = None
         self.env_vars = {}
+        self.collection_vars = {}
+        self.variable_mode = variable_mode
+        self.feeders = feeders or []
+        self.bound_variables = bound_variables(self.feeders)
+        self.variables = VariableResolver(mode=variable_mode, bound=self.bound_variables)
+        # Feeder file names are written relative to the plan's directory
+        self.output_dir = ''
+        self.cache = cache
+        self.load_profile = load_profile or LoadProfile()
+        # Shared defaults/headers are found by a pass over the requests in convert()
+        self.shared_config = shared_config
+        self.shared: Optional[SharedConfig] = None
+        self._folders = 0
+        self._inherited_headers: List[set] = [set()]
+        # Header carrying a per-sample id for joining server-side records (None: not sent)
+        self.correlation_header = correlation_header
         
     def create_jmx_structure(self, collection_name: str):
         """Create the basic JMX structure"""
@@ -62,6 +222,15 @@ class PostmanToJMeterConverter:
         # Create sub hashtree for test elements
         self.sub_hash_tree = ET.SubElement(self.hash_tree, 'hashTree')
         
+    def add_user_defined_variables(self, variables: Dict[str, str]):
+        """Declare variables in the test plan's User Defined Variables"""
+        arguments = self.test_plan.find("elementProp[@name='TestPlan.user_defined_variables']/collectionProp")
+        for name, value in variables.items():
+            argument = ET.SubElement(arguments, 'elementProp', {'name': name, 'elementType': 'Argument'})
+            ET.SubElement(argument, 'stringProp', {'name': 'Argument.name'}).text = name
+            ET.SubElement(argument, 'stringProp', {'name': 'Argument.value'}).text = value
+            ET.SubElement(argument, 'stringProp', {'name': 'Argument.metadata'}).text = '='
+        
     def add_thread_group(self, name: str = "Thread Group"):
         """Add a thread group to the test plan"""
         thread_group = ET.SubElement(self.sub_hash_tree, 'ThreadGroup', {
@@ -82,21 +251,160 @@ class PostmanToJMeterConverter:
             'testname': 'Loop Controller',
             'enabled': 'true'
         })
+        profile = self.load_profile
         ET.SubElement(loop_controller, 'boolProp', {'name': 'LoopController.continue_forever'}).text = 'false'
-        ET.SubElement(loop_controller, 'stringProp', {'name': 'LoopController.loops'}).text = '1'
+        ET.SubElement(loop_controller, 'stringProp', {'name': 'LoopController.loops'}).text = str(profile.loops)
         
-        ET.SubElement(thread_group, 'stringProp', {'name': 'ThreadGroup.num_threads'}).text = '1'
-        ET.SubElement(thread_group, 'stringProp', {'name': 'ThreadGroup.ramp_time'}).text = '1'
+        ET.SubElement(thread_group, 'stringProp', {'name': 'ThreadGroup.num_threads'}).text = str(profile.threads)
+        ET.SubElement(thread_group, 'stringProp', {'name': 'ThreadGroup.ramp_time'}).text = '0' if profile.stepped else str(profile.ramp_up)
         ET.SubElement(thread_group, 'longProp', {'name': 'ThreadGroup.start_time'}).text = '0'
         ET.SubElement(thread_group, 'longProp', {'name': 'ThreadGroup.end_time'}).text = '0'
-        ET.SubElement(thread_group, 'boolProp', {'name': 'ThreadGroup.scheduler'}).text = 'false'
-        ET.SubElement(thread_group, 'stringProp', {'name': 'ThreadGroup.duration'}).text = ''
-        ET.SubElement(thread_group, 'stringProp', {'name': 'ThreadGroup.delay'}).text = ''
+        ET.SubElement(thread_group, 'boolProp', {'name': 'ThreadGroup.scheduler'}).text = 'true' if profile.duration else 'false'
+        ET.SubElement(thread_group, 'stringProp', {'name': 'ThreadGroup.duration'}).text = str(profile.duration) if profile.duration else ''
+        ET.SubElement(thread_group, 'stringProp', {'name': 'ThreadGroup.delay'}).text = str(profile.delay) if profile.delay else ''
         
         self.thread_group = ET.SubElement(self.sub_hash_tree, 'hashTree')
+        self.add_load_shaping(self.thread_group)
+        self.add_feeders(self.thread_group)
+        self.add_shared_config(self.thread_group)
+        self.add_correlation_header(self.thread_group)
         
         return self.thread_group
     
+    def add_load_shaping(self, parent: ET.Element):
+        """Add the stepped ramp-up and rate/pacing timers of the load profile"""
+        profile = self.load_profile
+        if profile.stepped:
+            # Threads all start at once and the n-th batch waits n steps on its first
+            # iteration; the batch size follows the thread count, so split plans still step
+            step_ms = profile.ramp_up * 1000 // profile.steps
+            controller = ET.SubElement(parent, 'OnceOnlyController', {
+                'guiclass': 'OnceOnlyControllerGui',
+                'testclass': 'OnceOnlyController',
+                'testname': 'Stepped ramp-up',
+                'enabled': 'true'
+            })
+            controller_tree = ET.SubElement(parent, 'hashTree')
+            action = ET.SubElement(controller_tree, 'TestAction', {
+                'guiclass': 'TestActionGui',
+                'testclass': 'TestAction',
+                'testname': f'Wait for step ({profile.steps} steps over {profile.ramp_up}s)',
+                'enabled': 'true'
+            })
+            ET.SubElement(action, 'intProp', {'name': 'ActionProcessor.action'}).text = '1'
+            ET.SubElement(action, 'intProp', {'name': 'ActionProcessor.target'}).text = '0'
+            ET.SubElement(action, 'stringProp', {'name': 'ActionProcessor.duration'}).text = (
+                '${__groovy(ctx.getThreadNum().intdiv((ctx.getThreadGroup().getNumThreads() + '
+                f'{profile.steps - 1}).intdiv({profile.steps})) * {step_ms})}}'
+            )
+            ET.SubElement(controller_tree, 'hashTree')
+        
+        if profile.arrival_rate:
+            # Open model: samples arrive at a fixed rate however long responses take
+            timer = ET.SubElement(parent, 'PreciseThroughputTimer', {
+                'guiclass': 'TestBeanGUI',
+                'testclass': 'PreciseThroughputTimer',
+                'testname': 'Arrival rate',
+                'enabled': 'true'
+            })
+            self._add_double_prop(timer, 'allowedThroughputSurplus', 1.0)
+            ET.SubElement(timer, 'intProp', {'name': 'exactLimit'}).text = '10000'
+            self._add_double_prop(timer, 'throughput', profile.arrival_rate)
+            ET.SubElement(timer, 'intProp', {'name': 'throughputPeriod'}).text = '1'
+            ET.SubElement(timer, 'longProp', {'name': 'duration'}).text = str(profile.duration or 3600)
+            ET.SubElement(timer, 'intProp', {'name': 'batchSize'}).text = '1'
+            ET.SubElement(timer, 'intProp', {'name': 'batchThreadDelay'}).text = '0'
+            ET.SubElement(timer, 'longProp', {'name': 'randomSeed'}).text = '0'
+            ET.SubElement(parent, 'hashTree')
+        elif profile.throughput or profile.pacing:
+            # calcMode 1 shares the target between all active threads; 0 paces each thread
+            per_minute = profile.throughput if profile.throughput else 60.0 / profile.pacing
+            timer = ET.SubElement(parent, 'ConstantThroughputTimer', {
+                'guiclass': 'TestBeanGUI',
+                'testclass': 'ConstantThroughputTimer',
+                'testname': 'Throughput target' if profile.throughput else 'Pacing',
+                'enabled': 'true'
+            })
+            ET.SubElement(timer, 'intProp', {'name': 'calcMode'}).text = '1' if profile.throughput else '0'
+            self._add_double_prop(timer, 'throughput', per_minute)
+            ET.SubElement(parent, 'hashTree')
+    
+    def add_feeders(self, parent: ET.Element):
+        """Add a CSV Data Set Config for every feeder"""
+        for feeder in self.feeders:
+            try:
+                filename = os.path.relpath(os.path.abspath(feeder.path), os.path.abspath(self.output_dir or '.'))
+            except ValueError:
+                # Different drive on Windows
+                filename = feeder.path
+            data_set = ET.SubElement(parent, 'CSVDataSet', {
+                'guiclass': 'TestBeanGUI',
+                'testclass': 'CSVDataSet',
+                'testname': f'CSV Data Set Config: {os.path.basename(feeder.path)}',
+                'enabled': 'true'
+            })
+            ET.SubElement(data_set, 'stringProp', {'name': 'delimiter'}).text = feeder.delimiter
+            ET.SubElement(data_set, 'stringProp', {'name': 'fileEncoding'}).text = feeder.encoding
+            ET.SubElement(data_set, 'stringProp', {'name': 'filename'}).text = filename.replace(os.sep, '/')
+            ET.SubElement(data_set, 'boolProp', {'name': 'ignoreFirstLine'}).text = str(feeder.ignore_first_line).lower()
+            ET.SubElement(data_set, 'boolProp', {'name': 'quotedData'}).text = 'true'
+            ET.SubElement(data_set, 'boolProp', {'name': 'recycle'}).text = str(feeder.recycle).lower()
+            ET.SubElement(data_set, 'stringProp', {'name': 'shareMode'}).text = SHARE_MODES[feeder.sharing]
+            ET.SubElement(data_set, 'boolProp', {'name': 'stopThread'}).text = str(feeder.stop_thread).lower()
+            ET.SubElement(data_set, 'stringProp', {'name': 'variableNames'}).text = ','.join(feeder.variables)
+            ET.SubElement(parent, 'hashTree')
+    
+    def add_shared_config(self, parent: ET.Element):
+        """Add the HTTP Request Defaults and headers every request shares"""
+        if self.shared is None:
+            return
+        if self.shared.defaults:
+            protocol, domain, port = self.shared.defaults
+            defaults = ET.SubElement(parent, 'ConfigTestElement', {
+                'guiclass': 'HttpDefaultsGui',
+                'testclass': 'ConfigTestElement',
+                'testname': 'HTTP Request Defaults',
+                'enabled': 'true'
+            })
+            arguments = ET.SubElement(defaults, 'elementProp', {
+                'name': 'HTTPsampler.Arguments',
+                'elementType': 'Arguments',
+                'guiclass': 'HTTPArgumentsPanel',
+                'testclass': 'Arguments',
+                'testname': 'User Defined Variables',
+                'enabled': 'true'
+            })
+            ET.SubElement(arguments, 'collectionProp', {'name': 'Arguments.arguments'})
+            ET.SubElement(defaults, 'stringProp', {'name': 'HTTPSampler.domain'}).text = domain
+            ET.SubElement(defaults, 'stringProp', {'name': 'HTTPSampler.port'}).text = port
+            ET.SubElement(defaults, 'stringProp', {'name': 'HTTPSampler.protocol'}).text = protocol
+            ET.SubElement(defaults, 'stringProp', {'name': 'HTTPSampler.contentEncoding'})
+            ET.SubElement(defaults, 'stringProp', {'name': 'HTTPSampler.path'})
+            ET.SubElement(parent, 'hashTree')
+        
+        headers = self.shared.lifted(0, set())
+        if headers:
+            for template, values in self.header_manager_values(headers):
+                parent.append(template.build(values))
+        self._inherited_headers = [set(headers)]
+    
+    def add_correlation_header(self, parent: ET.Element):
+        """Add a Header Manager sending a new random id with every sampler of the thread group"""
+        if not self.correlation_header:
+            return
+        value = f'${{__RandomString(16,0123456789abcdef,{CORRELATION_VARIABLE})}}'
+        (manager, values), (tree, tree_values) = self.header_manager_values([(self.correlation_header, value)])
+        element = manager.build(values)
+        element.set('testname', 'Correlation ID')
+        parent.append(element)
+        parent.append(tree.build(tree_values))
+    
+    def _add_double_prop(self, parent: ET.Element, name: str, value: float):
+        prop = ET.SubElement(parent, 'doubleProp')
+        ET.SubElement(prop, 'name').text = name
+        ET.SubElement(prop, 'value').text = repr(float(value))
+        ET.SubElement(prop, 'savedValue').text = '0.0'
+    
     def load_environment(self, env_file: str):
         """Load Postman environment variables"""
         try:
@@ -108,15 +416,26 @@ class PostmanToJMeterConverter:
                             self.env_vars[item['key']] = item['value']
         except Exception as e:
             print(f"Warning: Could not load environment file: {e}")
+        self.set_variables()
+    
+    def set_variables(self, collection_vars: Optional[Dict[str, Any]] = None):
+        """Rebuild the variable resolver; environment values override collection ones"""
+        if collection_vars is not None:
+            self.collection_vars = collection_vars
+        self.variables = VariableResolver({**self.collection_vars, **self.env_vars}, self.variable_mode,
+                                          bound=self.bound_variables)
+    
+    def set_collection_variables(self, collection: Dict[str, Any]):
+        """Use the enabled variables declared in a collection header"""
+        collection_vars = {}
+        for variable in collection.get('variable', []):
+            if not variable.get('disabled') and 'key' in variable:
+                collection_vars[variable['key']] = variable.get('value', '')
+        self.set_variables(collection_vars)
     
     def replace_variables(self, text: str) -> str:
-        """Replace Postman variables {{var}} with JMeter ${var} format"""
-        if not text:
-            return text
-        
-        # Replace {{variable}} with ${variable}
-        result = re.sub(r'\{\{([^}]+)\}\}', r'${\1}', text)
-        return result
+        """Replace Postman variables {{var}} with their values or JMeter ${var} references"""
+        return self.variables.replace(text)
     
     def parse_url(self, request: Dict) -> tuple:
         """Parse Postman URL into protocol, host, port, path"""
@@ -124,6 +443,13 @@ class PostmanToJMeterConverter:
         
         if isinstance(url, str):
             # Simple string URL
+            split = self.variables.split_base_url(url)
+            if split is not None:
+                # {{baseUrl}}/path in "jmeter" mode: reference the parts of the base URL
+                parts, rest = split
+                rest = self.replace_variables(rest)
+                path = parts['path'] + (rest if rest.startswith('/') else '/' + rest)
+                return parts['protocol'], parts['host'], parts['port'], path
             url_str = self.replace_variables(url)
             if '://' in url_str:
                 protocol = url_str.split('://')[0]
@@ -152,13 +478,33 @@ class PostmanToJMeterConverter:
         protocol = url.get('protocol', 'https')
         host_parts = url.get('host', [])
         host = '.'.join(host_parts) if isinstance(host_parts, list) else str(host_parts)
-        port = str(url.get('port', '443' if protocol == 'https' else '80'))
+        port = str(url['port']) if 'port' in url else None
         path_parts = url.get('path', [])
         path = '/' + '/'.join(path_parts) if path_parts else '/'
         
         # Apply variable replacement
-        host = self.replace_variables(host)
+        split = self.variables.split_base_url(host)
         path = self.replace_variables(path)
+        if split is not None and not split[1]:
+            # A {{baseUrl}} host in "jmeter" mode: reference the parts of the base URL
+            parts = split[0]
+            protocol, host = parts['protocol'], parts['host']
+            port = port or parts['port']
+            path = parts['path'] + path
+        host = self.replace_variables(host)
+        
+        # A resolved host such as {{baseUrl}} may carry a scheme, port or path prefix
+        if '://' in host:
+            protocol, host = host.split('://', 1)
+        if '/' in host:
+            host, prefix = host.split('/', 1)
+            if prefix.strip('/'):
+                path = '/' + prefix.strip('/') + path
+        if ':' in host and not host.startswith('['):
+            host, host_port = host.split(':', 1)
+            port = port or host_port
+        if port is None:
+            port = '443' if protocol == 'https' else '80'
         
         # Handle query parameters
         query = url.get('query', [])
@@ -170,109 +516,78 @@ class PostmanToJMeterConverter:
         
         return protocol, host, port, path
     
-    def add_http_sampler(self, parent: ET.Element, item: Dict, name: str):
-        """Add HTTP Request sampler"""
+    @classmethod
+    def templates(cls) -> Dict[str, JMXTemplate]:
+        """Sampler, header and assertion templates, compiled once per process"""
+        if cls._templates is None:
+            cls._templates = _build_templates()
+        return cls._templates
+    
+    def sampler_values(self, item: Dict, name: str) -> Tuple[Dict, Dict]:
+        """Work out the per-request values for the sampler and sampler hashTree templates"""
+        templates = self.templates()
         request = item.get('request', {})
         
         # Parse URL
         protocol, host, port, path = self.parse_url(request)
         method = request.get('method', 'GET')
         
-        # Create HTTP Sampler
-        sampler = ET.SubElement(parent, 'HTTPSamplerProxy', {
-            'guiclass': 'HttpTestSampleGui',
-            'testclass': 'HTTPSamplerProxy',
-            'testname': name,
-            'enabled': 'true'
-        })
-        
-        # Add properties
-        ET.SubElement(sampler, 'elementProp', {
-            'name': 'HTTPsampler.Arguments',
-            'elementType': 'Arguments',
-            'guiclass': 'HTTPArgumentsPanel',
-            'testclass': 'Arguments',
-            'testname': 'User Defined Variables',
-            'enabled': 'true'
-        })
-        
-        arguments = ET.SubElement(sampler, 'elementProp', {
-            'name': 'HTTPsampler.Arguments',
-            'elementType': 'Arguments'
-        })
-        args_collection = ET.SubElement(arguments, 'collectionProp', {'name': 'Arguments.arguments'})
-        
         # Handle body
+        arguments = []
+        raw_flag = []
         body = request.get('body', {})
         if body:
             mode = body.get('mode', 'raw')
             
             if mode == 'raw':
                 raw_data = self.replace_variables(body.get('raw', ''))
-                ET.SubElement(sampler, 'boolProp', {'name': 'HTTPSampler.postBodyRaw'}).text = 'true'
-                arg = ET.SubElement(args_collection, 'elementProp', {
-                    'name': '',
-                    'elementType': 'HTTPArgument'
-                })
-                ET.SubElement(arg, 'boolProp', {'name': 'HTTPArgument.always_encode'}).text = 'false'
-                ET.SubElement(arg, 'stringProp', {'name': 'Argument.value'}).text = raw_data
-                ET.SubElement(arg, 'stringProp', {'name': 'Argument.metadata'}).text = '='
+                raw_flag.append((templates['post_body_raw'], {}))
+                arguments.append((templates['raw_argument'], {'value': raw_data}))
             
             elif mode == 'formdata' or mode == 'urlencoded':
                 form_data = body.get(mode, [])
                 for param in form_data:
                     if param.get('disabled') != True:
-                        arg = ET.SubElement(args_collection, 'elementProp', {
+                        arguments.append((templates['form_argument'], {
                             'name': param['key'],
-                            'elementType': 'HTTPArgument'
-                        })
-                        ET.SubElement(arg, 'boolProp', {'name': 'HTTPArgument.always_encode'}).text = 'true'
-                        ET.SubElement(arg, 'stringProp', {'name': 'Argument.value'}).text = self.replace_variables(param.get('value', ''))
-                        ET.SubElement(arg, 'stringProp', {'name': 'Argument.metadata'}).text = '='
-                        ET.SubElement(arg, 'boolProp', {'name': 'HTTPArgument.use_equals'}).text = 'true'
-                        ET.SubElement(arg, 'stringProp', {'name': 'Argument.name'}).text = param['key']
-        
-        ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.domain'}).text = host
-        ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.port'}).text = port
-        ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.protocol'}).text = protocol
-        ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.contentEncoding'})
-        ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.path'}).text = path
-        ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.method'}).text = method
-        ET.SubElement(sampler, 'boolProp', {'name': 'HTTPSampler.follow_redirects'}).text = 'true'
-        ET.SubElement(sampler, 'boolProp', {'name': 'HTTPSampler.auto_redirects'}).text = 'false'
-        ET.SubElement(sampler, 'boolProp', {'name': 'HTTPSampler.use_keepalive'}).text = 'true'
-        ET.SubElement(sampler, 'boolProp', {'name': 'HTTPSampler.DO_MULTIPART_POST'}).text = 'false'
-        ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.embedded_url_re'})
-        ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.connect_timeout'})
-        ET.SubElement(sampler, 'stringProp', {'name': 'HTTPSampler.response_timeout'})
-        
-        # Create sampler hashtree
-        sampler_tree = ET.SubElement(parent, 'hashTree')
-        
-        # Add headers
-        headers = request.get('header', [])
-        if headers:
-            header_manager = ET.SubElement(sampler_tree, 'HeaderManager', {
-                'guiclass': 'HeaderPanel',
-                'testclass': 'HeaderManager',
-                'testname': 'HTTP Header Manager',
-                'enabled': 'true'
-            })
-            
-            headers_collection = ET.SubElement(header_manager, 'collectionProp', {'name': 'HeaderManager.headers'})
-            
-            for header in headers:
-                if header.get('disabled') != True:
-                    header_elem = ET.SubElement(headers_collection, 'elementProp', {
-                        'name': '',
-                        'elementType': 'Header'
-                    })
-                    ET.SubElement(header_elem, 'stringProp', {'name': 'Header.name'}).text = header['key']
-                    ET.SubElement(header_elem, 'stringProp', {'name': 'Header.value'}).text = self.replace_variables(header.get('value', ''))
-            
-            ET.SubElement(sampler_tree, 'hashTree')
+                            'value': self.replace_variables(param.get('value', ''))
+                        }))
+        
+        target = []
+        defaults = self.shared.defaults if self.shared is not None else None
+        default_protocol, default_domain, default_port = defaults or (None, None, None)
+        for prop, value, default in (('HTTPSampler.domain', host, default_domain),
+                                     ('HTTPSampler.port', port, default_port),
+                                     ('HTTPSampler.protocol', protocol, default_protocol)):
+            if value != default:
+                target.append((templates['string_prop'], {'name': prop, 'value': value}))
+        
+        sampler_values = {
+            'testname': name,
+            'arguments': arguments,
+            'raw_flag': raw_flag,
+            'target': target,
+            'path': path,
+            'method': method
+        }
+        
+        # Add headers (minus those a shared Header Manager already sends)
+        children = []
+        if request.get('header'):
+            inherited = self._inherited_headers[-1]
+            headers = [header for header in self.request_headers(request) if header not in inherited]
+            if headers or not inherited:
+                children.extend(self.header_manager_values(headers))
         
         # Add basic assertions if response tests exist
+        for expected in self.expected_status_codes(item):
+            children.extend(self.assertion_values(expected, 'Response Code'))
+        
+        return sampler_values, {'children': children}
+    
+    def expected_status_codes(self, item: Dict) -> List[str]:
+        """Response codes asserted by the item's test scripts (one entry per assertion)"""
+        expected = []
         events = item.get('event', [])
         for event in events:
             if event.get('listen') == 'test':
@@ -282,35 +597,58 @@ class PostmanToJMeterConverter:
                 for line in exec_lines:
                     # Simple response code assertion
                     if 'pm.response.to.have.status(200)' in line or 'response.code === 200' in line:
-                        self.add_response_assertion(sampler_tree, '200', 'Response Code')
+                        expected.append('200')
                     elif 'pm.response.to.be.ok' in line:
-                        self.add_response_assertion(sampler_tree, '200', 'Response Code')
-        
+                        expected.append('200')
+        return expected
+    
+    def request_headers(self, request: Dict) -> List[Tuple[str, str]]:
+        """Enabled headers of a request as (name, value) pairs"""
+        return [(header['key'], self.replace_variables(header.get('value', '')))
+                for header in request.get('header', []) if header.get('disabled') != True]
+    
+    def header_manager_values(self, headers: List[Tuple[str, str]]) -> List[Tuple[JMXTemplate, Dict]]:
+        """Template values for a Header Manager and its hashTree"""
+        templates = self.templates()
+        header_values = [(templates['header'], {'name': name, 'value': value}) for name, value in headers]
+        return [(templates['header_manager'], {'headers': header_values}), (templates['hash_tree'], {})]
+    
+    def describe_request(self, item: Dict) -> Tuple[Tuple[str, str, str], List[Tuple[str, str]]]:
+        """(protocol, domain, port) and headers of a request, for finding shared values"""
+        request = item.get('request', {})
+        protocol, host, port, _ = self.parse_url(request)
+        return (protocol, host, port), self.request_headers(request)
+    
+    def add_http_sampler(self, parent: ET.Element, item: Dict, name: str):
+        """Add HTTP Request sampler"""
+        templates = self.templates()
+        sampler_values, tree_values = self.sampler_values(item, name)
+        parent.append(templates['sampler'].build(sampler_values))
+        sampler_tree = templates['hash_tree_slot'].build(tree_values)
+        parent.append(sampler_tree)
         return sampler_tree
     
+    def render_http_sampler(self, item: Dict, name: str, depth: int) -> str:
+        """Serialize an HTTP Request sampler and its hashTree for a JMXWriter at depth"""
+        templates = self.templates()
+        with tracing.step('convert.build'):
+            sampler_values, tree_values = self.sampler_values(item, name)
+        return (templates['sampler'].render(depth, sampler_values) +
+                templates['hash_tree_slot'].render(depth, tree_values))
+    
+    def assertion_values(self, expected_value: str, field: str = 'Response Code') -> List[Tuple[JMXTemplate, Dict]]:
+        """Template values for a response assertion and its hashTree"""
+        templates = self.templates()
+        return [(templates['response_assertion'], {
+            'testname': f'Assert {field}',
+            'expected': expected_value,
+            'test_field': 'Assertion.response_code' if field == 'Response Code' else 'Assertion.response_data'
+        }), (templates['hash_tree'], {})]
+    
     def add_response_assertion(self, parent: ET.Element, expected_value: str, field: str = 'Response Code'):
         """Add a response assertion"""
-        assertion = ET.SubElement(parent, 'ResponseAssertion', {
-            'guiclass': 'AssertionGui',
-            'testclass': 'ResponseAssertion',
-            'testname': f'Assert {field}',
-            'enabled': 'true'
-        })
-        
-        test_strings = ET.SubElement(assertion, 'collectionProp', {'name': 'Asserion.test_strings'})
-        ET.SubElement(test_strings, 'stringProp', {'name': '49586'}).text = expected_value
-        
-        ET.SubElement(assertion, 'stringProp', {'name': 'Assertion.custom_message'})
-        
-        if field == 'Response Code':
-            ET.SubElement(assertion, 'stringProp', {'name': 'Assertion.test_field'}).text = 'Assertion.response_code'
-        else:
-            ET.SubElement(assertion, 'stringProp', {'name': 'Assertion.test_field'}).text = 'Assertion.response_data'
-        
-        ET.SubElement(assertion, 'boolProp', {'name': 'Assertion.assume_success'}).text = 'false'
-        ET.SubElement(assertion, 'intProp', {'name': 'Assertion.test_type'}).text = '8'  # Equals
-        
-        ET.SubElement(parent, 'hashTree')
+        for template, values in self.assertion_values(expected_value, field):
+            parent.append(template.build(values))
     
     def add_simple_controller(self, parent: ET.Element, name: str) -> ET.Element:
         """Add a Simple Controller for organizing requests (folders)"""
@@ -325,67 +663,351 @@ class PostmanToJMeterConverter:
         return controller_tree
     
     def process_items(self, items: List[Dict], parent: ET.Element):
-        """Process Postman collection items recursively"""
-        for item in items:
-            if 'item' in item:
-                # It's a folder
+        """Process Postman collection items, walking folders with an explicit stack"""
+        parents = [parent]
+        for event, item in iter_items(items):
+            if event == 'folder':
                 folder_name = item.get('name', 'Folder')
-                folder_tree = self.add_simple_controller(parent, folder_name)
-                self.process_items(item['item'], folder_tree)
-            else:
-                # It's a request
+                parents.append(self.add_simple_controller(parents[-1], folder_name))
+            elif event == 'request':
                 request_name = item.get('name', 'HTTP Request')
-                self.add_http_sampler(parent, item, request_name)
+                self.add_http_sampler(parents[-1], item, request_name)
+            else:
+                parents.pop()
+    
+    def write_items(self, events: Iterable[Event], writer: JMXWriter):
+        """Stream folder/request events to a JMX writer"""
+        # Folder controllers are built into a scratch parent, written, then
+        # discarded; requests are rendered straight from the templates
+        holder = ET.Element('hashTree')
+        for event, item in events:
+            if event == 'folder':
+                tracing.count('convert.folders')
+                with tracing.step('convert.folder'):
+                    folder_name = item.get('name', 'Folder')
+                    self.add_simple_controller(holder, folder_name)
+                    writer.write(holder[0])
+                    writer.start('hashTree')
+                    self.write_folder_headers(writer)
+            elif event == 'request':
+                tracing.count('convert.requests')
+                self.write_request(item, writer)
+            else:
+                writer.end()
+                self._inherited_headers.pop()
+            holder.clear()
+    
+    def write_folder_headers(self, writer: JMXWriter):
+        """Write the Header Manager for headers every request of the folder sends"""
+        self._folders += 1
+        inherited = self._inherited_headers[-1]
+        headers = self.shared.lifted(self._folders, inherited) if self.shared is not None else []
+        if headers:
+            for template, values in self.header_manager_values(headers):
+                writer.write_fragment(template.render(writer.depth, values))
+            inherited = inherited | set(headers)
+        self._inherited_headers.append(inherited)
+    
+    def cache_context(self, depth: int) -> Dict[str, Any]:
+        """Everything besides the item itself that shapes a sampler fragment"""
+        context = {'depth': depth, 'variables': self.variables.values, 'mode': self.variable_mode}
+        if self.bound_variables:
+            context['bound'] = sorted(self.bound_variables)
+        if self.shared is not None:
+            context['shared'] = [self.shared.defaults, sorted(self._inherited_headers[-1])]
+        return context
+    
+    def write_request(self, item: Dict, writer: JMXWriter):
+        """Write one request's sampler and hashTree, reusing a cached fragment if possible"""
+        key = None
+        if self.cache is not None:
+            with tracing.step('convert.cache_lookup'):
+                key = self.cache.key(item, self.cache_context(writer.depth))
+                cached = self.cache.get(key)
+            if cached is not None:
+                fragment, unresolved = cached
+                # Rendering would have reported these; keep the warning on a hit
+                self.variables.unresolved.update(unresolved)
+                writer.write_fragment(fragment)
+                return
+        
+        request_name = item.get('name', 'HTTP Request')
+        with tracing.step('convert.render'), self.variables.collect_unresolved() as unresolved:
+            fragment = self.render_http_sampler(item, request_name, writer.depth)
+        if key is not None:
+            with tracing.step('convert.cache_store'):
+                self.cache.put(key, fragment, unresolved)
+        writer.write_fragment(fragment)
     
     def convert(self, postman_file: str, output_file: str, env_file: Optional[str] = None):
         """Convert Postman collection to JMeter JMX"""
-        # Load Postman collection
+        # Load the collection header; items are read incrementally below.
+        # Collection variables usually follow the items, so read past them.
+        reader = PostmanCollectionReader(postman_file)
         try:
-            with open(postman_file, 'r', encoding='utf-8') as f:
-                collection = json.load(f)
+            with tracing.span('convert.read_header'):
+                collection = reader.read_header(required=('info', 'variable'))
         except Exception as e:
+            reader.close()
             print(f"Error loading Postman collection: {e}")
             return False
         
-        # Load environment if provided
-        if env_file:
-            self.load_environment(env_file)
+        with tracing.span('convert.variables'):
+            # Load environment if provided
+            if env_file:
+                self.load_environment(env_file)
+            
+            # Collection variables
+            self.set_collection_variables(collection)
         
         # Get collection info
         info = collection.get('info', {})
         collection_name = info.get('name', 'Test Plan')
         
-        # Create JMX structure
-        self.create_jmx_structure(collection_name)
-        
-        # Add thread group
-        thread_group_tree = self.add_thread_group(f"{collection_name} - Thread Group")
+        # Find the protocol/domain/port and headers worth sharing between samplers
+        if self.shared_config:
+            try:
+                self.shared = SharedConfig()
+                with tracing.span('convert.shared_config'):
+                    self.shared.observe(tracing.timed_iter('convert.parse', reader.events()), self.describe_request)
+            except Exception as e:
+                reader.close()
+                print(f"Error loading Postman collection: {e}")
+                return False
         
-        # Process all items
-        items = collection.get('item', [])
-        self.process_items(items, thread_group_tree)
+        # Create JMX structure
+        self.output_dir = os.path.dirname(output_file)
+        with tracing.span('convert.structure'):
+            self.create_jmx_structure(collection_name)
+            self.add_user_defined_variables(self.variables.user_defined_variables())
+            
+            # Add thread group
+            thread_group_tree = self.add_thread_group(f"{collection_name} - Thread Group")
         
-        # Write to file
+        # Stream all items straight to disk; the partial file only replaces
+        # the output once the whole plan has been written. Every conversion
+        # gets its own temporary file, so concurrent ones never share one
+        temp_file = None
         try:
-            xml_str = minidom.parseString(ET.tostring(self.jmx_root, encoding='unicode')).toprettyxml(indent='  ')
-            # Remove empty lines
-            xml_str = '\n'.join([line for line in xml_str.split('\n') if line.strip()])
-
             # make sure output directory exists
             out_dir = os.path.dirname(output_file)
             if out_dir and not os.path.exists(out_dir):
                 os.makedirs(out_dir, exist_ok=True)
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(xml_str)
+            fd, temp_file = tempfile.mkstemp(prefix=f".{os.path.basename(output_file)}.", suffix='.tmp',
+                                             dir=out_dir or '.')
+            with reader, open(fd, 'w', encoding='utf-8') as f, tracing.span('convert.write'):
+                writer = JMXWriter(f)
+                writer.begin(self.jmx_root, thread_group_tree)
+                self.write_items(tracing.timed_iter('convert.parse', reader.events()), writer)
+                writer.close()
+            os.chmod(temp_file, FILE_MODE)
+            os.replace(temp_file, output_file)
             
+            if self.variables.unresolved:
+                names = ', '.join(sorted(self.variables.unresolved))
+                print(f"Warning: variables left for JMeter to resolve: {names}")
+            if self.cache is not None:
+                stats = self.cache.stats()
+                tracing.count('convert.cache_hits', stats['hits'])
+                tracing.count('convert.cache_misses', stats['misses'])
+                print(f"Fragment cache: {stats['hits']} hits, {stats['misses']} misses "
+                      f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} entries, "
+                      f"{stats['bytes'] / (1024 * 1024):.1f} MB")
             print(f"✓ Successfully converted '{postman_file}' to '{output_file}'")
             return True
         except Exception as e:
+            if temp_file and os.path.exists(temp_file):
+                os.unlink(temp_file)
             print(f"Error writing JMX file: {e}")
             return False
 
 
+def _looks_like_collection(path: str) -> bool:
+    """Environment and globals files are left out; unreadable files are kept so they are reported"""
+    try:
+        return is_collection(path)
+    except (OSError, ValueError):
+        return True
+
+
+def find_collections(inputs: List[str]) -> List[str]:
+    """Expand files, directories and glob patterns into collection files
+
+    Directories and patterns only contribute files with a collection's top
+    level; files named explicitly are always converted.
+    """
+    found = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            matches = [path for path in sorted(glob.glob(os.path.join(entry, '*.json')))
+                       if _looks_like_collection(path)]
+        elif any(char in entry for char in '*?['):
+            matches = [path for path in sorted(glob.glob(entry, recursive=True)) if _looks_like_collection(path)]
+        else:
+            matches = [entry]
+        for path in matches:
+            if path not in found:
+                found.append(path)
+    return found
+
+
+# Settings that change how a conversion runs but not the plan it writes
+RUN_SETTINGS = ('cache', 'cache_bytes', 'trace', 'trace_profile')
+
+
+def settings_digest(settings: Dict[str, Any], env_file: Optional[str] = None) -> str:
+    """Digest of the converter version and every setting that shapes the plan"""
+    shaping = {key: value for key, value in settings.items() if key not in RUN_SETTINGS}
+    shaping['environment'] = os.path.abspath(env_file) if env_file else None
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(converter_version().encode('utf-8'))
+    digest.update(json.dumps(shaping, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def settings_path(output_file: str) -> str:
+    """Batch mode notes the settings digest of each plan it writes next to it: plan.jmx.settings"""
+    return f"{output_file}.settings"
+
+
+def is_up_to_date(input_file: str, output_file: str, env_file: Optional[str] = None,
+                  extra_sources: Iterable[Optional[str]] = (), digest: Optional[str] = None) -> bool:
+    """Check whether output_file is newer than the collection (and environment, profile file, feeders)
+
+    With a digest, the plan must also have been written with the same settings.
+    """
+    if not os.path.exists(output_file):
+        return False
+    if digest is not None:
+        try:
+            with open(settings_path(output_file), 'r', encoding='utf-8') as f:
+                if f.read().strip() != digest:
+                    return False
+        except OSError:
+            return False
+    output_time = os.path.getmtime(output_file)
+    sources = [input_file] + [source for source in [env_file, *extra_sources] if source]
+    return all(os.path.exists(source) and os.path.getmtime(source) <= output_time for source in sources)
+
+
+def run_conversion(input_file: str, output_file: str, env_file: Optional[str] = None,
+                   settings: Optional[Dict[str, Any]] = None) -> bool:
+    """Convert one collection with the CLI/batch settings (cache, variable mode, load profile, trace)"""
+    settings = settings or {}
+    profile = LoadProfile.from_dict(settings['profile']) if settings.get('profile') else None
+    feeders = [Feeder.from_dict(feeder) for feeder in settings.get('feeders', [])]
+    with tracing.trace_run('convert', settings.get('trace'), settings.get('trace_profile'),
+                           collection=input_file) as tracer:
+        cache = None
+        if settings.get('cache'):
+            cache = FragmentCache(settings['cache'], settings.get('cache_bytes', 256 * 1024 * 1024),
+                                  version=converter_version())
+        try:
+            converter = PostmanToJMeterConverter(cache=cache, variable_mode=settings.get('variables', 'resolve'),
+                                                 load_profile=profile,
+                                                 shared_config=settings.get('shared_config', True),
+                                                 feeders=feeders,
+                                                 correlation_header=settings.get('correlation_header',
+                                                                                 CORRELATION_HEADER))
+            success = converter.convert(input_file, output_file, env_file)
+            if tracer is not None and not success:
+                tracer.status = 'failed'
+            return success
+        finally:
+            if cache is not None:
+                cache.close()
+
+
+def _convert_job(job: Tuple[str, str, Optional[str], Dict[str, Any], str]) -> Tuple[str, str, bool, float, str]:
+    """Convert one collection in a worker process and capture its messages"""
+    input_file, output_file, env_file, settings, digest = job
+    messages = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(messages):
+            success = run_conversion(input_file, output_file, env_file, settings)
+        if success:
+            with open(settings_path(output_file), 'w', encoding='utf-8') as f:
+                f.write(digest + '\n')
+    except Exception as e:
+        success = False
+        messages.write(f"Error: {e}\n")
+    elapsed = time.perf_counter() - start
+    lines = messages.getvalue().strip().splitlines()
+    return input_file, output_file, success, elapsed, lines[-1] if lines else ''
+
+
+def convert_batch(inputs: List[str], output_dir: Optional[str] = None, env_file: Optional[str] = None,
+                  jobs: Optional[int] = None, force: bool = False,
+                  settings: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Convert many collections in parallel, skipping outputs that are up to date
+
+    Returns one result dict per collection (input, output, status, seconds, message).
+    """
+    settings = settings or {}
+    digest = settings_digest(settings, env_file)
+    # Files besides the collection whose changes make a plan stale
+    sources = [settings.get('profile_file')] + [feeder['path'] for feeder in settings.get('feeders', [])]
+    results = []
+    pending = []
+    targets: Dict[str, List[str]] = {}
+    for input_file in find_collections(inputs):
+        base_name = os.path.splitext(os.path.basename(input_file))[0]
+        out_dir = output_dir if output_dir else os.path.dirname(input_file)
+        targets.setdefault(os.path.normpath(os.path.join(out_dir, f"{base_name}.jmx")), []).append(input_file)
+    
+    for output_file, input_files in targets.items():
+        if len(input_files) > 1:
+            # e.g. teamA/orders.json and teamB/orders.json with one output directory
+            for input_file in input_files:
+                others = ', '.join(other for other in input_files if other != input_file)
+                results.append({'input': input_file, 'output': output_file, 'status': 'failed', 'seconds': 0.0,
+                                'message': f"Error: same output as {others}; convert them into separate "
+                                           f"output directories"})
+            continue
+        input_file = input_files[0]
+        if not force and is_up_to_date(input_file, output_file, env_file, sources, digest):
+            results.append({'input': input_file, 'output': output_file, 'status': 'skipped',
+                            'seconds': 0.0, 'message': 'output is up to date'})
+        else:
+            pending.append((input_file, output_file, env_file, settings, digest))
+
+    def record(outcome):
+        input_file, output_file, success, elapsed, message = outcome
+        results.append({'input': input_file, 'output': output_file,
+                        'status': 'converted' if success else 'failed',
+                        'seconds': elapsed, 'message': message})
+
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1 or len(pending) <= 1:
+        for job in pending:
+            record(_convert_job(job))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            futures = [pool.submit(_convert_job, job) for job in pending]
+            for future in as_completed(futures):
+                record(future.result())
+
+    results.sort(key=lambda result: result['input'])
+    return results
+
+
+def print_batch_summary(results: List[Dict[str, Any]], elapsed: float):
+    """Print per-file timing and status for a batch run"""
+    width = max([len(result['input']) for result in results] + [5])
+    print(f"\n{'Input':<{width}}  {'Status':<9}  {'Time (s)':>8}  Output")
+    for result in results:
+        print(f"{result['input']:<{width}}  {result['status']:<9}  {result['seconds']:>8.2f}  {result['output']}")
+        if result['status'] == 'failed' and result['message']:
+            print(f"{'':<{width}}  {result['message']}")
+
+    counts = {status: sum(1 for result in results if result['status'] == status)
+              for status in ('converted', 'skipped', 'failed')}
+    print(f"\n{counts['converted']} converted, {counts['skipped']} skipped, "
+          f"{counts['failed']} failed in {elapsed:.2f}s")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Convert Postman Collection JSON to JMeter JMX format',
@@ -395,25 +1017,110 @@ Examples:
   python convert_postman_to_jmx.py collection.json
   python convert_postman_to_jmx.py collection.json -o output.jmx
   python convert_postman_to_jmx.py collection.json -e environment.json -o test.jmx
+  python convert_postman_to_jmx.py collections/ "teams/*.json" -o plans/ -j 8
+  python convert_postman_to_jmx.py collection.json --trace data/traces --trace-profile cpu
         '''
     )
     
-    parser.add_argument('input', help='Input Postman collection JSON file')
-    parser.add_argument('-o', '--output', help='Output JMeter JMX file (default: input name with .jmx extension)')
+    parser.add_argument('input', nargs='+',
+                        help='Input Postman collection JSON file(s); directories and glob patterns run in batch mode')
+    parser.add_argument('-o', '--output',
+                        help='Output JMeter JMX file, or output directory in batch mode '
+                             '(default: input name with .jmx extension)')
     parser.add_argument('-e', '--environment', help='Postman environment JSON file (optional)')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='Worker processes for batch mode (default: number of CPUs)')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='In batch mode, convert even when the output is newer than the input')
+    parser.add_argument('--cache',
+                        help='Fragment cache file; unchanged requests are reused from it on later runs')
+    parser.add_argument('--cache-size', type=int, default=256,
+                        help='Maximum fragment cache size in MB (default: 256)')
+    parser.add_argument('--variables', choices=VARIABLE_MODES, default='resolve',
+                        help='resolve: substitute environment/collection variables at conversion time; '
+                             'jmeter: keep ${var} references and declare the values as User Defined Variables '
+                             '(default: resolve)')
+    parser.add_argument('--no-shared-config', dest='shared_config', action='store_false',
+                        help='Repeat domain, port, protocol and headers in every sampler instead of '
+                             'declaring common values once in HTTP Request Defaults and shared Header Managers')
+    parser.add_argument('--correlation-header', default=CORRELATION_HEADER, metavar='NAME',
+                        help=f'Header sending a per-sample id for joining server-side profiles '
+                             f'(default: {CORRELATION_HEADER})')
+    parser.add_argument('--no-correlation-header', dest='correlation_header', action='store_const', const=None,
+                        help='Do not send a correlation header')
+    feeder_group = parser.add_argument_group('feeders', 'Bind variables to CSV files read while the test runs')
+    feeder_group.add_argument('--feeder', action='append', default=[], metavar='FILE[:VAR,...]',
+                              help='CSV file feeding {{variables}}; names come from its header line unless given '
+                                   '(repeatable)')
+    feeder_group.add_argument('--feeder-sharing', choices=sorted(SHARE_MODES), default='all',
+                              help='all: threads share one position in the file; group: one per thread group; '
+                                   'thread: every thread reads the whole file (default: all)')
+    feeder_group.add_argument('--no-feeder-recycle', dest='feeder_recycle', action='store_false',
+                              help='Do not start over at the end of the file')
+    feeder_group.add_argument('--feeder-stop-thread', action='store_true',
+                              help='Stop a thread once the file is used up (with --no-feeder-recycle)')
+    feeder_group.add_argument('--feeder-delimiter', default=',', help='CSV delimiter (default: ,)')
+    profile_group = parser.add_argument_group('load profile', 'Thread group settings (default: 1 thread, 1 loop)')
+    profile_group.add_argument('--profile', help='Named profile from --profile-file')
+    profile_group.add_argument('--profile-file', help='JSON file with named load profiles')
+    profile_group.add_argument('--threads', type=int, help='Number of threads (virtual users)')
+    profile_group.add_argument('--ramp-up', type=int, help='Seconds to start all threads')
+    profile_group.add_argument('--duration', type=int, help='Run for this many seconds (loops until then)')
+    profile_group.add_argument('--loops', type=int, help='Iterations per thread (-1: until the duration ends)')
+    profile_group.add_argument('--delay', type=int, help='Seconds to wait before starting the thread group')
+    profile_group.add_argument('--steps', type=int, help='Start the threads in this many equal batches over the ramp-up')
+    profile_group.add_argument('--arrival-rate', type=float, help='Open model: samples per second')
+    profile_group.add_argument('--throughput', type=float, help='Total samples per minute across all threads')
+    profile_group.add_argument('--pacing', type=float, help='Seconds between two samples of one thread')
+    trace_group = parser.add_argument_group('tracing', 'Per-stage timings, one trace file per collection')
+    trace_group.add_argument('--trace', metavar='DIR', help='Write a trace file of each conversion to DIR')
+    trace_group.add_argument('--trace-profile', choices=PROFILE_MODES,
+                             help='Also capture a CPU profile (cProfile) and/or memory peaks (tracemalloc)')
     
     args = parser.parse_args()
+    try:
+        profile = resolve_profile(args.profile, args.profile_file,
+                                  {name: getattr(args, name) for name in PROFILE_FIELDS})
+    except (OSError, ValueError) as e:
+        print(f"Error: invalid load profile: {e}")
+        sys.exit(1)
+    try:
+        feeders = [Feeder.from_spec(spec, delimiter=args.feeder_delimiter, sharing=args.feeder_sharing,
+                                    recycle=args.feeder_recycle, stop_thread=args.feeder_stop_thread)
+                   for spec in args.feeder]
+        bound_variables(feeders)
+    except (OSError, ValueError) as e:
+        print(f"Error: invalid feeder: {e}")
+        sys.exit(1)
+    settings = {'cache': args.cache, 'cache_bytes': args.cache_size * 1024 * 1024,
+                'variables': args.variables, 'profile': profile.to_dict(),
+                'profile_file': args.profile_file, 'shared_config': args.shared_config,
+                'correlation_header': args.correlation_header,
+                'feeders': [feeder.to_dict() for feeder in feeders],
+                'trace': args.trace, 'trace_profile': args.trace_profile}
+    
+    # Batch mode: several inputs, a directory or a glob pattern
+    first = args.input[0]
+    if len(args.input) > 1 or os.path.isdir(first) or any(char in first for char in '*?['):
+        start = time.perf_counter()
+        results = convert_batch(args.input, args.output, args.environment, args.jobs, args.force, settings)
+        if not results:
+            print("No Postman collections found")
+            sys.exit(1)
+        print_batch_summary(results, time.perf_counter() - start)
+        sys.exit(1 if any(result['status'] == 'failed' for result in results) else 0)
     
     # Determine output filename
     if args.output:
         output_file = args.output
     else:
-        base_name = os.path.splitext(args.input)[0]
+        base_name = os.path.splitext(first)[0]
         output_file = f"{base_name}.jmx"
     
     # Convert
-    converter = PostmanToJMeterConverter()
-    success = converter.convert(args.input, output_file, args.environment)
+    success = run_conversion(first, output_file, args.environment, settings)
+    if args.trace:
+        print(f"Trace written to {args.trace}")
     
     sys.exit(0 if success else 1)
 
@@ -0,0 +1,190 @@
+"""
+Parallel crawling
+A pool of browser workers pulling pages from one shared frontier. Every URL
+is visited at most once however many workers find it, at most max_pages pages
+are visited, and each host gets a politeness limit: no more than per_host
+pages loading at once and at least host_delay seconds between two page loads.
+Each worker records requests on its own; the pool merges them in the order
+the pages were handed out, so the collection does not depend on timing.
+Workers run in a copy of the caller's context, so their spans reach the
+crawl's trace (see tracing.py).
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urldefrag, urlsplit
+
+import tracing
+
+# A visit returns the requests recorded on a page and the links found there
+Visit = Callable[[Any, str], Tuple[List[Dict[str, Any]], List[str]]]
+
+
+def normalize_url(url: str) -> str:
+    """URL used to recognize pages already seen (no fragment, lower-case scheme and host)"""
+    url, _ = urldefrag(url)
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    query = f'?{parts.query}' if parts.query else ''
+    return f'{parts.scheme.lower()}://{parts.netloc.lower()}{path}{query}'
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class Frontier:
+    """Pages waiting to be visited, shared by all workers"""
+
+    def __init__(self, max_pages: int, per_host: int = 1, host_delay: float = 0.0):
+        self.max_pages = max_pages
+        self.per_host = max(1, per_host)
+        self.host_delay = host_delay
+        self.pending: Deque[str] = deque()
+        self.seen = set()
+        self.claimed = 0
+        self.in_progress = 0
+        self.closed = False
+        self._host_active: Dict[str, int] = {}
+        self._host_next: Dict[str, float] = {}
+        self._lock = threading.Condition()
+
+    def add(self, url: str) -> bool:
+        """Queue a page unless it was queued before; True if it is new"""
+        key = normalize_url(url)
+        with self._lock:
+            if key in self.seen:
+                return False
+            self.seen.add(key)
+            self.pending.append(key)
+            self._lock.notify_all()
+            return True
+
+    def skip(self, url: str):
+        """Treat a page as seen without queuing it (visited by an earlier run)"""
+        with self._lock:
+            self.seen.add(normalize_url(url))
+
+    def _finished(self) -> bool:
+        return self.closed or self.claimed >= self.max_pages or (not self.pending and not self.in_progress)
+
+    def next(self) -> Optional[Tuple[int, str]]:
+        """Claim the next page whose host may be loaded now: (sequence, url)
+
+        Blocks while every pending page waits for its host, or while nothing is
+        pending but other workers may still find links. None once the crawl is over.
+        """
+        with self._lock:
+            while not self._finished():
+                now = time.monotonic()
+                wake = None
+                for url in self.pending:
+                    host = host_of(url)
+                    if self._host_active.get(host, 0) >= self.per_host:
+                        continue
+                    ready = self._host_next.get(host, 0.0)
+                    if ready > now:
+                        wake = ready if wake is None else min(wake, ready)
+                        continue
+                    self.pending.remove(url)
+                    self._host_active[host] = self._host_active.get(host, 0) + 1
+                    self._host_next[host] = now + self.host_delay
+                    self.in_progress += 1
+                    self.claimed += 1
+                    return self.claimed - 1, url
+                self._lock.wait(None if wake is None else wake - now)
+            return None
+
+    def done(self, url: str):
+        """Release a claimed page (after any links found on it were added)"""
+        with self._lock:
+            host = host_of(url)
+            self._host_active[host] -= 1
+            self.in_progress -= 1
+            self._lock.notify_all()
+
+    def close(self):
+        """Stop handing out pages; pages being visited still finish"""
+        with self._lock:
+            self.closed = True
+            self._lock.notify_all()
+
+
+class CrawlPool:
+    """Browser workers visiting frontier pages until the crawl is over"""
+
+    def __init__(self, frontier: Frontier, visit: Visit, make_driver: Callable[[], Any], workers: int = 1):
+        self.frontier = frontier
+        self.visit = visit
+        self.make_driver = make_driver
+        self.workers = max(1, workers)
+        # (page sequence, requests recorded on that page)
+        self.pages: List[Tuple[int, List[Dict[str, Any]]]] = []
+        self._lock = threading.Lock()
+
+    def _work(self, number: int):
+        with tracing.profile_thread():
+            self._crawl(number)
+
+    def _crawl(self, number: int):
+        try:
+            with tracing.span('crawl.start_browser', worker=number):
+                driver = self.make_driver()
+        except Exception as e:
+            print(f"Worker {number}: could not start a browser: {e}")
+            return
+        try:
+            while True:
+                with tracing.span('crawl.frontier_wait', worker=number):
+                    claim = self.frontier.next()
+                if claim is None:
+                    break
+                sequence, url = claim
+                try:
+                    print(f"[worker {number}] Visiting: {url}")
+                    requests, links = self.visit(driver, url)
+                    for link in links:
+                        self.frontier.add(link)
+                    with self._lock:
+                        self.pages.append((sequence, requests))
+                except Exception as e:
+                    print(f"[worker {number}] Error on {url}: {e}")
+                finally:
+                    self.frontier.done(url)
+        finally:
+            driver.quit()
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Crawl with all workers and return the merged requests"""
+        threads = [threading.Thread(target=contextvars.copy_context().run, args=(self._work, number + 1),
+                                    name=f'crawl-worker-{number + 1}')
+                   for number in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            print("Interrupted; waiting for the pages being visited")
+            self.frontier.close()
+            for thread in threads:
+                thread.join()
+        return merge_requests(self.pages)
+
+
+def merge_requests(pages: List[Tuple[int, List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """Requests of all pages in page order, without exact duplicates"""
+    merged = []
+    seen = set()
+    for _, requests in sorted(pages, key=lambda page: page[0]):
+        for item in requests:
+            request = item.get('request', {})
+            key = (request.get('method', 'GET'), str(request.get('url')), repr(request.get('body')))
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+    return merged
@@ -0,0 +1,117 @@
+"""
+Persistent crawl state
+Keeps everything a crawl has learned in a small SQLite file: the pages found
+(frontier and visited), a hash of each visited page's content, the requests
+recorded on it and the links it led to. A crawl can then:
+- resume: visited pages are not loaded again and the frontier carries on
+- recrawl: every known page is loaded again, but a page whose content hash is
+  unchanged keeps its recorded requests and links without any suggestion or
+  action; only changed pages are explored again and their items replaced
+The collection is always assembled from the store, in page discovery order.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from crawl_pool import normalize_url
+
+# Parts of a page that change on every load without the page changing
+_VOLATILE_RE = re.compile(
+    r'<input[^>]*type=["\']?hidden["\']?[^>]*>'           # CSRF and other hidden tokens
+    r'|<meta[^>]*name=["\']?csrf[^>]*>'
+    r'|\snonce=["\'][^"\']*["\']',
+    re.I)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def content_hash(html: str) -> str:
+    """Hash of a page's HTML without per-load tokens or whitespace differences"""
+    text = _SPACE_RE.sub(' ', _VOLATILE_RE.sub('', html)).strip()
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=20).hexdigest()
+
+
+class CrawlState:
+    """Frontier, visited pages, content hashes and recorded requests of a crawl"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        state_dir = os.path.dirname(path)
+        if state_dir and not os.path.exists(state_dir):
+            os.makedirs(state_dir, exist_ok=True)
+        # Crawl workers are threads sharing one connection
+        self.db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        with self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS pages ('
+                'url TEXT PRIMARY KEY, seq INTEGER NOT NULL, visited REAL, '
+                'content_hash TEXT, items TEXT, links TEXT)'
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self, base_url: str, fresh: bool = False):
+        """Begin a crawl of base_url; a fresh crawl (or another site) forgets the old state"""
+        with self._lock, self.db:
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'base_url'").fetchone()
+            if fresh or row is None or row[0] != base_url:
+                if row is not None and row[0] != base_url and not fresh:
+                    print(f"⚠ Crawl state in {self.path} is for {row[0]}; starting over")
+                self.db.execute('DELETE FROM pages')
+                self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('base_url', ?)", (base_url,))
+        self.add_pages([base_url])
+
+    def add_pages(self, urls: List[str]):
+        """Remember newly found pages (already known ones keep their place)"""
+        with self._lock, self.db:
+            seq = self.db.execute('SELECT COALESCE(MAX(seq), -1) FROM pages').fetchone()[0]
+            for url in urls:
+                seq += 1
+                self.db.execute('INSERT OR IGNORE INTO pages (url, seq) VALUES (?, ?)', (normalize_url(url), seq))
+
+    def save_page(self, url: str, digest: str, items: List[Dict[str, Any]], links: List[str]):
+        """Store a visited page with what it produced; its links join the frontier"""
+        with self._lock, self.db:
+            self.db.execute(
+                'UPDATE pages SET visited = ?, content_hash = ?, items = ?, links = ? WHERE url = ?',
+                (time.time(), digest, json.dumps(items), json.dumps(links), normalize_url(url)))
+        self.add_pages(links)
+
+    def page(self, url: str) -> Optional[Tuple[str, List[Dict[str, Any]], List[str]]]:
+        """(content hash, items, links) of a visited page"""
+        with self._lock:
+            row = self.db.execute('SELECT content_hash, items, links FROM pages WHERE url = ? AND visited IS NOT NULL',
+                                  (normalize_url(url),)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), json.loads(row[2])
+
+    def urls(self, visited: bool) -> List[str]:
+        """Visited pages, or the pages still to visit, in discovery order"""
+        condition = 'visited IS NOT NULL' if visited else 'visited IS NULL'
+        with self._lock:
+            return [row[0] for row in self.db.execute(f'SELECT url FROM pages WHERE {condition} ORDER BY seq')]
+
+    def collection_pages(self) -> List[Tuple[int, List[Dict[str, Any]]]]:
+        """(discovery order, items) of every visited page"""
+        with self._lock:
+            rows = self.db.execute('SELECT seq, items FROM pages WHERE visited IS NOT NULL ORDER BY seq').fetchall()
+        return [(seq, json.loads(items)) for seq, items in rows]
+
+    def close(self):
+        if self.db is None:
+            return
+        self.db.close()
+        self.db = None
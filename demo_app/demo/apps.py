@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class DemoConfig(AppConfig):
+    name = 'demo'
+
+    def ready(self):
+        from . import profiling
+
+        profiling.install_template_timing()
@@ -0,0 +1,122 @@
+"""
+Request profiling middleware for the demo app.
+
+Records, for every request, the view's wall time, the number and total
+duration of SQL queries and the time spent rendering templates. Each record
+carries the id the load test sent in the correlation header (X-Correlation-ID
+in plans from convert_postman_to_jmx.py), so it can be joined with the JMeter
+sample that caused it (see server_profile.py at the repository root).
+
+Records are appended as JSON lines to settings.PROFILING_LOG (when set), and
+the same breakdown is returned in a Server-Timing header for browsers and
+proxies. Template time is only measured once install_template_timing() has
+run, which DemoConfig.ready() (demo/apps.py) does at startup.
+"""
+
+import json
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template import base as template_base
+
+# Profile of the request being handled in this thread/task
+_current = ContextVar('request_profile', default=None)
+_original_render = template_base.Template.render
+_log_lock = threading.Lock()
+_install_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Timings gathered while one request is handled"""
+
+    def __init__(self, correlation_id):
+        self.correlation_id = correlation_id
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_count = 0
+        self.template_seconds = 0.0
+        self._rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper: time every query on every connection
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.sql_count += 1
+
+
+def install_template_timing():
+    """Route Template.render through _timed_render (once per process, from DemoConfig.ready)
+
+    Outside a profiled request the wrapper only calls the original render.
+    """
+    with _install_lock:
+        if template_base.Template.render is not _timed_render:
+            template_base.Template.render = _timed_render
+
+
+def _timed_render(self, context):
+    """Template.render that adds top-level renders (not includes) to the request's profile"""
+    profile = _current.get()
+    if profile is None or profile._rendering:
+        return _original_render(self, context)
+    profile._rendering = True
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        profile.template_seconds += time.perf_counter() - start
+        profile.template_count += 1
+        profile._rendering = False
+
+
+class ProfilingMiddleware:
+    """Per-view wall time, SQL and template time, tagged with the client's correlation id"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = getattr(settings, 'PROFILING_HEADER', 'X-Correlation-ID')
+        self.log_path = getattr(settings, 'PROFILING_LOG', None)
+
+    def __call__(self, request):
+        profile = RequestProfile(request.headers.get(self.header))
+        token = _current.set(profile)
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        wall = time.perf_counter() - start
+
+        match = request.resolver_match
+        record = {
+            'correlation_id': profile.correlation_id,
+            'timeStamp': int(started * 1000),
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'wall_ms': round(wall * 1000, 3),
+            'sql_count': profile.sql_count,
+            'sql_ms': round(profile.sql_seconds * 1000, 3),
+            'template_count': profile.template_count,
+            'template_ms': round(profile.template_seconds * 1000, 3),
+        }
+        response['Server-Timing'] = (f'view;dur={record["wall_ms"]}, '
+                                     f'sql;dur={record["sql_ms"]};desc="{profile.sql_count} queries", '
+                                     f'template;dur={record["template_ms"]}')
+        if self.log_path:
+            line = json.dumps(record) + '\n'
+            with _log_lock, open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        return response
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -31,6 +32,8 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
+    # Installs the template render timing used by demo.profiling
+    'demo.apps.DemoConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -41,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its wall time covers the other middleware and the view
+    'demo.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,6 +57,12 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'demo.urls'
 
+# Request profiles (wall, SQL and template time per view) are appended here as
+# JSON lines, tagged with the load test's correlation header. Off unless the
+# PROFILING_LOG environment variable names a file: the log is not rotated
+PROFILING_LOG = os.environ.get('PROFILING_LOG') or None
+PROFILING_HEADER = 'X-Correlation-ID'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
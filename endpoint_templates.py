@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Endpoint templates
+Collapses the near-duplicate requests of a crawled collection (/users/1/,
+/users/2/, /users/3/update/ ...) into one parameterized request per route
+template (/users/{{users_pk}}/, /users/{{users_pk}}/update/). Path segments
+are typed: integers, UUIDs and long hex or mixed tokens are ids, and a
+position that takes many different words under the same route is a slug.
+Query values that differ between requests of a route become variables too.
+
+The observed values are written to CSV files that feed those variables (see
+feeders.py), one file per group of variables used together, so nested ids
+such as a team and one of its users stay on the same row.
+"""
+
+import argparse
+import copy
+import csv
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from feeders import Feeder
+from postman_reader import PostmanCollectionReader
+
+# Segment types that are always parameters
+SEGMENT_TYPES = [
+    ('pk', re.compile(r'^\d+$')),
+    ('pk', re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)),
+    ('pk', re.compile(r'^(?=.*\d)[0-9a-f]{12,}$', re.I)),
+    ('token', re.compile(r'^(?=.*\d)(?=.*[a-zA-Z])[A-Za-z0-9_-]{20,}$')),
+]
+
+# Distinct words at one position (with the rest of the route equal) that make it a slug
+SLUG_THRESHOLD = 8
+
+_NAME_RE = re.compile(r'[^0-9A-Za-z]+')
+
+
+def segment_type(segment: str) -> Optional[str]:
+    """Parameter type of a path segment, or None for a literal"""
+    if '{{' in segment:
+        return None
+    for kind, pattern in SEGMENT_TYPES:
+        if pattern.match(segment):
+            return kind
+    return None
+
+
+def request_url(request: Dict[str, Any]) -> str:
+    """A Postman request URL as one string"""
+    url = request.get('url', '')
+    if isinstance(url, str):
+        return url
+    if url.get('raw'):
+        return url['raw']
+    host = url.get('host', [])
+    host = '.'.join(host) if isinstance(host, list) else str(host)
+    if url.get('port'):
+        host += f":{url['port']}"
+    text = f"{url['protocol']}://{host}" if url.get('protocol') else host
+    text += '/' + '/'.join(url.get('path', []))
+    query = [f"{q['key']}={q.get('value', '')}" for q in url.get('query', []) if q.get('disabled') != True]
+    return text + ('?' + '&'.join(query) if query else '')
+
+
+def split_url(url: str) -> Tuple[str, List[str], str]:
+    """(origin, path segments, query) of a URL; the origin may be a {{variable}}"""
+    url = url.split('#', 1)[0]
+    url, _, query = url.partition('?')
+    if '://' in url:
+        scheme, rest = url.split('://', 1)
+        host, _, path = rest.partition('/')
+        origin = f'{scheme}://{host}'
+    else:
+        origin, _, path = url.partition('/')
+    # Empty segments are kept so trailing slashes survive
+    return origin, path.split('/'), query
+
+
+def _variable_name(segments: List[str], position: int, kind: str, taken: List[str]) -> str:
+    previous = next((segment for segment in reversed(segments[:position])
+                     if segment and segment_type(segment) is None), '')
+    base = _NAME_RE.sub('_', previous).strip('_').lower()
+    name = f'{base}_{kind}' if base else kind
+    candidate, number = name, 2
+    while candidate in taken:
+        candidate = f'{name}_{number}'
+        number += 1
+    return candidate
+
+
+class Observation:
+    """One crawled request: its item and the pieces its template is built from"""
+
+    def __init__(self, item: Dict[str, Any]):
+        self.item = item
+        request = item.get('request', {})
+        self.method = request.get('method', 'GET').upper()
+        self.origin, self.segments, query = split_url(request_url(request))
+        self.query = parse_qsl(query, keep_blank_values=True)
+        self.kinds = [segment_type(segment) for segment in self.segments]
+        self.query_kinds = [False] * len(self.query)
+
+    def shape(self, blank: Optional[int] = None) -> tuple:
+        """The route with parameters (and optionally one more position) blanked out"""
+        parts = tuple('*' if kind or position == blank else segment
+                      for position, (segment, kind) in enumerate(zip(self.segments, self.kinds)))
+        return (self.method, self.origin, len(self.segments)) + parts
+
+
+class EndpointTemplates:
+    """Route templates of a collection and the values observed for their variables"""
+
+    def __init__(self, slug_threshold: int = SLUG_THRESHOLD):
+        self.slug_threshold = slug_threshold
+        self.observations: List[Observation] = []
+        # template key -> [first observation, variable names, [values per observation]]
+        self.templates: Dict[tuple, list] = {}
+
+    def add(self, item: Dict[str, Any]):
+        self.observations.append(Observation(item))
+
+    def build(self) -> 'EndpointTemplates':
+        self._infer_slugs()
+        self._infer_query()
+        for observation in self.observations:
+            key = observation.shape() + tuple(name for name, _ in observation.query)
+            template = self.templates.get(key)
+            if template is None:
+                template = self.templates[key] = [observation, self._names(observation), []]
+            values = [segment for segment, kind in zip(observation.segments, observation.kinds) if kind]
+            values += [value for (name, value), variable in zip(observation.query, observation.query_kinds)
+                       if variable]
+            template[2].append(values)
+        return self
+
+    def _infer_slugs(self):
+        """Word positions with many values under an otherwise identical route are slugs"""
+        for position in range(max((len(o.segments) for o in self.observations), default=0)):
+            groups: Dict[tuple, List[Observation]] = {}
+            for observation in self.observations:
+                if position < len(observation.segments) and observation.kinds[position] is None \
+                        and observation.segments[position] and '{{' not in observation.segments[position]:
+                    groups.setdefault(observation.shape(position), []).append(observation)
+            for members in groups.values():
+                if len({o.segments[position] for o in members}) >= self.slug_threshold:
+                    for observation in members:
+                        observation.kinds[position] = 'slug'
+
+    def _infer_query(self):
+        """Query parameters whose value differs between requests of a route are variables"""
+        values: Dict[tuple, set] = {}
+        for observation in self.observations:
+            for name, value in observation.query:
+                values.setdefault(observation.shape() + (name,), set()).add(value)
+        for observation in self.observations:
+            observation.query_kinds = [len(values[observation.shape() + (name,)]) > 1 and '{{' not in value
+                                       for name, value in observation.query]
+
+    def _names(self, observation: Observation) -> List[str]:
+        names: List[str] = []
+        for position, kind in enumerate(observation.kinds):
+            if kind:
+                names.append(_variable_name(observation.segments, position, kind, names))
+        for (name, _), variable in zip(observation.query, observation.query_kinds):
+            if variable:
+                base = _NAME_RE.sub('_', name).strip('_').lower() or 'param'
+                candidate, number = base, 2
+                while candidate in names:
+                    candidate = f'{base}_{number}'
+                    number += 1
+                names.append(candidate)
+        return names
+
+    def template_item(self, observation: Observation, names: List[str], count: int) -> Dict[str, Any]:
+        """The first request of a template with its ids replaced by {{variables}}"""
+        variables = iter(names)
+        segments = [f'{{{{{next(variables)}}}}}' if kind else segment
+                    for segment, kind in zip(observation.segments, observation.kinds)]
+        query = [f'{name}={{{{{next(variables)}}}}}' if variable else f'{name}={value}'
+                 for (name, value), variable in zip(observation.query, observation.query_kinds)]
+        path = '/' + '/'.join(segments) + ('?' + '&'.join(query) if query else '')
+        item = copy.deepcopy(observation.item)
+        item['name'] = f'{observation.method} {path}' if names else item.get('name', f'{observation.method} {path}')
+        item['request']['url'] = observation.origin + path
+        if count > 1:
+            item['description'] = f'Template for {count} crawled requests'
+        return item
+
+    def items(self) -> List[Dict[str, Any]]:
+        """One item per template, in the order templates were first seen"""
+        return [self.template_item(observation, names, len(rows))
+                for observation, names, rows in self.templates.values()]
+
+    def variable_groups(self) -> List[List[str]]:
+        """Variables that appear together in a template belong to one group (one feeder file)"""
+        parent: Dict[str, str] = {}
+
+        def find(name):
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        for _, names, _ in self.templates.values():
+            for name in names:
+                parent.setdefault(name, name)
+            for name in names[1:]:
+                parent[find(name)] = find(names[0])
+        groups: Dict[str, List[str]] = {}
+        for name in parent:
+            groups.setdefault(find(name), []).append(name)
+        return list(groups.values())
+
+    def group_rows(self, group: List[str]) -> List[List[str]]:
+        """Observed value rows for a group; values a request did not carry are taken in turn from the others"""
+        observed: List[Dict[str, str]] = []
+        for _, names, rows in self.templates.values():
+            if names and set(names) <= set(group):
+                observed.extend(dict(zip(names, values)) for values in rows)
+        per_variable = {name: list(dict.fromkeys(row[name] for row in observed if name in row)) for name in group}
+        result: List[List[str]] = []
+        seen = set()
+        for index, row in enumerate(observed):
+            filled = tuple(row.get(name) or per_variable[name][index % len(per_variable[name])] for name in group)
+            if filled not in seen:
+                seen.add(filled)
+                result.append(list(filled))
+        return result
+
+    def write_feeders(self, data_dir: str) -> List[Feeder]:
+        """Write one CSV per variable group (header line = variable names)"""
+        os.makedirs(data_dir, exist_ok=True)
+        feeders = []
+        for group in self.variable_groups():
+            path = os.path.join(data_dir, '-'.join(group) + '.csv')
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f, lineterminator='\n')
+                writer.writerow(group)
+                writer.writerows(self.group_rows(group))
+            feeders.append(Feeder(path))
+        return feeders
+
+
+def normalize_collection(input_path: str, output_path: str, data_dir: Optional[str] = None,
+                         slug_threshold: int = SLUG_THRESHOLD) -> Tuple[int, int, List[Feeder]]:
+    """Write the templated collection and its feeder files: (requests in, templates out, feeders)"""
+    templates = EndpointTemplates(slug_threshold)
+    with PostmanCollectionReader(input_path) as reader:
+        collection = reader.read_header(required=('info', 'variable', 'auth', 'event'))
+        for event, item in reader.events():
+            if event == 'request':
+                templates.add(item)
+    templates.build()
+
+    collection['item'] = templates.items()
+    out_dir = os.path.dirname(output_path)
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(collection, f, indent=2)
+    if data_dir is None:
+        data_dir = os.path.join(out_dir, 'feeders')
+    feeders = templates.write_feeders(data_dir) if any(names for _, names, _ in templates.templates.values()) else []
+    return len(templates.observations), len(templates.templates), feeders
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Collapse repeated URLs of a collection into parameterized route templates',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python endpoint_templates.py data/output/collection.json -o data/output/collection.templates.json
+  python endpoint_templates.py crawl.json -o templates.json --data-dir data/feeders --slug-threshold 5
+        '''
+    )
+    parser.add_argument('input', help='Postman collection JSON file')
+    parser.add_argument('-o', '--output', help='Templated collection (default: <input>.templates.json)')
+    parser.add_argument('--data-dir', help='Directory for the feeder CSV files (default: feeders/ next to the output)')
+    parser.add_argument('--slug-threshold', type=int, default=SLUG_THRESHOLD,
+                        help=f'Distinct words at one position that make it a parameter (default: {SLUG_THRESHOLD})')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: File '{args.input}' not found")
+        sys.exit(1)
+    output = args.output or os.path.splitext(args.input)[0] + '.templates.json'
+
+    requests, templates, feeders = normalize_collection(args.input, output, args.data_dir, args.slug_threshold)
+    print(f"✓ {requests} requests -> {templates} templates in '{output}'")
+    for feeder in feeders:
+        print(f"  feeder {feeder.path}: {', '.join(feeder.variables)}")
+    if feeders:
+        options = ' '.join(f'--feeder {feeder.path}' for feeder in feeders)
+        print(f"\nConvert with:\n  python convert_postman_to_jmx.py {output} {options}")
+
+
+if __name__ == '__main__':
+    main()
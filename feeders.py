@@ -0,0 +1,73 @@
+"""
+CSV feeders for data-driven plans
+A feeder binds Postman variables to the columns of an external CSV file. The
+converter keeps every bound {{variable}} as a JMeter ${variable} reference and
+adds a CSV Data Set Config, so each thread reads its own rows from the file
+while the test runs; nothing is loaded up front. Specs on the command line look
+like "users.csv" (variable names from the header line) or "users.csv:id,token".
+"""
+
+import csv
+import os
+from typing import Any, Dict, List, Optional
+
+# CSV Data Set sharing modes: one file position for all threads, per thread group or per thread
+SHARE_MODES = {'all': 'shareMode.all', 'group': 'shareMode.group', 'thread': 'shareMode.thread'}
+
+
+class Feeder:
+    """One CSV file and the variables its columns feed"""
+
+    def __init__(self, path: str, variables: Optional[List[str]] = None, delimiter: str = ',',
+                 sharing: str = 'all', recycle: bool = True, stop_thread: bool = False,
+                 encoding: str = 'UTF-8'):
+        if sharing not in SHARE_MODES:
+            raise ValueError(f"Unknown sharing mode '{sharing}' (expected one of {', '.join(SHARE_MODES)})")
+        self.path = path
+        self.delimiter = delimiter
+        self.sharing = sharing
+        self.recycle = recycle
+        self.stop_thread = stop_thread
+        self.encoding = encoding
+        # Without explicit names the first line holds them and is skipped by JMeter
+        self.ignore_first_line = not variables
+        self.variables = list(variables) if variables else self.read_header()
+        if not self.variables:
+            raise ValueError(f"Feeder '{path}' names no variables")
+
+    def read_header(self) -> List[str]:
+        """Column names from the file's first line (only that line is read)"""
+        with open(self.path, 'r', encoding=self.encoding, newline='') as f:
+            first = next(csv.reader(f, delimiter=self.delimiter), [])
+        return [name.strip() for name in first if name.strip()]
+
+    @classmethod
+    def from_spec(cls, spec: str, **options) -> 'Feeder':
+        """Parse "path" or "path:var1,var2" """
+        path, variables = spec, None
+        if ':' in spec and not os.path.exists(spec):
+            path, names = spec.rsplit(':', 1)
+            variables = [name.strip() for name in names.split(',') if name.strip()]
+        return cls(path, variables, **options)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Feeder':
+        return cls(data['path'], data.get('variables'), data.get('delimiter', ','),
+                   data.get('sharing', 'all'), data.get('recycle', True),
+                   data.get('stop_thread', False), data.get('encoding', 'UTF-8'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'path': self.path, 'variables': None if self.ignore_first_line else self.variables,
+                'delimiter': self.delimiter, 'sharing': self.sharing, 'recycle': self.recycle,
+                'stop_thread': self.stop_thread, 'encoding': self.encoding}
+
+
+def bound_variables(feeders: List[Feeder]) -> List[str]:
+    """All variables fed by CSV files; a variable may only have one feeder"""
+    names: List[str] = []
+    for feeder in feeders:
+        for name in feeder.variables:
+            if name in names:
+                raise ValueError(f"Variable '{name}' is bound by more than one feeder")
+            names.append(name)
+    return names
@@ -0,0 +1,129 @@
+"""
+Fragment cache for incremental re-conversion
+Stores the serialized JMX fragment (HTTPSamplerProxy plus its hashTree) of every
+converted request in a small SQLite file, keyed by a hash of the Postman item,
+the conversion settings and the converter version, together with the names of
+the variables it left unresolved. Unchanged requests are then copied from the
+cache instead of being rebuilt. The cache is bounded in size and
+evicts the least recently used fragments first.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class FragmentCache:
+    """On-disk cache of serialized sampler fragments"""
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, version: str = ''):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._now = time.time()
+        self._touched: List[str] = []
+        self._pending: List[Tuple[str, str, str, int, float]] = []
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+        # Batch conversions share the file between processes
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS fragments ('
+            'key TEXT PRIMARY KEY, fragment TEXT NOT NULL, unresolved TEXT NOT NULL DEFAULT \'[]\', '
+            'size INTEGER NOT NULL, last_used REAL NOT NULL)'
+        )
+        columns = [row[1] for row in self.db.execute('PRAGMA table_info(fragments)')]
+        if 'unresolved' not in columns:
+            # Cache files from before unresolved names were kept
+            self.db.execute("ALTER TABLE fragments ADD COLUMN unresolved TEXT NOT NULL DEFAULT '[]'")
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def key(self, item: Dict[str, Any], context: Any = None) -> str:
+        """Hash an item together with everything else that shapes its output"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(self.version.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(json.dumps(context, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(json.dumps(item, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, List[str]]]:
+        """The cached fragment and the variables it left unresolved"""
+        row = self.db.execute('SELECT fragment, unresolved FROM fragments WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append(key)
+        return row[0], json.loads(row[1])
+
+    def put(self, key: str, fragment: str, unresolved: Iterable[str] = ()):
+        self._pending.append((key, fragment, json.dumps(sorted(unresolved)), len(fragment.encode('utf-8')),
+                              self._now))
+        if len(self._pending) >= 1000:
+            self.flush()
+
+    def flush(self):
+        """Write pending fragments and access times"""
+        with self.db:
+            if self._pending:
+                self.db.executemany(
+                    'INSERT OR REPLACE INTO fragments (key, fragment, unresolved, size, last_used) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    self._pending,
+                )
+            if self._touched:
+                self.db.executemany(
+                    'UPDATE fragments SET last_used = ? WHERE key = ?',
+                    [(self._now, key) for key in self._touched],
+                )
+        self._pending = []
+        self._touched = []
+
+    def evict(self):
+        """Drop least recently used fragments until the cache fits in max_bytes"""
+        with self.db:
+            self.db.execute(
+                'DELETE FROM fragments WHERE key IN ('
+                ' SELECT key FROM ('
+                '  SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS running'
+                '  FROM fragments'
+                ' ) WHERE running > ?'
+                ')',
+                (self.max_bytes,),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts for this run plus the current cache size"""
+        self.flush()
+        entries, size = self.db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM fragments').fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': size,
+        }
+
+    def close(self):
+        if self.db is None:
+            return
+        self.flush()
+        self.evict()
+        self.db.close()
+        self.db = None
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+HTML report
+Builds a self-contained HTML dashboard (inline SVG charts, no scripts and
+nothing fetched from elsewhere) from JMeter CSV results in a single streaming
+pass: the per-label aggregates of results_analyzer.py plus a timeline of
+latency percentiles, throughput, errors and active threads.
+
+Memory stays bounded however long the run: the timeline starts with one-second
+buckets and doubles their width whenever the run would span more than
+max_buckets of them.
+Each chart series is then reduced to a few hundred points with
+Largest-Triangle-Three-Buckets downsampling, which keeps the spikes and dips a
+plain average would flatten, so a run of tens of millions of samples still
+renders as a small page.
+"""
+
+import argparse
+import bisect
+import html
+import math
+import operator
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from results_analyzer import DEFAULT_FIELDS, PERCENTILES, LatencyHistogram, ResultsAnalyzer
+
+# Time buckets kept before their width doubles
+MAX_BUCKETS = 4000
+# Points per chart series after downsampling
+CHART_POINTS = 600
+
+CHART_WIDTH = 960
+CHART_HEIGHT = 260
+_MARGIN = (16, 20, 34, 64)  # top, right, bottom, left
+COLORS = ('#1f77b4', '#ff7f0e', '#d62728', '#2ca02c', '#9467bd', '#8c564b')
+
+
+class TimeBucket:
+    """Samples that started within one time bucket"""
+
+    def __init__(self):
+        self.samples = 0
+        self.errors = 0
+        self.threads = 0
+        self.elapsed = LatencyHistogram()
+
+    def merge(self, other: 'TimeBucket'):
+        self.samples += other.samples
+        self.errors += other.errors
+        self.threads = max(self.threads, other.threads)
+        self.elapsed.merge(other.elapsed)
+
+
+class Timeline:
+    """Per-bucket sample counts, errors, active threads and elapsed histograms"""
+
+    def __init__(self, max_buckets: int = MAX_BUCKETS, width: int = 1000):
+        self.max_buckets = max_buckets
+        # Bucket width in milliseconds
+        self.width = width
+        self.origin: Optional[int] = None
+        self.buckets: Dict[int, TimeBucket] = {}
+
+    def add_rows(self, rows: List[List[str]], fields: Optional[List[str]] = None):
+        fields = fields or DEFAULT_FIELDS
+        width = len(fields)
+        column = {name: i for i, name in enumerate(fields)}
+        # Only the columns the timeline needs: timeStamp, elapsed, success (and allThreads)
+        wanted = [column['timeStamp'], column['elapsed'], column['success']]
+        if 'allThreads' in column:
+            wanted.append(column['allThreads'])
+        pick = operator.itemgetter(*wanted)
+        rows = [pick(row) for row in rows if len(row) == width]
+        if not rows:
+            return
+        try:
+            self._add_columns(list(zip(*rows)))
+        except ValueError:
+            # A malformed value somewhere in the chunk: add the rows one by one
+            for row in rows:
+                try:
+                    self._add_columns(list(zip(row)))
+                except ValueError:
+                    pass
+        # Bounded by span, not only by count: series() has a point for every bucket
+        # from the first to the last, including empty ones
+        while max(self.buckets) - min(self.buckets) >= self.max_buckets:
+            self._coarsen()
+
+    def _add_columns(self, columns: List[tuple]):
+        timestamps = list(map(int, columns[0]))
+        elapsed = list(map(int, columns[1]))
+        success = columns[2]
+        threads = list(map(int, columns[3])) if len(columns) > 3 else None
+        if self.origin is None:
+            self.origin = timestamps[0] - timestamps[0] % 1000
+        origin, bucket_width = self.origin, self.width
+        keys = [(timestamp - origin) // bucket_width for timestamp in timestamps]
+
+        if keys != sorted(keys):
+            # Out of order (e.g. several threads writing): sort the chunk by bucket first
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            keys = [keys[i] for i in order]
+            elapsed = [elapsed[i] for i in order]
+            success = [success[i] for i in order]
+            if threads is not None:
+                threads = [threads[i] for i in order]
+
+        # Each bucket's rows are now one slice, found by bisection
+        start = 0
+        count = len(keys)
+        while start < count:
+            key = keys[start]
+            end = bisect.bisect_right(keys, key, start)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TimeBucket()
+            bucket.samples += end - start
+            bucket.elapsed.record_many(elapsed[start:end])
+            outcomes = success[start:end]
+            bucket.errors += len(outcomes) - outcomes.count('true')
+            if threads is not None:
+                bucket.threads = max(bucket.threads, max(threads[start:end]))
+            start = end
+
+    def _coarsen(self):
+        """Double the bucket width, merging neighbouring buckets"""
+        merged: Dict[int, TimeBucket] = {}
+        for key, bucket in self.buckets.items():
+            target = merged.get(key // 2)
+            if target is None:
+                merged[key // 2] = bucket
+            else:
+                target.merge(bucket)
+        self.buckets = merged
+        self.width *= 2
+
+    def series(self) -> Dict[str, List[Tuple[float, Optional[float]]]]:
+        """(seconds since the first bucket, value) per metric; empty buckets count as no traffic"""
+        result: Dict[str, List[Tuple[float, Optional[float]]]] = {
+            name: [] for name in ('mean', 'p50', 'p95', 'p99', 'throughput', 'errors', 'error_rate', 'threads')}
+        if not self.buckets:
+            return result
+        seconds = self.width / 1000
+        first, last = min(self.buckets), max(self.buckets)
+        for key in range(first, last + 1):
+            x = (key - first) * seconds
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                result['throughput'].append((x, 0.0))
+                result['errors'].append((x, 0.0))
+                continue
+            histogram = bucket.elapsed
+            result['mean'].append((x, histogram.mean))
+            for p in (50, 95, 99):
+                result[f'p{p}'].append((x, histogram.percentile(p)))
+            result['throughput'].append((x, bucket.samples / seconds))
+            result['errors'].append((x, bucket.errors / seconds))
+            result['error_rate'].append((x, bucket.errors / bucket.samples * 100))
+            if bucket.threads:
+                result['threads'].append((x, float(bucket.threads)))
+        return result
+
+    @property
+    def start(self) -> Optional[float]:
+        """Epoch seconds at the start of the first bucket"""
+        if not self.buckets:
+            return None
+        return (self.origin + min(self.buckets) * self.width) / 1000
+
+
+def lttb(points: Sequence[Tuple[float, float]], threshold: int) -> List[Tuple[float, float]]:
+    """Largest-Triangle-Three-Buckets: `threshold` points that keep the shape of the series"""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    selected = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        following = points[end:next_end]
+        average_x = sum(x for x, _ in following) / len(following)
+        average_y = sum(y for _, y in following) / len(following)
+        ax, ay = points[selected]
+        best_area = -1.0
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - average_x) * (y - ay) - (ax - x) * (average_y - ay))
+            if area > best_area:
+                best_area = area
+                selected = j
+        sampled.append(points[selected])
+    sampled.append(points[-1])
+    return sampled
+
+
+class ReportBuilder:
+    """One pass over results files feeding both the label aggregates and the timeline"""
+
+    def __init__(self, chunk_size: int = 50000, max_buckets: int = MAX_BUCKETS):
+        self.analyzer = ResultsAnalyzer(chunk_size)
+        self.timeline = Timeline(max_buckets)
+
+    def add_file(self, path: str) -> 'ReportBuilder':
+        with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            for chunk in self.analyzer.read_chunks(f):
+                self.analyzer.add_rows(chunk)
+                self.timeline.add_rows(chunk, self.analyzer.fields)
+        return self
+
+    def render(self, title: str = 'Load test report', points: int = CHART_POINTS) -> str:
+        return render_report(self.analyzer.summary(), self.timeline, title, points)
+
+
+def _nice_step(span: float, count: int) -> float:
+    """Axis step of 1, 2, 2.5 or 5 times a power of ten giving about count ticks"""
+    raw = span / max(count, 1)
+    magnitude = 10 ** math.floor(math.log10(raw))
+    return next(magnitude * factor for factor in (1, 2, 2.5, 5, 10) if magnitude * factor >= raw)
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}' if hours else f'{minutes}:{seconds:02d}'
+
+
+def _number(value: float) -> str:
+    return f'{value:.0f}' if abs(value) >= 10 or value == int(value) else f'{value:.2g}'
+
+
+def svg_chart(series: List[Tuple[str, List[Tuple[float, float]]]], unit: str, points: int = CHART_POINTS) -> str:
+    """Line chart of several series (name, [(x seconds, y)]) with axes and a legend"""
+    series = [(name, lttb([p for p in data if p[1] is not None], points)) for name, data in series]
+    series = [(name, data) for name, data in series if data]
+    if not series:
+        return '<p class="empty">No data</p>'
+    top, right, bottom, left = _MARGIN
+    width, height = CHART_WIDTH - left - right, CHART_HEIGHT - top - bottom
+    max_x = max(max(x for x, _ in data) for _, data in series) or 1.0
+    max_y = max(max(y for _, y in data) for _, data in series) or 1.0
+    y_step = _nice_step(max_y, 5)
+    max_y = y_step * -(-max_y // y_step)
+    x_step = _nice_step(max_x, 8)
+
+    parts = [f'<svg viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}" role="img">']
+    y = 0.0
+    while y <= max_y + y_step / 2:
+        py = top + height - y / max_y * height
+        parts.append(f'<line class="grid" x1="{left}" x2="{left + width}" y1="{py:.1f}" y2="{py:.1f}"/>'
+                     f'<text x="{left - 6}" y="{py + 4:.1f}" text-anchor="end">{_number(y)}</text>')
+        y += y_step
+    x = 0.0
+    while x <= max_x:
+        px = left + x / max_x * width
+        parts.append(f'<text x="{px:.1f}" y="{top + height + 18}" text-anchor="middle">{_duration(x)}</text>')
+        x += x_step
+    parts.append(f'<text x="14" y="{top + height / 2:.0f}" transform="rotate(-90 14 {top + height / 2:.0f})" '
+                 f'text-anchor="middle">{html.escape(unit)}</text>')
+    for index, (name, data) in enumerate(series):
+        coordinates = ' '.join(f'{left + px / max_x * width:.1f},{top + height - py / max_y * height:.1f}'
+                               for px, py in data)
+        parts.append(f'<polyline fill="none" stroke="{COLORS[index % len(COLORS)]}" stroke-width="1.5" '
+                     f'points="{coordinates}"><title>{html.escape(name)}</title></polyline>')
+    parts.append('</svg>')
+    legend = ''.join(f'<span><i style="background:{COLORS[index % len(COLORS)]}"></i>{html.escape(name)}</span>'
+                     for index, (name, _) in enumerate(series))
+    return f'<div class="legend">{legend}</div>' + ''.join(parts)
+
+
+def _ms(value: Optional[float]) -> str:
+    return '-' if value is None else f'{value:.0f}'
+
+
+def _label_table(summary: Dict[str, Any], percentiles=PERCENTILES) -> str:
+    keys = [f'p{p:g}' for p in percentiles]
+    head = ''.join(f'<th>{key}</th>' for key in keys)
+    rows = []
+    for row in summary['labels'] + [summary['total']]:
+        elapsed = row['elapsed']
+        cells = ''.join(f'<td>{_ms(elapsed[key])}</td>' for key in keys)
+        error_class = ' class="bad"' if row['errors'] else ''
+        row_class = ' class="total"' if row is summary['total'] else ''
+        rows.append(
+            f"<tr{row_class}><th>{html.escape(row['label'])}</th>"
+            f"<td>{row['samples']}</td><td{error_class}>{row['error_rate'] * 100:.2f}</td>"
+            f"<td>{row['throughput']:.2f}</td><td>{_ms(elapsed['mean'])}</td><td>{_ms(elapsed['min'])}</td>"
+            f"{cells}<td>{_ms(elapsed['max'])}</td><td>{_ms(row['latency']['p95'])}</td>"
+            f"<td>{_ms(row['connect']['p95'])}</td><td>{row['received_kb_per_sec']:.1f}</td>"
+            f"<td>{row['sent_kb_per_sec']:.1f}</td></tr>")
+    return ('<table><thead><tr><th>Label</th><th>Samples</th><th>Err %</th><th>Req/s</th><th>Mean</th>'
+            f'<th>Min</th>{head}<th>Max</th><th>Latency p95</th><th>Connect p95</th><th>KB/s recv</th>'
+            f'<th>KB/s sent</th></tr></thead><tbody>{"".join(rows)}</tbody></table>')
+
+
+def _error_table(summary: Dict[str, Any], limit: int = 20) -> str:
+    errors = sorted(((count, row['label'], kind) for row in summary['labels']
+                     for kind, count in row['error_kinds'].items()), key=lambda error: -error[0])[:limit]
+    if not errors:
+        return '<p>No errors.</p>'
+    rows = ''.join(f'<tr><td>{count}</td><th>{html.escape(label)}</th><td>{html.escape(kind)}</td></tr>'
+                   for count, label, kind in errors)
+    return f'<table><thead><tr><th>Count</th><th>Label</th><th>Error</th></tr></thead><tbody>{rows}</tbody></table>'
+
+
+def _code_table(summary: Dict[str, Any]) -> str:
+    codes = summary['total']['response_codes']
+    total = sum(codes.values()) or 1
+    rows = ''.join(f'<tr><th>{html.escape(code or "-")}</th><td>{count}</td><td>{count / total * 100:.2f}</td></tr>'
+                   for code, count in codes.items())
+    return f'<table><thead><tr><th>Code</th><th>Samples</th><th>%</th></tr></thead><tbody>{rows}</tbody></table>'
+
+
+STYLE = """
+body{font:14px/1.4 -apple-system,Segoe UI,Helvetica,Arial,sans-serif;margin:24px;color:#222;max-width:1200px}
+h1{font-size:22px}h2{font-size:17px;margin-top:28px;border-bottom:1px solid #ddd}
+.cards{display:flex;gap:12px;flex-wrap:wrap}.cards div{border:1px solid #ddd;border-radius:6px;padding:8px 14px}
+.cards b{display:block;font-size:20px}
+svg{width:100%;max-width:960px;height:auto;font-size:11px;fill:#555}svg .grid{stroke:#eee}
+.legend span{margin-right:14px}.legend i{display:inline-block;width:12px;height:3px;margin:0 4px 3px 0}
+table{border-collapse:collapse;font-size:13px}th,td{padding:3px 8px;border-bottom:1px solid #eee;text-align:right}
+tbody th{text-align:left;font-weight:normal;max-width:420px;overflow-wrap:anywhere}
+tr.total{font-weight:bold}td.bad{color:#c00}.note,.empty{color:#777}
+"""
+
+
+def render_report(summary: Dict[str, Any], timeline: Timeline, title: str = 'Load test report',
+                  points: int = CHART_POINTS) -> str:
+    """The whole report as one HTML page"""
+    total = summary['total']
+    series = timeline.series()
+    started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timeline.start)) if timeline.start else '-'
+    cards = [('Samples', f"{total['samples']}"), ('Started', started),
+             ('Duration', _duration((total['end'] - total['start']) / 1000) if total['start'] else '-'),
+             ('Throughput', f"{total['throughput']:.2f}/s"), ('Errors', f"{total['error_rate'] * 100:.2f}%"),
+             ('p95', f"{_ms(total['elapsed']['p95'])} ms"), ('p99', f"{_ms(total['elapsed']['p99'])} ms")]
+    sections = [
+        ('Response time over time',
+         svg_chart([('p99', series['p99']), ('p95', series['p95']), ('p50', series['p50']),
+                    ('mean', series['mean'])], 'ms', points)),
+        ('Throughput', svg_chart([('samples/s', series['throughput']), ('errors/s', series['errors'])],
+                                 'per second', points)),
+        ('Error rate', svg_chart([('error %', series['error_rate'])], '%', points)),
+    ]
+    if series['threads']:
+        sections.append(('Active threads', svg_chart([('threads', series['threads'])], 'threads', points)))
+
+    body = [f'<h1>{html.escape(title)}</h1>',
+            '<div class="cards">' + ''.join(f'<div>{name}<b>{html.escape(value)}</b></div>' for name, value in cards)
+            + '</div>']
+    for heading, chart in sections:
+        body.append(f'<h2>{heading}</h2>{chart}')
+    body.append(f'<p class="note">Time buckets of {_number(timeline.width / 1000)}s, '
+                f'each series downsampled to at most {points} points.</p>')
+    body.append(f'<h2>Labels</h2>{_label_table(summary)}')
+    body.append('<p class="note">Times in ms. Percentiles from histograms with under 1% relative error.</p>')
+    body.append(f'<h2>Response codes</h2>{_code_table(summary)}')
+    body.append(f'<h2>Top errors</h2>{_error_table(summary)}')
+    if summary['skipped_rows']:
+        body.append(f'<p class="note">⚠ Skipped {summary["skipped_rows"]} malformed rows.</p>')
+    return (f'<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            f'<style>{STYLE}</style></head><body>\n' + '\n'.join(body) + '\n</body></html>\n')
+
+
+def write_report(results: List[str], output_path: str, title: Optional[str] = None,
+                 points: int = CHART_POINTS) -> Dict[str, Any]:
+    """Build the report of one or more results files; returns where it went and how big it is"""
+    builder = ReportBuilder()
+    for path in results:
+        builder.add_file(path)
+    summary = builder.analyzer.summary()
+    page = render_report(summary, builder.timeline, title or f'Load test report: {os.path.basename(results[0])}',
+                         points)
+    out_dir = os.path.dirname(output_path)
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return {'report_path': output_path, 'bytes': len(page.encode('utf-8')),
+            'samples': summary['total']['samples'],
+            'bucket_seconds': builder.timeline.width / 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Write a self-contained HTML report (charts and percentile tables) for JMeter CSV results',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python html_report.py data/output/results.csv
+  python html_report.py engine1.csv engine2.csv -o report.html --title "Checkout, 200 users"
+        '''
+    )
+    parser.add_argument('results', nargs='+', help='JMeter CSV results file(s); several files are merged')
+    parser.add_argument('-o', '--output', help='Report file (default: report.html next to the first results file)')
+    parser.add_argument('--title', help='Report title')
+    parser.add_argument('--points', type=int, default=CHART_POINTS,
+                        help=f'Points per chart series after downsampling (default: {CHART_POINTS})')
+
+    args = parser.parse_args()
+
+    for path in args.results:
+        if not os.path.exists(path):
+            print(f"Error: File '{path}' not found")
+            sys.exit(1)
+    output = args.output or os.path.join(os.path.dirname(args.results[0]), 'report.html')
+
+    started = time.perf_counter()
+    report = write_report(args.results, output, args.title, args.points)
+    print(f"✓ Report for {report['samples']} samples written to '{output}' "
+          f"({report['bytes'] / 1024:.0f} KB, {time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
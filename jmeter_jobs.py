@@ -0,0 +1,308 @@
+"""
+JMeter job queue
+Runs JMeter load tests as asyncio subprocesses so the MCP server stays
+responsive while a test is running. Each run is a job with an id that can be
+polled for status and progress, waited on with a timeout or cancelled. At most
+max_concurrent jobs run at the same time; the others wait in submission order.
+A group of jobs (the engines of a sharded run) waits until all of them can
+start together.
+"""
+
+import asyncio
+import os
+import shlex
+import signal
+import time
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import tracing
+from convert_postman_to_jmx import CORRELATION_VARIABLE
+
+JOB_STATES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+FINISHED_STATES = ('succeeded', 'failed', 'cancelled')
+
+# Lines of engine output kept per job
+OUTPUT_LINES = 200
+
+
+def docker_command(jmx_path: str, results_path: str) -> List[str]:
+    """Run a plan in the justb4/jmeter container with the working directory mounted"""
+    return [
+        'docker', 'run', '--rm',
+        '-v', f'{os.getcwd()}:/jmeter',
+        '-w', '/jmeter',
+        'justb4/jmeter:latest',
+        '-n', '-t', jmx_path, '-l', results_path,
+        # Save each sample's correlation id (see the converter) as a results column
+        f'-Jsample_variables={CORRELATION_VARIABLE}'
+    ]
+
+
+def template_command(template: str) -> Callable[[str, str], List[str]]:
+    """Engine command from a template such as 'jmeter -n -t {jmx_path} -l {results_path}'"""
+    def command(jmx_path: str, results_path: str) -> List[str]:
+        return [part.format(jmx_path=jmx_path, results_path=results_path) for part in shlex.split(template)]
+    return command
+
+
+def _signal(process: asyncio.subprocess.Process, sig: Optional[int]):
+    """Stop an engine and its children; they would otherwise keep its output pipes open"""
+    if os.name == 'posix':
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            pass
+    elif sig == signal.SIGTERM:
+        process.terminate()
+    else:
+        process.kill()
+
+
+class Job:
+    """One JMeter run and its state"""
+
+    def __init__(self, jmx_path: str, results_path: str, command: List[str]):
+        self.id = uuid.uuid4().hex[:12]
+        self.jmx_path = jmx_path
+        self.results_path = results_path
+        self.command = command
+        self.status = 'queued'
+        self.returncode: Optional[int] = None
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.stdout: Deque[str] = deque(maxlen=OUTPUT_LINES)
+        self.stderr: Deque[str] = deque(maxlen=OUTPUT_LINES)
+        self.samples = 0
+        self.done = asyncio.Event()
+        self._holds_slot = False
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._task: Optional[asyncio.Task] = None
+        self._results_offset = 0
+
+    def update_progress(self):
+        """Count the samples written to the results file since the last call"""
+        try:
+            with open(self.results_path, 'rb') as f:
+                f.seek(self._results_offset)
+                data = f.read()
+        except OSError:
+            return
+        if self._results_offset == 0 and data[:10] == b'timeStamp,':
+            self.samples -= 1  # header line
+        self._results_offset += len(data)
+        self.samples += data.count(b'\n')
+
+    def to_dict(self) -> Dict:
+        now = time.time()
+        if self.status == 'running':
+            self.update_progress()
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'jmx_path': self.jmx_path,
+            'results_path': self.results_path,
+            'returncode': self.returncode,
+            'error': self.error,
+            'samples': self.samples,
+            'queued_seconds': round((self.started or now) - self.submitted, 3),
+            'running_seconds': round((self.finished or now) - self.started, 3) if self.started else 0.0,
+        }
+
+
+class JobManager:
+    """Queue of JMeter runs with a concurrency limit"""
+
+    def __init__(self, max_concurrent: int = 1,
+                 command: Callable[[str, str], List[str]] = docker_command,
+                 max_history: int = 100):
+        self.max_concurrent = max_concurrent
+        self.command = command
+        self.max_history = max_history
+        self.jobs: Dict[str, Job] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._group_lock: Optional[asyncio.Lock] = None
+
+    def _check_results_paths(self, results_paths: List[str]):
+        """Refuse results files that another queued or running job writes (each run deletes its file first)"""
+        taken = {os.path.abspath(job.results_path): f'job {job.id} ({job.status})' for job in self.jobs.values()
+                 if job.status not in FINISHED_STATES}
+        for results_path in results_paths:
+            path = os.path.abspath(results_path)
+            if path in taken:
+                raise ValueError(f"'{results_path}' is already the results file of {taken[path]}; "
+                                 f"choose another results_path")
+            taken[path] = 'another run of this group'
+
+    def _new_job(self, jmx_path: str, results_path: str) -> Job:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self._group_lock = asyncio.Lock()
+        results_dir = os.path.dirname(results_path)
+        if results_dir and not os.path.exists(results_dir):
+            os.makedirs(results_dir, exist_ok=True)
+        job = Job(jmx_path, results_path, self.command(jmx_path, results_path))
+        self.jobs[job.id] = job
+        return job
+
+    def submit(self, jmx_path: str, results_path: str) -> Job:
+        """Queue a run and return its job right away (needs a running event loop)"""
+        self._check_results_paths([results_path])
+        job = self._new_job(jmx_path, results_path)
+        job._task = asyncio.get_running_loop().create_task(self._run(job))
+        self._prune()
+        return job
+
+    def submit_group(self, runs: List[Tuple[str, str]]) -> List[Job]:
+        """Queue (jmx_path, results_path) runs that must start together, such as the engines of a sharded run
+
+        The group waits in the queue until it can take one slot per run at once.
+        """
+        if len(runs) > self.max_concurrent:
+            raise ValueError(f"{len(runs)} runs cannot start together with at most "
+                             f"{self.max_concurrent} concurrent runs")
+        self._check_results_paths([results_path for _, results_path in runs])
+        group = [self._new_job(jmx_path, results_path) for jmx_path, results_path in runs]
+        reserved = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for job in group:
+            job._task = loop.create_task(self._run(job, reserved))
+        loop.create_task(self._reserve(group, reserved))
+        self._prune()
+        return group
+
+    async def _reserve(self, group: List[Job], reserved: asyncio.Event):
+        """Take one slot per job of a group, then let them all start"""
+        # One group at a time, so two groups never hold part of the slots each
+        async with self._group_lock:
+            for job in group:
+                await self._slots.acquire()
+                if job.status == 'queued':
+                    job._holds_slot = True
+                else:
+                    self._slots.release()  # cancelled while queued
+        reserved.set()
+
+    def _release(self, job: Job):
+        if job._holds_slot:
+            job._holds_slot = False
+            self._slots.release()
+
+    def get(self, job_id: str) -> Job:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise ValueError(f"Unknown job '{job_id}'")
+        return job
+
+    def list(self) -> List[Job]:
+        return list(self.jobs.values())
+
+    def queue_position(self, job: Job) -> int:
+        """Number of queued jobs ahead of this one (0 once it runs)"""
+        if job.status != 'queued':
+            return 0
+        return sum(1 for other in self.jobs.values()
+                   if other.status == 'queued' and other.submitted < job.submitted)
+
+    async def _run(self, job: Job, reserved: Optional[asyncio.Event] = None):
+        queued = time.perf_counter()
+        try:
+            if reserved is None:
+                await self._slots.acquire()
+                job._holds_slot = True
+            else:
+                await reserved.wait()
+            tracing.record('jmeter.queue', queued, time.perf_counter(), job=job.id)
+            if job.status == 'cancelled':
+                return
+            job.status = 'running'
+            job.started = time.time()
+            if os.path.exists(job.results_path):
+                # JMeter appends to an existing file; every run starts fresh
+                os.remove(job.results_path)
+            with tracing.span('jmeter.spawn', job=job.id, command=job.command[0]):
+                # Its own process group, so cancelling also stops what the engine started
+                job._process = await asyncio.create_subprocess_exec(
+                    *job.command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                    start_new_session=os.name == 'posix')
+            spawned = time.perf_counter()
+            if job.status == 'cancelled':
+                # Cancelled while the process was being started
+                await self._terminate(job)
+            # Time to the first output line: container and JVM startup
+            first_output: List[float] = []
+            with tracing.span('jmeter.process', job=job.id):
+                await asyncio.gather(self._collect(job._process.stdout, job.stdout, first_output),
+                                     self._collect(job._process.stderr, job.stderr, first_output))
+                job.returncode = await job._process.wait()
+                if first_output:
+                    tracing.record('jmeter.startup', spawned, first_output[0], job=job.id)
+            if job.status != 'cancelled':
+                job.status = 'succeeded' if job.returncode == 0 else 'failed'
+        except asyncio.CancelledError:
+            job.status = 'cancelled'
+            await self._terminate(job)
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            self._release(job)
+            if job.started:
+                job.update_progress()
+            job.finished = time.time()
+            job.done.set()
+
+    async def _collect(self, stream: asyncio.StreamReader, lines: Deque[str], first_output: List[float]):
+        async for line in stream:
+            if not first_output:
+                first_output.append(time.perf_counter())
+            lines.append(line.decode('utf-8', errors='replace').rstrip('\n'))
+
+    async def _terminate(self, job: Job, grace: float = 10.0):
+        process = job._process
+        if process is None or process.returncode is not None:
+            return
+        _signal(process, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), grace)
+        except asyncio.TimeoutError:
+            _signal(process, signal.SIGKILL if os.name == 'posix' else None)
+            await process.wait()
+        job.returncode = process.returncode
+
+    async def cancel(self, job_id: str) -> Job:
+        """Stop a running job or take a queued one off the queue"""
+        job = self.get(job_id)
+        if job.status in FINISHED_STATES:
+            return job
+        if job.status == 'queued':
+            job.status = 'cancelled'
+            job._task.cancel()
+            # A task cancelled before it started never reaches its finally block
+            self._release(job)
+            job.finished = time.time()
+            job.done.set()
+        else:
+            # If the process is still being started, _run stops it once it exists
+            job.status = 'cancelled'
+            await self._terminate(job)
+        await job.done.wait()
+        return job
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Job:
+        """Wait until the job finishes or the timeout passes; the job keeps running on timeout"""
+        job = self.get(job_id)
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_history"""
+        finished = [job for job in self.jobs.values() if job.status in FINISHED_STATES]
+        for job in finished[:max(0, len(finished) - self.max_history)]:
+            del self.jobs[job.id]
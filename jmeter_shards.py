@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Sharded JMeter execution
+Splits a test plan across several engine instances (Docker containers or any
+local command) so the load is no longer capped by a single JVM. Every engine
+gets its own copy of the plan with its share of the threads and throughput
+targets, and writes its own results file. The per-engine files are then merged
+into one time-ordered results file and summarized.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import heapq
+import itertools
+import os
+import sys
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from jmeter_jobs import JobManager, docker_command, template_command
+from results_analyzer import DEFAULT_FIELDS, ResultsAnalyzer, format_summary
+
+# Properties holding a load target that is divided between engines:
+# element tag -> [(property name, 'int' | 'float')]
+# setUp and tearDown Thread Groups are not listed: every engine runs its own in full
+SPLIT_PROPERTIES = {
+    'ThreadGroup': [('ThreadGroup.num_threads', 'int')],
+    'com.blazemeter.jmeter.threads.concurrency.ConcurrencyThreadGroup': [('TargetLevel', 'int')],
+    'com.blazemeter.jmeter.threads.arrivals.ArrivalsThreadGroup': [('TargetLevel', 'float')],
+    'ConstantThroughputTimer': [('throughput', 'float')],
+    'PreciseThroughputTimer': [('throughput', 'float')],
+}
+
+# ConstantThroughputTimer calcMode 0 ("this thread only") is a per-thread target
+PER_THREAD_CALC_MODE = '0'
+
+# Rows each engine's file may be out of timestamp order (JMeter writes samples
+# as they complete, not as they start)
+REORDER_WINDOW = 10000
+
+
+def _property(elem: ET.Element, name: str) -> Optional[ET.Element]:
+    """The element holding a property's value (stringProp/intProp text or doubleProp <value>)"""
+    for prop in elem:
+        if prop.get('name') == name:
+            return prop
+        if prop.tag == 'doubleProp' and prop.findtext('name') == name:
+            return prop.find('value')
+    return None
+
+
+def _share(total: float, kind: str, engines: int, index: int) -> str:
+    if kind == 'int':
+        share = int(total) // engines + (1 if index < int(total) % engines else 0)
+        return str(share)
+    return f'{total / engines:g}'
+
+
+def split_targets(root: ET.Element) -> List[Tuple[ET.Element, str, float]]:
+    """Numeric load targets in a plan: (value element, kind, value)"""
+    targets = []
+    for elem in root.iter():
+        if elem.tag not in SPLIT_PROPERTIES or elem.get('enabled') == 'false':
+            continue
+        if elem.tag == 'ConstantThroughputTimer':
+            mode = _property(elem, 'calcMode')
+            if mode is not None and (mode.text or '').strip() == PER_THREAD_CALC_MODE:
+                continue
+        for name, kind in SPLIT_PROPERTIES[elem.tag]:
+            value = _property(elem, name)
+            if value is None:
+                continue
+            try:
+                number = float((value.text or '').strip())
+            except ValueError:
+                print(f"⚠ {elem.get('testname', elem.tag)}: {name}={value.text!r} is not a number and is not split")
+                continue
+            targets.append((value, kind, number))
+    return targets
+
+
+def shard_plan(jmx_path: str, engines: int, output_prefix: str) -> List[str]:
+    """Write one plan per engine with the load targets divided between them
+
+    Fewer plans are written when there are fewer threads than engines.
+    """
+    tree = ET.parse(jmx_path)
+    targets = split_targets(tree.getroot())
+    thread_counts = [number for _, kind, number in targets if kind == 'int']
+    if thread_counts:
+        engines = max(1, min(engines, int(max(thread_counts))))
+
+    paths = []
+    for index in range(engines):
+        for value, kind, number in targets:
+            value.text = _share(number, kind, engines, index)
+        path = f'{output_prefix}.engine{index + 1}.jmx'
+        tree.write(path, encoding='UTF-8', xml_declaration=True)
+        paths.append(path)
+    return paths
+
+
+def _ordered_rows(f: TextIO, engine: str, window: int = REORDER_WINDOW) -> Tuple[List[str], Iterator[Tuple[int, int, List[str]]]]:
+    """Header and (timestamp, sequence, row) of one engine's results in timestamp order"""
+    reader = csv.reader(f)
+    first = next(reader, None) or []
+    if 'timeStamp' in first:
+        fields, pending = first, []
+    else:
+        fields, pending = DEFAULT_FIELDS, ([first] if first else [])
+    timestamp_at = fields.index('timeStamp')
+    thread_at = fields.index('threadName') if 'threadName' in fields else None
+
+    def rows():
+        heap: List[Tuple[int, int, List[str]]] = []
+        sequence = itertools.count()
+        for row in itertools.chain(pending, reader):
+            if len(row) != len(fields):
+                continue
+            try:
+                timestamp = int(row[timestamp_at])
+            except ValueError:
+                continue
+            if thread_at is not None:
+                # Same naming JMeter's own distributed mode uses: "<engine>-<thread>"
+                row[thread_at] = f'{engine}-{row[thread_at]}'
+            heapq.heappush(heap, (timestamp, next(sequence), row))
+            if len(heap) > window:
+                yield heapq.heappop(heap)
+        while heap:
+            yield heapq.heappop(heap)
+
+    return fields, rows()
+
+
+def merge_results(paths: List[str], output_path: str, analyzer: Optional[ResultsAnalyzer] = None) -> int:
+    """Merge per-engine results into one time-ordered file, optionally summarizing on the way"""
+    fields: Optional[List[str]] = None
+    streams = []
+    # Closes every engine file, also when a later one is rejected
+    with contextlib.ExitStack() as files:
+        for index, path in enumerate(paths):
+            if not os.path.exists(path):
+                print(f"⚠ Engine results '{path}' not found")
+                continue
+            source = files.enter_context(open(path, 'r', encoding='utf-8', errors='replace', newline=''))
+            engine_fields, rows = _ordered_rows(source, f'engine{index + 1}')
+            if fields is None:
+                fields = engine_fields
+            elif engine_fields != fields:
+                raise ValueError(f"'{path}' has different columns than the other engines")
+            streams.append(rows)
+
+        if analyzer is not None:
+            analyzer.fields = fields
+        merged = 0
+        chunk: List[List[str]] = []
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            if fields:
+                writer.writerow(fields)
+            for _, _, row in heapq.merge(*streams):
+                writer.writerow(row)
+                merged += 1
+                if analyzer is not None:
+                    chunk.append(row)
+                    if len(chunk) >= analyzer.chunk_size:
+                        analyzer.add_rows(chunk)
+                        chunk = []
+    if analyzer is not None and chunk:
+        analyzer.add_rows(chunk)
+    return merged
+
+
+def shard_prefix(results_path: str) -> str:
+    """Per-engine results sit next to the merged results: results.engine1.csv, ..."""
+    return os.path.splitext(results_path)[0]
+
+
+def plan_prefix(jmx_path: str, results_path: str) -> str:
+    """Per-engine plans sit next to the source plan, so file paths relative to it still resolve
+
+    JMeter resolves relative paths (CSV Data Set files, for one) against the
+    plan's directory. The results name keeps runs of one plan apart:
+    plan.results.engine1.jmx, ...
+    """
+    plan = os.path.splitext(jmx_path)[0]
+    return f'{plan}.{os.path.splitext(os.path.basename(results_path))[0]}'
+
+
+async def run_sharded(jmx_path: str, results_path: str, engines: int,
+                      manager: Optional[JobManager] = None) -> Dict[str, Any]:
+    """Run a plan on several engines at once and merge their results"""
+    results_dir = os.path.dirname(results_path)
+    if results_dir and not os.path.exists(results_dir):
+        os.makedirs(results_dir, exist_ok=True)
+    manager = manager or JobManager(max_concurrent=engines)
+    if engines > manager.max_concurrent:
+        # Checked before the plans are written; all engines must run at the same time
+        raise ValueError(f"{engines} engines need {engines} concurrent runs, "
+                         f"but at most {manager.max_concurrent} are allowed")
+
+    prefix = shard_prefix(results_path)
+    plans = shard_plan(jmx_path, engines, plan_prefix(jmx_path, results_path))
+    # The engines share the manager's queue and limit, and start together
+    jobs = manager.submit_group([(plan, f'{prefix}.engine{index + 1}.csv') for index, plan in enumerate(plans)])
+    try:
+        await asyncio.gather(*(job.done.wait() for job in jobs))
+    except asyncio.CancelledError:
+        await asyncio.gather(*(manager.cancel(job.id) for job in jobs))
+        raise
+
+    analyzer = ResultsAnalyzer()
+    merged = await asyncio.to_thread(merge_results, [job.results_path for job in jobs], results_path, analyzer)
+    return {
+        'results_path': results_path,
+        'samples': merged,
+        'engines': [job.to_dict() for job in jobs],
+        'summary': analyzer.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run a JMeter plan on several engines and merge their results',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python jmeter_shards.py data/output/testplan.jmx -n 4 -o data/output/results.csv
+  python jmeter_shards.py plan.jmx -n 8 --command "jmeter -n -t {jmx_path} -l {results_path}"
+  python jmeter_shards.py --merge-only a.csv b.csv -o merged.csv
+        '''
+    )
+    parser.add_argument('jmx', nargs='+', help='Test plan (or results files with --merge-only)')
+    parser.add_argument('-n', '--engines', type=int, default=2, help='Number of engines (default: 2)')
+    parser.add_argument('-o', '--output', default=os.path.join('data', 'output', 'results.csv'),
+                        help='Merged results file (default: data/output/results.csv)')
+    parser.add_argument('--command',
+                        help='Engine command template with {jmx_path} and {results_path} (default: justb4/jmeter in Docker)')
+    parser.add_argument('--merge-only', action='store_true', help='Only merge existing results files')
+
+    args = parser.parse_args()
+
+    if args.merge_only:
+        analyzer = ResultsAnalyzer()
+        merged = merge_results(args.jmx, args.output, analyzer)
+        print(f"✓ Merged {merged} samples into '{args.output}'\n")
+        print(format_summary(analyzer.summary()))
+        return
+
+    if not os.path.exists(args.jmx[0]):
+        print(f"Error: File '{args.jmx[0]}' not found")
+        sys.exit(1)
+
+    command = template_command(args.command) if args.command else docker_command
+    manager = JobManager(max_concurrent=args.engines, command=command)
+    result = asyncio.run(run_sharded(args.jmx[0], args.output, args.engines, manager))
+
+    failed = False
+    for index, engine in enumerate(result['engines']):
+        print(f"engine{index + 1}: {engine['status']} (return code {engine['returncode']}), "
+              f"{engine['samples']} samples, {engine['running_seconds']}s -> {engine['results_path']}")
+        failed = failed or engine['status'] != 'succeeded'
+    print(f"\n✓ Merged {result['samples']} samples into '{result['results_path']}'\n")
+    print(format_summary(result['summary']))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""
+Streaming JMX writer
+Writes a JMeter test plan to a text stream element by element, so a plan never
+has to be held in memory as a whole. The output is the same indented format the
+converter used to produce with minidom's toprettyxml (two-space indent, blank
+lines removed).
+"""
+
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, TextIO
+
+
+def _escape(value: str) -> str:
+    """Escape a text or attribute value the way minidom writes it"""
+    if '&' in value:
+        value = value.replace('&', '&amp;')
+    if '<' in value:
+        value = value.replace('<', '&lt;')
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '>' in value:
+        value = value.replace('>', '&gt;')
+    if '\n' in value:
+        # Values always sit between a start and an end tag (or quote) on the
+        # same line, so only their inner lines can end up blank; the old
+        # post-processing dropped those.
+        lines = value.split('\n')
+        inner = [line for line in lines[1:-1] if line.strip()]
+        value = '\n'.join([lines[0]] + inner + [lines[-1]])
+    return value
+
+
+def _escape_text(text: str) -> str:
+    """Escape element text, applying XML end-of-line normalization"""
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return _escape(text)
+
+
+class JMXWriter:
+    """Write indented JMX to a text stream as elements are produced"""
+
+    def __init__(self, stream: TextIO, indent: str = '  '):
+        self.stream = stream
+        self.indent = indent
+        # One entry per open element: [tag, has_children, trailing siblings]
+        self._open: List[list] = []
+        self.stream.write('<?xml version="1.0" ?>')
+
+    def _open_tag(self, tag: str, attrib: Dict[str, str], depth: int) -> str:
+        parts = ['\n', self.indent * depth, '<', tag]
+        for name, value in attrib.items():
+            parts.append(f' {name}="{_escape(value)}"')
+        return ''.join(parts)
+
+    def _mark_child(self):
+        """Finish the parent's start tag before its first child is written"""
+        if self._open and not self._open[-1][1]:
+            self._open[-1][1] = True
+            self.stream.write('>')
+
+    def start(self, tag: str, attrib: Optional[Dict[str, str]] = None):
+        """Open an element whose children will be written afterwards"""
+        self._mark_child()
+        self.stream.write(self._open_tag(tag, attrib or {}, len(self._open)))
+        self._open.append([tag, False, []])
+
+    def end(self):
+        """Close the innermost open element"""
+        tag, has_children, _ = self._open.pop()
+        if has_children:
+            self.stream.write(f'\n{self.indent * len(self._open)}</{tag}>')
+        else:
+            self.stream.write('/>')
+
+        # Siblings that followed this element when it was opened via begin()
+        if self._open and self._open[-1][2]:
+            trailing = self._open[-1][2]
+            self._open[-1][2] = []
+            for elem in trailing:
+                self.write(elem)
+
+    def write(self, elem: ET.Element):
+        """Write a complete element (and its subtree) at the current depth"""
+        self._mark_child()
+        self.stream.write(self.fragment(elem))
+
+    @property
+    def depth(self) -> int:
+        """Nesting level at which the next element will be written"""
+        return len(self._open)
+
+    def fragment(self, elem: ET.Element) -> str:
+        """Serialize an element for the current depth without writing it"""
+        parts: List[str] = []
+        self._serialize(elem, len(self._open), parts)
+        return ''.join(parts)
+
+    def write_fragment(self, fragment: str):
+        """Write text produced by fragment() at the same depth"""
+        self._mark_child()
+        self.stream.write(fragment)
+
+    def _serialize(self, elem: ET.Element, depth: int, parts: List[str]):
+        parts.append(self._open_tag(elem.tag, elem.attrib, depth))
+        if len(elem):
+            parts.append('>')
+            for child in elem:
+                self._serialize(child, depth + 1, parts)
+            parts.append(f'\n{self.indent * depth}</{elem.tag}>')
+        elif elem.text:
+            parts.append(f'>{_escape_text(elem.text)}</{elem.tag}>')
+        else:
+            parts.append('/>')
+
+    def begin(self, root: ET.Element, insertion_point: ET.Element):
+        """Write root down to insertion_point and leave that path open
+
+        Everything before the path is written now; children that follow it are
+        written when their parent is closed. New elements written afterwards
+        become children of insertion_point.
+        """
+        path = _find_path(root, insertion_point)
+        if path is None:
+            raise ValueError('insertion point is not part of the tree')
+
+        for elem, child in zip(path, path[1:] + [None]):
+            self.start(elem.tag, elem.attrib)
+            children = list(elem)
+            index = len(children)
+            if child is not None:
+                index = next(i for i, c in enumerate(children) if c is child)
+                self._open[-1][2] = children[index + 1:]
+            for sub in children[:index]:
+                self.write(sub)
+
+    def close(self):
+        """Close every element that is still open"""
+        while self._open:
+            self.end()
+
+
+def _find_path(root: ET.Element, target: ET.Element) -> Optional[List[ET.Element]]:
+    """Return the chain of elements from root to target"""
+    stack = [(root, [root])]
+    while stack:
+        elem, path = stack.pop()
+        if elem is target:
+            return path
+        for child in elem:
+            stack.append((child, path + [child]))
+    return None
+
+
+# Template support: an element tagged SLOT stands for a list of sub-templates
+# spliced in at that point; attribute or text values made with slot() are
+# filled in per use.
+SLOT = '\x00slot'
+
+
+def slot(name: str) -> str:
+    """Placeholder for an attribute or text value filled in when a template is used"""
+    return f'\x00{name}\x00'
+
+
+def _slot_name(value: Optional[str]) -> Optional[str]:
+    if value and len(value) > 2 and value[0] == '\x00' and value[-1] == '\x00':
+        return value[1:-1]
+    return None
+
+
+class JMXTemplate:
+    """An element serialized once, with named slots filled in per use
+
+    render() produces the same text JMXWriter would write for the element
+    built by build(), without creating or serializing any elements.
+    """
+
+    def __init__(self, prototype: ET.Element, indent: str = '  '):
+        self.prototype = prototype
+        self.indent = indent
+        self._compiled: Dict[int, list] = {}
+
+    def _compile(self, depth: int) -> list:
+        ops: list = []
+        self._compile_element(self.prototype, depth, ops)
+
+        # Merge adjacent literal text
+        merged: list = []
+        for op in ops:
+            if isinstance(op, str) and merged and isinstance(merged[-1], str):
+                merged[-1] += op
+            else:
+                merged.append(op)
+        self._compiled[depth] = merged
+        return merged
+
+    def _compile_element(self, elem: ET.Element, depth: int, ops: list):
+        indent = self.indent * depth
+        ops.append(f'\n{indent}<{elem.tag}')
+        for name, value in elem.attrib.items():
+            slot_name = _slot_name(value)
+            if slot_name:
+                ops.extend([f' {name}="', ('attr', slot_name), '"'])
+            else:
+                ops.append(f' {name}="{_escape(value)}"')
+
+        children = list(elem)
+        text_slot = _slot_name(elem.text)
+        if len(children) == 1 and children[0].tag == SLOT:
+            # Self-closing unless the slot gets some content
+            ops.append(('children', children[0].text, depth + 1, f'\n{indent}</{elem.tag}>'))
+        elif children:
+            ops.append('>')
+            for child in children:
+                if child.tag == SLOT:
+                    ops.append(('splice', child.text, depth + 1))
+                else:
+                    self._compile_element(child, depth + 1, ops)
+            ops.append(f'\n{indent}</{elem.tag}>')
+        elif text_slot:
+            ops.append(('text', text_slot, f'</{elem.tag}>'))
+        elif elem.text:
+            ops.append(f'>{_escape_text(elem.text)}</{elem.tag}>')
+        else:
+            ops.append('/>')
+
+    def render(self, depth: int, values: Dict) -> str:
+        """Serialize the template at the given depth"""
+        ops = self._compiled.get(depth) or self._compile(depth)
+        parts: List[str] = []
+        for op in ops:
+            if op.__class__ is str:
+                parts.append(op)
+                continue
+            kind, name = op[0], op[1]
+            value = values[name]
+            if kind == 'attr':
+                parts.append(_escape(value))
+            elif kind == 'text':
+                parts.append(f'>{_escape_text(value)}{op[2]}' if value else '/>')
+            elif kind == 'splice':
+                for template, sub_values in value:
+                    parts.append(template.render(op[2], sub_values))
+            elif value:
+                parts.append('>')
+                for template, sub_values in value:
+                    parts.append(template.render(op[2], sub_values))
+                parts.append(op[3])
+            else:
+                parts.append('/>')
+        return ''.join(parts)
+
+    def build(self, values: Dict) -> ET.Element:
+        """Create the element tree with the slots filled in"""
+        return self._build(self.prototype, values)
+
+    def _build(self, proto: ET.Element, values: Dict) -> ET.Element:
+        attrib = {}
+        for name, value in proto.attrib.items():
+            slot_name = _slot_name(value)
+            attrib[name] = values[slot_name] if slot_name else value
+        elem = ET.Element(proto.tag, attrib)
+        text_slot = _slot_name(proto.text)
+        elem.text = values[text_slot] if text_slot else proto.text
+        for child in proto:
+            if child.tag == SLOT:
+                for template, sub_values in values[child.text]:
+                    elem.append(template.build(sub_values))
+            else:
+                elem.append(self._build(child, values))
+        return elem
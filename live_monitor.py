@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Live run monitor
+Follows a JMeter CSV results file while the engine is still writing it. Only
+the bytes appended since the last poll are read (a row cut off mid-write is
+kept for the next poll), so polling a long run stays cheap. Besides the
+running per-label totals it keeps a rolling window of the last few seconds
+(by sample completion time): throughput, error rate and latency percentiles.
+
+Thresholds turn the monitor into a watchdog: when the window's error rate or
+p95/p99 stays above its limit for `sustain` seconds, the run is aborted
+instead of wasting the rest of the test window.
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from results_analyzer import DEFAULT_FIELDS, LatencyHistogram, ResultsAnalyzer
+
+# Seconds of samples in the rolling window
+WINDOW = 30
+# Bytes read per poll step (larger backlogs take several steps)
+READ_SIZE = 16 * 1024 * 1024
+
+
+class ResultsTail:
+    """New complete rows of a results file since the last read"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.fields: Optional[List[str]] = None
+        # Set when the file was replaced or truncated since the last read (a new run)
+        self.restarted = False
+        self._partial = b''
+        self._identity: Optional[tuple] = None
+
+    def read(self, limit: int = READ_SIZE) -> List[List[str]]:
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return []
+        with f:
+            stat = os.fstat(f.fileno())
+            identity = (stat.st_dev, stat.st_ino)
+            if self._identity is not None and (identity != self._identity or stat.st_size < self.offset):
+                self.offset = 0
+                self.fields = None
+                self._partial = b''
+                self.restarted = True
+            self._identity = identity
+            f.seek(self.offset)
+            data = f.read(limit)
+        self.offset += len(data)
+        return self._rows(self._partial + data)
+
+    def _rows(self, data: bytes) -> List[List[str]]:
+        # A record ends at a newline outside quotes; the rest waits for more data
+        end = 0
+        quotes = 0
+        position = 0
+        while True:
+            newline = data.find(b'\n', position)
+            if newline < 0:
+                break
+            quotes += data.count(b'"', position, newline)
+            position = newline + 1
+            if quotes % 2 == 0:
+                end = position
+        self._partial = data[end:]
+        if not end:
+            return []
+        rows = list(csv.reader(io.StringIO(data[:end].decode('utf-8', errors='replace'), newline='')))
+        if self.fields is None and rows:
+            if 'elapsed' in rows[0] and 'label' in rows[0]:
+                self.fields = rows.pop(0)
+            else:
+                self.fields = DEFAULT_FIELDS
+        return rows
+
+
+class RollingWindow:
+    """Per-second sample counts, errors and elapsed histograms of the last `window` seconds"""
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        # second (of sample completion) -> [samples, errors, histogram]
+        self.seconds: Dict[int, list] = {}
+        self.first: Optional[int] = None
+        self.latest: Optional[int] = None
+
+    def add_rows(self, rows: List[List[str]], fields: List[str]):
+        width = len(fields)
+        column = {name: i for i, name in enumerate(fields)}
+        timestamp_at, elapsed_at, success_at = column['timeStamp'], column['elapsed'], column['success']
+        groups: Dict[int, list] = {}
+        for row in rows:
+            if len(row) != width:
+                continue
+            try:
+                elapsed = int(row[elapsed_at])
+                second = (int(row[timestamp_at]) + elapsed) // 1000
+            except ValueError:
+                continue
+            group = groups.get(second)
+            if group is None:
+                group = groups[second] = [[], 0]
+            group[0].append(elapsed)
+            if row[success_at] != 'true':
+                group[1] += 1
+        if not groups:
+            return
+
+        newest = max(groups)
+        if self.latest is None or newest > self.latest:
+            self.latest = newest
+        oldest = min(groups)
+        if self.first is None or oldest < self.first:
+            self.first = oldest
+        horizon = self.latest - self.window
+        for second, (values, errors) in groups.items():
+            if second <= horizon:
+                continue
+            slot = self.seconds.get(second)
+            if slot is None:
+                slot = self.seconds[second] = [0, 0, LatencyHistogram()]
+            slot[0] += len(values)
+            slot[1] += errors
+            slot[2].record_many(values)
+        for second in [second for second in self.seconds if second <= horizon]:
+            del self.seconds[second]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Throughput, error rate and elapsed percentiles over the window"""
+        histogram = LatencyHistogram()
+        samples = errors = 0
+        for count, failed, slot_histogram in self.seconds.values():
+            samples += count
+            errors += failed
+            histogram.merge(slot_histogram)
+        # Early in a run the window is not full yet
+        span = min(self.window, self.latest - self.first + 1) if self.latest is not None else 0
+        return {
+            'window_seconds': span,
+            'samples': samples,
+            'errors': errors,
+            'error_rate': errors / samples if samples else 0.0,
+            'throughput': samples / span if span else 0.0,
+            'elapsed': histogram.summary((50, 90, 95, 99)),
+        }
+
+
+class Thresholds:
+    """Limits on the rolling window that abort a run"""
+
+    def __init__(self, max_error_rate: Optional[float] = None, max_p95: Optional[float] = None,
+                 max_p99: Optional[float] = None, min_samples: int = 50, sustain: float = 10.0):
+        # max_error_rate is a fraction (0.05 = 5%), max_p95/max_p99 are milliseconds
+        self.max_error_rate = max_error_rate
+        self.max_p95 = max_p95
+        self.max_p99 = max_p99
+        # Windows with fewer samples are not judged
+        self.min_samples = min_samples
+        # Seconds a breach must last before the run is aborted
+        self.sustain = sustain
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Thresholds':
+        """Thresholds from tool arguments; the error rate is given in percent"""
+        unknown = set(data) - {'max_error_rate', 'max_p95', 'max_p99', 'min_samples', 'sustain'}
+        if unknown:
+            raise ValueError(f"Unknown threshold(s): {', '.join(sorted(unknown))}")
+        limits = {name: float(data[name]) if data.get(name) is not None else None
+                  for name in ('max_error_rate', 'max_p95', 'max_p99')}
+        if limits['max_error_rate'] is not None:
+            limits['max_error_rate'] /= 100
+        return cls(**limits, min_samples=int(data.get('min_samples', 50)), sustain=float(data.get('sustain', 10.0)))
+
+    @property
+    def active(self) -> bool:
+        return any(limit is not None for limit in (self.max_error_rate, self.max_p95, self.max_p99))
+
+    def breaches(self, window: Dict[str, Any]) -> List[str]:
+        """What the window exceeds, as readable reasons"""
+        if window['samples'] < self.min_samples:
+            return []
+        reasons = []
+        if self.max_error_rate is not None and window['error_rate'] > self.max_error_rate:
+            reasons.append(f"error rate {window['error_rate'] * 100:.1f}% > {self.max_error_rate * 100:g}%")
+        for key, limit in (('p95', self.max_p95), ('p99', self.max_p99)):
+            value = window['elapsed'][key]
+            if limit is not None and value is not None and value > limit:
+                reasons.append(f"{key} {value:.0f}ms > {limit:g}ms")
+        return reasons
+
+
+class LiveMonitor:
+    """Running totals and rolling-window stats of a results file being written"""
+
+    def __init__(self, path: str, window: int = WINDOW, thresholds: Optional[Thresholds] = None):
+        self.path = path
+        self.window_size = window
+        self.thresholds = thresholds or Thresholds()
+        self.tail = ResultsTail(path)
+        self.analyzer = ResultsAnalyzer()
+        self.window = RollingWindow(window)
+        self.polled: Optional[float] = None
+        self.breached_since: Optional[float] = None
+        self.breaches: List[str] = []
+        # Reason the run should stop, once a breach has lasted long enough
+        self.abort_reason: Optional[str] = None
+        # The watchdog and tool calls may poll from different threads
+        self._lock = threading.Lock()
+
+    def poll(self) -> int:
+        """Take in the rows written since the last poll; returns how many there were"""
+        total = 0
+        with self._lock:
+            while True:
+                offset = self.tail.offset
+                rows = self.tail.read()
+                if self.tail.restarted:
+                    self.tail.restarted = False
+                    self.analyzer = ResultsAnalyzer()
+                    self.window = RollingWindow(self.window_size)
+                if rows:
+                    self.analyzer.fields = self.tail.fields
+                    self.analyzer.add_rows(rows)
+                    self.window.add_rows(rows, self.tail.fields)
+                    total += len(rows)
+                if self.tail.offset == offset or not self._behind():
+                    break
+            self.polled = time.time()
+            self._check()
+        return total
+
+    def _behind(self) -> bool:
+        try:
+            return os.path.getsize(self.path) > self.tail.offset
+        except OSError:
+            return False
+
+    def _check(self):
+        if not self.thresholds.active or self.abort_reason:
+            return
+        self.breaches = self.thresholds.breaches(self.window.snapshot())
+        now = time.monotonic()
+        if not self.breaches:
+            self.breached_since = None
+            return
+        if self.breached_since is None:
+            self.breached_since = now
+        if now - self.breached_since >= self.thresholds.sustain:
+            self.abort_reason = f"{', '.join(self.breaches)} over the last {self.window_size}s"
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Any]:
+        total = self.analyzer.overall().summary((50, 95, 99))
+        return {
+            'results_path': self.path,
+            'polled': self.polled,
+            'window': self.window.snapshot(),
+            'total': {key: total[key] for key in ('samples', 'errors', 'error_rate', 'throughput')},
+            'total_elapsed': total['elapsed'],
+            'labels': [
+                {'label': stats.label, 'samples': stats.samples, 'errors': stats.errors,
+                 'p95': stats.timings['elapsed'].percentile(95)}
+                for stats in sorted(self.analyzer.labels.values(), key=lambda stats: -stats.samples)
+            ],
+            'breaches': self.breaches,
+            'abort_reason': self.abort_reason,
+        }
+
+
+def _ms(value: Optional[float]) -> str:
+    return '-' if value is None else f'{value:.0f}'
+
+
+def format_snapshot(snapshot: Dict[str, Any], max_labels: int = 10) -> str:
+    """Plain-text live view: the window, the totals and the busiest labels"""
+    window, total = snapshot['window'], snapshot['total']
+    elapsed = window['elapsed']
+    lines = [
+        f"Last {window['window_seconds']}s: {window['throughput']:.1f} samples/s, "
+        f"{window['error_rate'] * 100:.2f}% errors, p50/p90/p95/p99 {_ms(elapsed['p50'])}/{_ms(elapsed['p90'])}/"
+        f"{_ms(elapsed['p95'])}/{_ms(elapsed['p99'])} ms",
+        f"Total: {total['samples']} samples, {total['error_rate'] * 100:.2f}% errors, "
+        f"{total['throughput']:.1f} samples/s, p95 {_ms(snapshot['total_elapsed']['p95'])} ms",
+    ]
+    labels = snapshot['labels'][:max_labels]
+    if labels:
+        width = min(max(len(row['label']) for row in labels), 60)
+        for row in labels:
+            label = row['label'] if len(row['label']) <= width else row['label'][:width - 1] + '…'
+            lines.append(f"  {label:<{width}}  {row['samples']:>8}  {row['errors']:>6} err  p95 {_ms(row['p95']):>6}")
+        if len(snapshot['labels']) > max_labels:
+            lines.append(f"  ... {len(snapshot['labels']) - max_labels} more labels")
+    if snapshot['abort_reason']:
+        lines.append(f"✗ Threshold breached: {snapshot['abort_reason']}")
+    elif snapshot['breaches']:
+        lines.append(f"⚠ Over threshold: {', '.join(snapshot['breaches'])}")
+    return '\n'.join(lines)
+
+
+async def watch_job(job, manager, monitor: LiveMonitor, interval: float = 2.0):
+    """Poll a job's results while it runs; cancel the job through its manager once a threshold is breached"""
+    while not job.done.is_set():
+        try:
+            await asyncio.wait_for(job.done.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        if job.status != 'running':
+            continue
+        await asyncio.to_thread(monitor.poll)
+        if monitor.abort_reason and not job.done.is_set():
+            job.error = f"Aborted early: {monitor.abort_reason}"
+            await manager.cancel(job.id)
+    await asyncio.to_thread(monitor.poll)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Follow a JMeter CSV results file while it is written: rolling throughput, errors and percentiles',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python live_monitor.py data/output/results.csv
+  python live_monitor.py results.csv --window 60 --max-error-rate 5 --max-p95 800 || kill %1
+
+Exits with status 2 when a threshold stays breached for --sustain seconds, so a
+script can stop the engine.
+        '''
+    )
+    parser.add_argument('results', help='JMeter CSV results file (may not exist yet)')
+    parser.add_argument('--window', type=int, default=WINDOW, help=f'Rolling window in seconds (default: {WINDOW})')
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls (default: 2)')
+    parser.add_argument('--idle', type=float, default=60.0,
+                        help='Stop after the file has not grown for this many seconds (default: 60)')
+    parser.add_argument('--max-error-rate', type=float, help='Error rate limit in percent')
+    parser.add_argument('--max-p95', type=float, help='p95 elapsed limit in ms')
+    parser.add_argument('--max-p99', type=float, help='p99 elapsed limit in ms')
+    parser.add_argument('--min-samples', type=int, default=50,
+                        help='Windows with fewer samples are not judged (default: 50)')
+    parser.add_argument('--sustain', type=float, default=10.0,
+                        help='Seconds a breach must last before it counts (default: 10)')
+
+    args = parser.parse_args()
+
+    thresholds = Thresholds(args.max_error_rate / 100 if args.max_error_rate is not None else None,
+                            args.max_p95, args.max_p99, args.min_samples, args.sustain)
+    monitor = LiveMonitor(args.results, args.window, thresholds)
+    last_growth = time.monotonic()
+    try:
+        while True:
+            if monitor.poll():
+                last_growth = time.monotonic()
+                print(f"[{time.strftime('%H:%M:%S')}] {format_snapshot(monitor.snapshot())}\n", flush=True)
+            if monitor.abort_reason:
+                sys.exit(2)
+            if time.monotonic() - last_growth >= args.idle:
+                print(f"No new samples for {args.idle:g}s; stopping")
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Load profiles for generated test plans
+A load profile describes how the thread group drives the samplers:
+- closed model: threads, ramp_up, duration (or loops), start delay
+- stepped ramp: threads start in equal batches over ramp_up instead of one by one
+- open model: an arrival_rate (samples per second, Precise Throughput Timer) or a
+  total throughput target (samples per minute, Constant Throughput Timer)
+- pacing: the least number of seconds between two samples of one thread
+Profiles are plain dicts and can be kept by name in a small JSON file:
+
+    {"smoke": {"threads": 1},
+     "load": {"threads": 50, "ramp_up": 120, "duration": 900, "steps": 5},
+     "rate": {"threads": 200, "duration": 600, "arrival_rate": 40}}
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+# Fields of a profile and their types; unset fields keep the single-user defaults
+PROFILE_FIELDS = {
+    'threads': int,
+    'ramp_up': int,
+    'duration': int,
+    'loops': int,
+    'delay': int,
+    'steps': int,
+    'arrival_rate': float,
+    'throughput': float,
+    'pacing': float,
+}
+
+
+class LoadProfile:
+    """Validated load profile for one thread group"""
+
+    def __init__(self, threads: int = 1, ramp_up: int = 1, duration: Optional[int] = None,
+                 loops: Optional[int] = None, delay: Optional[int] = None, steps: Optional[int] = None,
+                 arrival_rate: Optional[float] = None, throughput: Optional[float] = None,
+                 pacing: Optional[float] = None):
+        if threads < 1:
+            raise ValueError('threads must be at least 1')
+        if ramp_up < 0 or (duration is not None and duration < 1) or (delay is not None and delay < 0):
+            raise ValueError('ramp_up and delay must not be negative and duration must be positive')
+        if steps is not None and steps < 1:
+            raise ValueError('steps must be at least 1')
+        if sum(value is not None for value in (arrival_rate, throughput, pacing)) > 1:
+            raise ValueError('use only one of arrival_rate, throughput and pacing')
+        for name, value in (('arrival_rate', arrival_rate), ('throughput', throughput), ('pacing', pacing)):
+            if value is not None and value <= 0:
+                raise ValueError(f'{name} must be positive')
+
+        self.threads = threads
+        self.ramp_up = ramp_up
+        self.duration = duration
+        # A timed run loops until the duration is over unless told otherwise
+        self.loops = loops if loops is not None else (-1 if duration else 1)
+        self.delay = delay
+        self.steps = steps
+        self.arrival_rate = arrival_rate
+        self.throughput = throughput
+        self.pacing = pacing
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LoadProfile':
+        unknown = set(data) - set(PROFILE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown load profile field(s): {', '.join(sorted(unknown))}")
+        values = {name: PROFILE_FIELDS[name](value) for name, value in data.items() if value is not None}
+        return cls(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in PROFILE_FIELDS if getattr(self, name) is not None}
+
+    @property
+    def stepped(self) -> bool:
+        return bool(self.steps and self.steps > 1 and self.threads > 1)
+
+    def describe(self) -> str:
+        parts = [f'{self.threads} threads']
+        if self.stepped:
+            parts.append(f'{self.steps} steps over {self.ramp_up}s')
+        else:
+            parts.append(f'{self.ramp_up}s ramp-up')
+        parts.append(f'{self.duration}s' if self.duration else f'{self.loops} loop(s)')
+        if self.arrival_rate:
+            parts.append(f'{self.arrival_rate:g} samples/s')
+        if self.throughput:
+            parts.append(f'{self.throughput:g} samples/min')
+        if self.pacing:
+            parts.append(f'{self.pacing:g}s pacing')
+        return ', '.join(parts)
+
+
+def load_profiles(path: str) -> Dict[str, Dict[str, Any]]:
+    """Read named profiles from a JSON file (a single profile is named 'default')"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"'{path}' must contain a JSON object")
+    if data and all(isinstance(value, dict) for value in data.values()):
+        return data
+    return {'default': data}
+
+
+def resolve_profile(name: Optional[str] = None, path: Optional[str] = None,
+                    overrides: Optional[Dict[str, Any]] = None) -> LoadProfile:
+    """Profile named in a profile file, with individual fields overridden"""
+    values: Dict[str, Any] = {}
+    if path:
+        profiles = load_profiles(path)
+        if name is None and len(profiles) == 1:
+            name = next(iter(profiles))
+        if name not in profiles:
+            raise ValueError(f"Load profile '{name}' not found in '{path}' "
+                             f"(available: {', '.join(sorted(profiles))})")
+        values.update(profiles[name])
+    elif name:
+        raise ValueError(f"Load profile '{name}' needs a profile file")
+    values.update({key: value for key, value in (overrides or {}).items() if value is not None})
+    return LoadProfile.from_dict(values)
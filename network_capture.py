@@ -0,0 +1,171 @@
+"""
+Network capture for the crawler
+Reads Chrome's DevTools performance log (Network.* events) to record the
+requests a page really sends: page loads, form posts and the XHR/fetch API
+calls made by scripts, each with its method, headers and body. The same
+events tell when a page has settled: no request in flight and no new one for
+a short quiet period, instead of sleeping for a fixed time.
+
+The driver must be started with performance logging on (see enable_capture).
+"""
+
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+# Resource types recorded by default; images, scripts, styles and fonts are static assets
+API_TYPES = ('Document', 'XHR', 'Fetch')
+
+# Headers the browser adds on its own and that a load test should not replay
+BROWSER_HEADERS = ('sec-ch-', 'sec-fetch-', 'upgrade-insecure-requests', 'user-agent', 'referer',
+                   'origin', 'accept-encoding', 'accept-language', 'cookie', 'content-length', 'connection')
+
+# Requests open longer than this (long polling, server-sent events) do not keep a page busy
+LONG_REQUEST = 5.0
+
+
+def enable_capture(options):
+    """Turn on the performance log for ChromeOptions"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+def postman_body(post_data: str, content_type: str) -> Dict[str, Any]:
+    """Postman body for captured post data (forms become urlencoded key/value lists)"""
+    if content_type.startswith('application/x-www-form-urlencoded'):
+        return {'mode': 'urlencoded',
+                'urlencoded': [{'key': key, 'value': value}
+                               for key, value in parse_qsl(post_data, keep_blank_values=True)]}
+    return {'mode': 'raw', 'raw': post_data}
+
+
+class NetworkCapture:
+    """Requests of one browser, collected from its performance log"""
+
+    def __init__(self, driver, hosts: Iterable[str], resource_types: Optional[Iterable[str]] = API_TYPES):
+        self.driver = driver
+        self.hosts = {host.lower() for host in hosts}
+        # None records every resource type
+        self.resource_types = set(resource_types) if resource_types is not None else None
+        self.requests: List[Dict[str, Any]] = []
+        # requestId -> monotonic start time of requests still loading
+        self.inflight: Dict[str, float] = {}
+        # requestId -> latest recorded request (redirects reuse the id)
+        self._latest: Dict[str, Dict[str, Any]] = {}
+
+    def reset(self):
+        """Forget everything logged so far (events of earlier pages included)"""
+        self.driver.get_log('performance')
+        self.requests = []
+        self.inflight.clear()
+        self._latest.clear()
+
+    def drain(self) -> int:
+        """Process the events logged since the last call
+
+        Returns how many requests started, finished or failed; other events
+        (Page.*, data still arriving on an open connection) are not activity.
+        """
+        entries = self.driver.get_log('performance')
+        now = time.monotonic()
+        activity = 0
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method', '')
+            params = message.get('params', {})
+            request_id = params.get('requestId')
+            if method == 'Network.requestWillBeSent':
+                activity += 1
+                self.inflight[request_id] = now
+                if 'redirectResponse' in params:
+                    self._set_status(request_id, params['redirectResponse'])
+                self._record(request_id, params)
+            elif method == 'Network.responseReceived':
+                self._set_status(request_id, params.get('response', {}))
+            elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+                activity += 1
+                self.inflight.pop(request_id, None)
+        return activity
+
+    def _set_status(self, request_id: str, response: Dict[str, Any]):
+        captured = self._latest.get(request_id)
+        if captured is not None and captured['status'] is None:
+            captured['status'] = response.get('status')
+
+    def _record(self, request_id: str, params: Dict[str, Any]):
+        self._latest.pop(request_id, None)
+        request = params.get('request', {})
+        url = request.get('url', '')
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or parts.netloc.lower() not in self.hosts:
+            return
+        if self.resource_types is not None and params.get('type') not in self.resource_types:
+            return
+        headers = {name: value for name, value in request.get('headers', {}).items()
+                   if not name.startswith(':') and not name.lower().startswith(BROWSER_HEADERS)}
+        post_data = request.get('postData')
+        if post_data is None and request.get('hasPostData'):
+            post_data = self._post_data(request_id)
+        captured = {
+            'type': params.get('type'),
+            'method': request.get('method', 'GET'),
+            'url': url,
+            'headers': headers,
+            'post_data': post_data,
+            'status': None,
+        }
+        self.requests.append(captured)
+        self._latest[request_id] = captured
+
+    def _post_data(self, request_id: str) -> Optional[str]:
+        """Bodies too large for the log entry are fetched over DevTools"""
+        try:
+            return self.driver.execute_cdp_cmd('Network.getRequestPostData', {'requestId': request_id})['postData']
+        except Exception:
+            return None
+
+    def busy(self) -> bool:
+        now = time.monotonic()
+        return any(now - started < LONG_REQUEST for started in self.inflight.values())
+
+    def wait_for_idle(self, quiet: float = 0.5, timeout: float = 10.0, poll: float = 0.05) -> bool:
+        """Wait until no request is in flight and none has started for `quiet` seconds
+
+        Returns False if the page is still busy after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        last_activity = time.monotonic()
+        while True:
+            if self.drain():
+                last_activity = time.monotonic()
+            now = time.monotonic()
+            if not self.busy() and now - last_activity >= quiet:
+                return True
+            if now >= deadline:
+                return False
+            time.sleep(poll)
+
+    def postman_items(self) -> List[Dict[str, Any]]:
+        """Recorded requests as Postman collection items"""
+        items = []
+        for captured in self.requests:
+            parts = urlsplit(captured['url'])
+            headers = captured['headers']
+            request: Dict[str, Any] = {
+                'method': captured['method'],
+                'header': [{'key': name, 'value': value} for name, value in headers.items()],
+                'url': captured['url'],
+            }
+            if captured['post_data'] is not None:
+                content_type = next((value for name, value in headers.items() if name.lower() == 'content-type'), '')
+                request['body'] = postman_body(captured['post_data'], content_type)
+            item: Dict[str, Any] = {'name': f"{captured['method']} {parts.path or '/'}", 'request': request}
+            if captured['status']:
+                # Observed status, kept as a saved example response
+                item['response'] = [{'name': f"Status {captured['status']}", 'code': captured['status']}]
+            items.append(item)
+        return items
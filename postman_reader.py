@@ -0,0 +1,289 @@
+"""
+Incremental Postman collection reader
+Walks a Postman collection file without loading it as a whole. Folders and
+requests are produced one at a time as events, using an explicit stack rather
+than recursion, so neither the file size nor the folder depth is limited by
+memory or by Python's recursion limit.
+
+Events are (kind, item) tuples:
+  ('folder', item)   a folder starts; item holds the members read before its "item" list
+  ('request', item)  a complete request item
+  ('end', item)      the folder closes; item now also holds the members that follow "item"
+"""
+
+import json
+import re
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_WS_RE = re.compile(rb'[ \t\n\r]*')
+# Plain data and complete strings up to the next bracket or unfinished string. The
+# trailing group may be empty, so a match never fails and nothing backtracks
+# (plain quantifiers: possessive ones need Python 3.11)
+_SCAN_RE = re.compile(rb'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*([\[\]{}"]?)')
+_STRING_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_SCALAR_RE = re.compile(rb'[^ \t\n\r,\]}]+')
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+def iter_items(items: Iterable[Dict]) -> Iterator[Event]:
+    """Yield folder/request events for an already loaded item list"""
+    stack = [(None, iter(items))]
+    while stack:
+        folder, children = stack[-1]
+        item = next(children, None)
+        if item is None:
+            stack.pop()
+            if folder is not None:
+                yield ('end', folder)
+        elif 'item' in item:
+            # It's a folder
+            yield ('folder', item)
+            stack.append((item, iter(item['item'])))
+        else:
+            # It's a request
+            yield ('request', item)
+
+
+def is_collection(path: str) -> bool:
+    """Whether a JSON file has a collection's top level ("info" or "item"); reads no further than "item"
+
+    Tells collections apart from the environment and globals files exported next to them.
+    """
+    with PostmanCollectionReader(path) as reader:
+        header = reader.read_header(required=())
+        return 'info' in header or reader._items_offset is not None
+
+
+class PostmanCollectionReader:
+    """Pull folders and requests out of a Postman collection file one at a time"""
+
+    def __init__(self, path: str, chunk_size: int = 1 << 16,
+                 max_item_bytes: int = 1 << 20, skip_keys: Iterable[str] = ('response',)):
+        self.path = path
+        self.chunk_size = chunk_size
+        # Items smaller than this are decoded in one go; larger ones member by member
+        self.max_item_bytes = max_item_bytes
+        # Item members nobody asked for (saved example responses can be huge)
+        self.skip_keys = set(skip_keys)
+        self.header: Dict[str, Any] = {}
+        self._file: Optional[BinaryIO] = None
+        self._buf = b''
+        self._pos = 0
+        self._offset = 0
+        self._items_offset: Optional[int] = None
+        self._header_done = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # Low-level buffer handling
+
+    def _open(self, offset: int = 0):
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+        self._file.seek(offset)
+        self._buf = b''
+        self._pos = 0
+        self._offset = offset
+
+    def _fill(self, keep_from: int) -> int:
+        """Read more data, dropping buffered bytes before keep_from
+
+        Returns how far buffer indexes moved, or -1 at end of file.
+        """
+        chunk = self._file.read(max(self.chunk_size, len(self._buf) - keep_from))
+        if not chunk:
+            return -1
+        self._buf = self._buf[keep_from:] + chunk
+        self._offset += keep_from
+        self._pos -= keep_from
+        return keep_from
+
+    def _peek(self) -> bytes:
+        """Skip whitespace and return the next byte (b'' at end of file)"""
+        while True:
+            self._pos = _WS_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos:self._pos + 1]
+            if self._fill(self._pos) < 0:
+                return b''
+
+    def _expect(self, char: bytes):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char.decode()!r} at byte {self._offset + self._pos}, "
+                             f"found {found.decode(errors='replace')!r}")
+        self._pos += 1
+
+    def _value_end(self, keep: bool = True, limit: Optional[int] = None) -> int:
+        """Find the end of the value at the current position
+
+        Returns a buffer index just past the value. With keep=False the value
+        is skipped and its bytes are released as they are scanned. With a limit,
+        returns -1 once the value is known to be longer than limit bytes.
+        """
+        self._peek()
+        start = self._pos
+        first = self._buf[start:start + 1]
+
+        if first not in (b'{', b'[', b'"'):
+            while True:
+                match = _SCALAR_RE.match(self._buf, start)
+                if match is None:
+                    raise ValueError(f"Unexpected data at byte {self._offset + start}")
+                if match.end() < len(self._buf):
+                    return match.end()
+                shift = self._fill(start)
+                if shift < 0:
+                    return match.end()
+                start -= shift
+
+        if first == b'"':
+            while True:
+                string = _STRING_RE.match(self._buf, start)
+                if string is not None:
+                    return string.end()
+                if limit is not None and len(self._buf) - start > limit:
+                    return -1
+                shift = self._fill(start)
+                if shift < 0:
+                    raise ValueError('Unexpected end of collection file')
+                start -= shift
+
+        depth = 0
+        i = start
+        while True:
+            # Jump over plain data and complete strings to the next bracket
+            match = _SCAN_RE.match(self._buf, i)
+            char = match.group(1)
+            if char and char != b'"':
+                i = match.end()
+                depth += 1 if char in b'{[' else -1
+                if depth == 0:
+                    return i
+                continue
+
+            # End of buffer, or a string that runs past it: read more
+            i = match.start(1)
+            if limit is not None and len(self._buf) - start > limit:
+                return -1
+            shift = self._fill(start if keep else i)
+            if shift < 0:
+                raise ValueError('Unexpected end of collection file')
+            start -= shift
+            i -= shift
+
+    def _read_value(self) -> Any:
+        end = self._value_end()
+        value = json.loads(self._buf[self._pos:end])
+        self._pos = end
+        return value
+
+    def _skip_value(self):
+        self._pos = self._value_end(keep=False)
+
+    def _read_members(self, obj: Dict[str, Any], stop_at: Optional[str] = None,
+                      skip: Iterable[str] = ()) -> bool:
+        """Read object members into obj until '}' (or until the stop_at list starts)
+
+        Returns True when stopped at the start of the stop_at list.
+        """
+        while True:
+            char = self._peek()
+            if char == b'}':
+                self._pos += 1
+                return False
+            if char == b',':
+                self._pos += 1
+                continue
+            key = self._read_value()
+            self._expect(b':')
+            if key == stop_at and self._peek() == b'[':
+                self._pos += 1
+                return True
+            if key in skip:
+                self._skip_value()
+            else:
+                obj[key] = self._read_value()
+
+    # Public interface
+
+    def read_header(self, required: Iterable[str] = ('info',)) -> Dict[str, Any]:
+        """Read the collection's top-level members other than "item"
+
+        Reading stops at the "item" list unless some required member has not
+        been seen yet; then the list is skipped to reach the members after it.
+        """
+        if self._header_done:
+            return self.header
+        required = set(required)
+        self._open()
+        if self._peek() == b'\xef':
+            # UTF-8 byte order mark
+            self._pos += 3
+        self._expect(b'{')
+        while True:
+            found_items = self._read_members(self.header, stop_at='item')
+            if not found_items:
+                break
+            self._items_offset = self._offset + self._pos - 1
+            if required <= self.header.keys():
+                break
+            self._pos -= 1
+            self._skip_value()
+        self._header_done = True
+        return self.header
+
+    def events(self) -> Iterator[Event]:
+        """Yield folder/request events for the collection's items"""
+        self.read_header()
+        if self._items_offset is None:
+            return
+        self._open(self._items_offset)
+        self._expect(b'[')
+
+        # Folders that are being streamed member by member
+        stack: List[Dict[str, Any]] = []
+        while True:
+            char = self._peek()
+            if char == b',':
+                self._pos += 1
+                continue
+            if char == b']':
+                self._pos += 1
+                if not stack:
+                    return
+                folder = stack.pop()
+                self._read_members(folder, skip=self.skip_keys)
+                yield ('end', folder)
+                continue
+
+            end = self._value_end(limit=self.max_item_bytes)
+            if end >= 0:
+                # Small enough to decode at once, unless nested too deeply
+                # for the json module
+                try:
+                    item = json.loads(self._buf[self._pos:end])
+                except RecursionError:
+                    item = None
+                if item is not None:
+                    self._pos = end
+                    yield from iter_items([item])
+                    continue
+
+            self._expect(b'{')
+            item: Dict[str, Any] = {}
+            if self._read_members(item, stop_at='item', skip=self.skip_keys):
+                yield ('folder', item)
+                stack.append(item)
+            else:
+                yield ('request', item)
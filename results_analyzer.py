@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+JMeter results analyzer
+Streams a JMeter CSV results file (as written by run_jmeter) in chunks and
+computes per-label and overall throughput, error rate and latency percentiles.
+Percentiles come from log-linear histograms of bounded size, so memory use does
+not grow with the number of samples and the histograms of several files (or
+several engines) can simply be merged.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import sys
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+# Column order JMeter uses when a file has no header line
+DEFAULT_FIELDS = ['timeStamp', 'elapsed', 'label', 'responseCode', 'responseMessage', 'threadName',
+                  'dataType', 'success', 'failureMessage', 'bytes', 'sentBytes', 'grpThreads',
+                  'allThreads', 'URL', 'Latency', 'IdleTime', 'Connect']
+
+# Timing columns kept as histograms: summary name -> CSV column
+TIMINGS = {'elapsed': 'elapsed', 'latency': 'Latency', 'connect': 'Connect', 'idle': 'IdleTime'}
+
+# Distinct error kinds kept per label; the rest are counted as "other"
+MAX_ERROR_KINDS = 50
+
+# Histogram resolution: values below 2 * _SUB are exact, larger ones fall in
+# buckets 1/_SUB of their magnitude wide (under 1% relative error)
+_SUB_BITS = 6
+_SUB = 1 << _SUB_BITS
+
+
+def _bucket(value: int) -> int:
+    if value < 2 * _SUB:
+        return value if value > 0 else 0
+    shift = value.bit_length() - _SUB_BITS - 1
+    return shift * _SUB + (value >> shift)
+
+
+def _bucket_value(index: int) -> float:
+    """Representative (middle) value of a bucket"""
+    if index < 2 * _SUB:
+        return float(index)
+    shift = index // _SUB - 1
+    low = (index - shift * _SUB) << shift
+    return low + ((1 << shift) - 1) / 2
+
+
+def _percentile_key(p: float) -> str:
+    return f'p{p:g}'
+
+
+class LatencyHistogram:
+    """Mergeable log-linear histogram of millisecond timings"""
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def record(self, value: int, count: int = 1):
+        index = _bucket(value)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def record_many(self, values: Iterable[int]):
+        """Record a batch of values (timings repeat a lot, so count them first)"""
+        counts = Counter(values)
+        if not counts:
+            return
+        buckets = self.buckets
+        for value, count in counts.items():
+            index = _bucket(value)
+            buckets[index] = buckets.get(index, 0) + count
+            self.total += value * count
+        self.count += sum(counts.values())
+        low, high = min(counts), max(counts)
+        if self.min is None or low < self.min:
+            self.min = low
+        if self.max is None or high > self.max:
+            self.max = high
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Value below which p percent of the recorded values fall"""
+        if not self.count:
+            return None
+        return self.value_at_rank(-(-self.count * p // 100))
+
+    def value_at_rank(self, rank: int) -> Optional[float]:
+        """The rank-th smallest recorded value (1-based, clamped to the recorded range)"""
+        if not self.count:
+            return None
+        rank = min(max(1, rank), self.count)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(_bucket_value(index), self.min), self.max)
+        return float(self.max)
+
+    def summary(self, percentiles=PERCENTILES) -> Dict[str, Optional[float]]:
+        result = {'mean': self.mean, 'min': self.min, 'max': self.max}
+        for p in percentiles:
+            result[_percentile_key(p)] = self.percentile(p)
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'buckets': self.buckets, 'count': self.count, 'total': self.total,
+                'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LatencyHistogram':
+        histogram = cls()
+        histogram.buckets = {int(index): count for index, count in data['buckets'].items()}
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.min = data['min']
+        histogram.max = data['max']
+        return histogram
+
+
+class LabelStats:
+    """Aggregates for one sampler label (or for all of them)"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.samples = 0
+        self.errors = 0
+        self.bytes = 0
+        self.sent_bytes = 0
+        self.first_timestamp: Optional[int] = None
+        self.last_timestamp: Optional[int] = None
+        self.timings = {name: LatencyHistogram() for name in TIMINGS}
+        self.response_codes: Counter = Counter()
+        self.error_kinds: Counter = Counter()
+
+    def add_error(self, code: str, message: str, count: int = 1):
+        message = message.strip().split('\n', 1)[0][:200]
+        key = f'{code}: {message}' if message else code
+        if key not in self.error_kinds and len(self.error_kinds) >= MAX_ERROR_KINDS:
+            key = 'other'
+        self.error_kinds[key] += count
+
+    def add_span(self, first: int, last: int):
+        if self.first_timestamp is None or first < self.first_timestamp:
+            self.first_timestamp = first
+        if self.last_timestamp is None or last > self.last_timestamp:
+            self.last_timestamp = last
+
+    def merge(self, other: 'LabelStats'):
+        self.samples += other.samples
+        self.errors += other.errors
+        self.bytes += other.bytes
+        self.sent_bytes += other.sent_bytes
+        if other.first_timestamp is not None:
+            self.add_span(other.first_timestamp, other.last_timestamp)
+        for name, histogram in other.timings.items():
+            self.timings[name].merge(histogram)
+        self.response_codes.update(other.response_codes)
+        for key, count in other.error_kinds.items():
+            if key not in self.error_kinds and len(self.error_kinds) >= MAX_ERROR_KINDS:
+                key = 'other'
+            self.error_kinds[key] += count
+
+    @property
+    def duration(self) -> float:
+        """Seconds between the first sample's start and the last sample's end"""
+        if self.first_timestamp is None:
+            return 0.0
+        return max(self.last_timestamp - self.first_timestamp, 1) / 1000
+
+    def summary(self, percentiles=PERCENTILES) -> Dict[str, Any]:
+        duration = self.duration
+        return {
+            'label': self.label,
+            'samples': self.samples,
+            'errors': self.errors,
+            'error_rate': self.errors / self.samples if self.samples else 0.0,
+            'throughput': self.samples / duration if duration else 0.0,
+            'received_kb_per_sec': self.bytes / 1024 / duration if duration else 0.0,
+            'sent_kb_per_sec': self.sent_bytes / 1024 / duration if duration else 0.0,
+            'start': self.first_timestamp,
+            'end': self.last_timestamp,
+            **{name: histogram.summary(percentiles) for name, histogram in self.timings.items()},
+            'response_codes': dict(self.response_codes.most_common()),
+            'error_kinds': dict(self.error_kinds.most_common()),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'label': self.label, 'samples': self.samples, 'errors': self.errors,
+            'bytes': self.bytes, 'sent_bytes': self.sent_bytes,
+            'first_timestamp': self.first_timestamp, 'last_timestamp': self.last_timestamp,
+            'timings': {name: histogram.to_dict() for name, histogram in self.timings.items()},
+            'response_codes': dict(self.response_codes), 'error_kinds': dict(self.error_kinds),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LabelStats':
+        stats = cls(data['label'])
+        stats.samples = data['samples']
+        stats.errors = data['errors']
+        stats.bytes = data['bytes']
+        stats.sent_bytes = data['sent_bytes']
+        stats.first_timestamp = data['first_timestamp']
+        stats.last_timestamp = data['last_timestamp']
+        stats.timings = {name: LatencyHistogram.from_dict(histogram)
+                         for name, histogram in data['timings'].items()}
+        stats.response_codes = Counter(data['response_codes'])
+        stats.error_kinds = Counter(data['error_kinds'])
+        return stats
+
+
+class ResultsAnalyzer:
+    """Streaming per-label statistics over JMeter CSV results"""
+
+    def __init__(self, chunk_size: int = 50000):
+        self.chunk_size = chunk_size
+        self.labels: Dict[str, LabelStats] = {}
+        self.skipped = 0
+        self.fields: Optional[List[str]] = None
+
+    def read_chunks(self, stream: TextIO) -> Iterator[List[List[str]]]:
+        """Yield lists of CSV rows, taking the column layout from the header"""
+        reader = csv.reader(stream)
+        first = next(reader, None)
+        if first is None:
+            return
+        if 'elapsed' in first and 'label' in first:
+            self.fields = first
+        else:
+            self.fields = DEFAULT_FIELDS
+            yield [first]
+        while True:
+            chunk = list(itertools.islice(reader, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def add_rows(self, rows: List[List[str]]):
+        """Aggregate a chunk of rows, column by column for each label"""
+        fields = self.fields or DEFAULT_FIELDS
+        width = len(fields)
+        column = {name: i for i, name in enumerate(fields)}
+        label_at = column['label']
+
+        groups: Dict[str, List[List[str]]] = {}
+        for row in rows:
+            if len(row) != width:
+                self.skipped += 1
+                continue
+            label = row[label_at]
+            group = groups.get(label)
+            if group is None:
+                groups[label] = [row]
+            else:
+                group.append(row)
+
+        for label, group in groups.items():
+            try:
+                self._add_group(label, group, column)
+            except ValueError:
+                # A malformed value somewhere in the group: add the rows one by one
+                for row in group:
+                    try:
+                        self._add_group(label, [row], column)
+                    except ValueError:
+                        self.skipped += 1
+
+    def _add_group(self, label: str, rows: List[List[str]], column: Dict[str, int]):
+        columns = list(zip(*rows))
+        timestamps = list(map(int, columns[column['timeStamp']]))
+        elapsed = list(map(int, columns[column['elapsed']]))
+        timings = {'elapsed': elapsed}
+        for name, field in TIMINGS.items():
+            if name != 'elapsed' and field in column:
+                timings[name] = list(map(int, columns[column[field]]))
+        received = sum(map(int, columns[column['bytes']])) if 'bytes' in column else 0
+        sent = sum(map(int, columns[column['sentBytes']])) if 'sentBytes' in column else 0
+
+        stats = self.labels.get(label)
+        if stats is None:
+            stats = self.labels[label] = LabelStats(label)
+        stats.samples += len(rows)
+        stats.bytes += received
+        stats.sent_bytes += sent
+        stats.add_span(min(timestamps), max(map(int.__add__, timestamps, elapsed)))
+        for name, values in timings.items():
+            stats.timings[name].record_many(values)
+
+        codes = columns[column['responseCode']] if 'responseCode' in column else ('',) * len(rows)
+        stats.response_codes.update(codes)
+        success = columns[column['success']]
+        if 'false' in success:
+            messages = columns[column['failureMessage']] if 'failureMessage' in column else ('',) * len(rows)
+            for ok, code, message in zip(success, codes, messages):
+                if ok != 'true':
+                    stats.errors += 1
+                    stats.add_error(code, message)
+
+    def analyze(self, path: str) -> 'ResultsAnalyzer':
+        """Aggregate every sample in a results file"""
+        with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            for chunk in self.read_chunks(f):
+                self.add_rows(chunk)
+        return self
+
+    def merge(self, other: 'ResultsAnalyzer'):
+        """Fold another analyzer's aggregates into this one"""
+        for label, stats in other.labels.items():
+            if label in self.labels:
+                self.labels[label].merge(stats)
+            else:
+                merged = self.labels[label] = LabelStats(label)
+                merged.merge(stats)
+        self.skipped += other.skipped
+
+    def overall(self) -> LabelStats:
+        total = LabelStats('TOTAL')
+        for stats in self.labels.values():
+            total.merge(stats)
+        return total
+
+    def summary(self, percentiles=PERCENTILES) -> Dict[str, Any]:
+        """Per-label and overall aggregates as plain data"""
+        return {
+            'labels': [stats.summary(percentiles) for stats in self.labels.values()],
+            'total': self.overall().summary(percentiles),
+            'skipped_rows': self.skipped,
+        }
+
+
+class ResultsPager:
+    """Random access to the raw rows of a results file, page by page
+
+    A sparse index of byte offsets (one per page) is built on first use, so
+    any range of rows can be read without scanning the file from the start.
+    Quoted fields may span lines; a line only ends a row when the quotes
+    seen so far are balanced.
+    """
+
+    def __init__(self, path: str, page_size: int = 500):
+        self.path = path
+        self.page_size = page_size
+        self.header: Optional[str] = None
+        self.rows = 0
+        self._offsets: Optional[List[int]] = None
+
+    def _records(self, f) -> Iterator[bytes]:
+        record = b''
+        quotes = 0
+        for line in f:
+            record += line
+            quotes += line.count(b'"')
+            if quotes % 2 == 0:
+                yield record
+                record = b''
+                quotes = 0
+        if record:
+            yield record
+
+    def _build_index(self):
+        offsets: List[int] = []
+        rows = 0
+        with open(self.path, 'rb') as f:
+            position = 0
+            for record in self._records(f):
+                if position == 0:
+                    text = record.decode('utf-8', errors='replace')
+                    if 'elapsed' in text and 'label' in text:
+                        self.header = text.rstrip('\r\n')
+                        position = len(record)
+                        continue
+                if rows % self.page_size == 0:
+                    offsets.append(position)
+                rows += 1
+                position += len(record)
+        self._offsets = offsets
+        self.rows = rows
+
+    @property
+    def pages(self) -> int:
+        if self._offsets is None:
+            self._build_index()
+        return len(self._offsets)
+
+    def read(self, start: int, count: int) -> List[str]:
+        """Raw CSV text of rows start .. start + count - 1"""
+        if self._offsets is None:
+            self._build_index()
+        if start < 0 or start >= self.rows or count <= 0:
+            return []
+        page, skip = divmod(start, self.page_size)
+        rows: List[str] = []
+        with open(self.path, 'rb') as f:
+            f.seek(self._offsets[page])
+            for record in itertools.islice(self._records(f), skip, skip + count):
+                rows.append(record.decode('utf-8', errors='replace').rstrip('\r\n'))
+        return rows
+
+    def page(self, number: int) -> str:
+        """One page of rows as CSV text, with the header line if the file has one"""
+        rows = self.read(number * self.page_size, self.page_size)
+        return '\n'.join(([self.header] if self.header else []) + rows)
+
+
+def _ms(value: Optional[float]) -> str:
+    return '-' if value is None else f'{value:.0f}'
+
+
+def _short(label: str, width: int = 60) -> str:
+    return label if len(label) <= width else label[:width - 1] + '…'
+
+
+def format_summary(summary: Dict[str, Any], percentiles=PERCENTILES, max_errors: int = 10) -> str:
+    """Render a summary as plain-text tables"""
+    rows = summary['labels'] + [summary['total']]
+    width = max([len(_short(row['label'])) for row in rows] + [5])
+    keys = [_percentile_key(p) for p in percentiles]
+
+    lines = [f"{'Label':<{width}}  {'Samples':>8}  {'Err%':>6}  {'Req/s':>8}  {'Mean':>6}  "
+             + '  '.join(f'{key:>6}' for key in keys) + f"  {'Max':>6}"]
+    for row in rows:
+        elapsed = row['elapsed']
+        lines.append(
+            f"{_short(row['label']):<{width}}  {row['samples']:>8}  {row['error_rate'] * 100:>6.2f}  "
+            f"{row['throughput']:>8.2f}  {_ms(elapsed['mean']):>6}  "
+            + '  '.join(f'{_ms(elapsed[key]):>6}' for key in keys) + f"  {_ms(elapsed['max']):>6}"
+        )
+
+    lines.append('')
+    lines.append(f"{'Label':<{width}}  {'Connect p50/p95':>16}  {'Latency p50/p95':>16}  "
+                 f"{'Idle mean':>9}  {'KB/s recv':>9}  {'KB/s sent':>9}")
+    for row in rows:
+        connect, latency = row['connect'], row['latency']
+        lines.append(
+            f"{_short(row['label']):<{width}}  {_ms(connect['p50']) + '/' + _ms(connect['p95']):>16}  "
+            f"{_ms(latency['p50']) + '/' + _ms(latency['p95']):>16}  {_ms(row['idle']['mean']):>9}  "
+            f"{row['received_kb_per_sec']:>9.2f}  {row['sent_kb_per_sec']:>9.2f}"
+        )
+
+    errors = [(count, row['label'], kind) for row in summary['labels']
+              for kind, count in row['error_kinds'].items()]
+    if errors:
+        lines.append('')
+        lines.append('Top errors:')
+        for count, label, kind in sorted(errors, key=lambda e: -e[0])[:max_errors]:
+            lines.append(f'  {count:>8}  {_short(label)}: {kind}')
+    if summary['skipped_rows']:
+        lines.append('')
+        lines.append(f"⚠ Skipped {summary['skipped_rows']} malformed rows")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Summarize JMeter CSV results: throughput, error rate and latency percentiles per label',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python results_analyzer.py data/output/results.csv
+  python results_analyzer.py engine1.csv engine2.csv --json -o summary.json
+        '''
+    )
+    parser.add_argument('results', nargs='+', help='JMeter CSV results file(s); several files are merged')
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    parser.add_argument('-o', '--output', help='Also write the JSON summary to this file')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Rows parsed per chunk (default: 50000)')
+
+    args = parser.parse_args()
+
+    analyzer = ResultsAnalyzer(chunk_size=args.chunk_size)
+    for path in args.results:
+        try:
+            analyzer.analyze(path)
+        except FileNotFoundError:
+            print(f"Error: File '{path}' not found")
+            sys.exit(1)
+
+    summary = analyzer.summary()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_summary(summary))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Run history and regression detection
+Keeps the aggregates of every load test run in a small SQLite file: per-label
+counts and latency histograms (see results_analyzer.py), tagged with a hash of
+the plan, the git revision and the load profile. Two runs can then be compared
+at any time without reading their CSV files again.
+
+A change is flagged only when it is both statistically significant and larger
+than min_change:
+- p95/p99: distribution-free confidence intervals of the percentile, from the
+  order statistics around its rank in each histogram; they must not overlap
+- error rate: two-proportion z-test
+- throughput: samples as Poisson counts over the run duration (rate z-test)
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import time
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Tuple
+
+from load_profiles import resolve_profile
+from results_analyzer import LabelStats, LatencyHistogram, ResultsAnalyzer
+
+DEFAULT_HISTORY = os.path.join('data', 'history', 'runs.db')
+
+# Percentiles compared by default
+COMPARED_PERCENTILES = (95, 99)
+# Confidence level of the tests and smallest relative change worth flagging
+CONFIDENCE = 0.95
+MIN_CHANGE = 0.05
+# Fewer samples than this (per label and run) are not compared
+MIN_SAMPLES = 30
+
+# Thread group settings of a JMX plan recorded as its load profile
+_JMX_PROFILE_RE = re.compile(
+    r'<stringProp name="(ThreadGroup\.num_threads|ThreadGroup\.ramp_time|ThreadGroup\.duration|'
+    r'LoopController\.loops)">([^<]*)</stringProp>')
+_JMX_PROFILE_NAMES = {'ThreadGroup.num_threads': 'threads', 'ThreadGroup.ramp_time': 'ramp_up',
+                      'ThreadGroup.duration': 'duration', 'LoopController.loops': 'loops'}
+
+
+def plan_hash(path: str) -> str:
+    """Hash of a plan file (JMX or collection) as written"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def git_revision(cwd: Optional[str] = None) -> Optional[str]:
+    """Current commit (with '-dirty' for uncommitted changes), or None outside a git checkout"""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short=12', 'HEAD'], cwd=cwd,
+                                  capture_output=True, text=True, timeout=10)
+        if revision.returncode != 0:
+            return None
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=cwd,
+                               capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return revision.stdout.strip() + ('-dirty' if dirty.stdout.strip() else '')
+
+
+def jmx_profile(path: str) -> Dict[str, Any]:
+    """Thread group settings of a JMX plan (the first thread group)"""
+    profile: Dict[str, Any] = {}
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for match in _JMX_PROFILE_RE.finditer(f.read()):
+            name = _JMX_PROFILE_NAMES[match.group(1)]
+            if name not in profile and match.group(2):
+                value = match.group(2)
+                profile[name] = int(value) if value.lstrip('-').isdigit() else value
+    return profile
+
+
+class RunHistory:
+    """SQLite store of per-run, per-label aggregates"""
+
+    def __init__(self, path: str = DEFAULT_HISTORY):
+        self.path = path
+
+        history_dir = os.path.dirname(path)
+        if history_dir and not os.path.exists(history_dir):
+            os.makedirs(history_dir, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=60)
+        with self.db:
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS runs ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL, name TEXT, '
+                'results_path TEXT, plan_path TEXT, plan_hash TEXT, git_rev TEXT, profile TEXT, '
+                'samples INTEGER NOT NULL, tags TEXT)'
+            )
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS labels ('
+                'run_id INTEGER NOT NULL, label TEXT NOT NULL, '
+                'stats TEXT NOT NULL, PRIMARY KEY (run_id, label))'
+            )
+            self.db.execute('CREATE TABLE IF NOT EXISTS baselines (name TEXT PRIMARY KEY, run_id INTEGER NOT NULL)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, analyzer: ResultsAnalyzer, results_path: Optional[str] = None,
+               plan_path: Optional[str] = None, profile: Optional[Dict[str, Any]] = None,
+               name: Optional[str] = None, tags: Optional[Dict[str, Any]] = None,
+               git_rev: Optional[str] = None) -> int:
+        """Store the aggregates of an analyzed run; returns the new run id"""
+        digest = None
+        if plan_path and os.path.exists(plan_path):
+            digest = plan_hash(plan_path)
+            if profile is None and plan_path.endswith('.jmx'):
+                profile = jmx_profile(plan_path)
+        samples = sum(stats.samples for stats in analyzer.labels.values())
+        with self.db:
+            cursor = self.db.execute(
+                'INSERT INTO runs (created, name, results_path, plan_path, plan_hash, git_rev, profile, samples, tags) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (time.time(), name, results_path and os.path.abspath(results_path),
+                 plan_path and os.path.abspath(plan_path), digest, git_rev if git_rev is not None else git_revision(),
+                 json.dumps(profile) if profile is not None else None, samples,
+                 json.dumps(tags) if tags else None))
+            run_id = cursor.lastrowid
+            self.db.executemany('INSERT INTO labels (run_id, label, stats) VALUES (?, ?, ?)',
+                                [(run_id, label, json.dumps(stats.to_dict(), separators=(',', ':')))
+                                 for label, stats in analyzer.labels.items()])
+        return run_id
+
+    def runs(self, limit: Optional[int] = None, plan: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recorded runs, newest first; plan narrows them to one plan hash (or a prefix of it)"""
+        query = 'SELECT id, created, name, results_path, plan_path, plan_hash, git_rev, profile, samples, tags FROM runs'
+        params: List[Any] = []
+        if plan:
+            query += ' WHERE plan_hash LIKE ?'
+            params.append(plan + '%')
+        query += ' ORDER BY id DESC'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        baselines: Dict[int, List[str]] = {}
+        for name, run_id in self.db.execute('SELECT name, run_id FROM baselines ORDER BY name'):
+            baselines.setdefault(run_id, []).append(name)
+        return [self._run(row, baselines.get(row[0], [])) for row in self.db.execute(query, params)]
+
+    @staticmethod
+    def _run(row: tuple, baselines: List[str]) -> Dict[str, Any]:
+        run_id, created, name, results_path, plan_path, digest, git_rev, profile, samples, tags = row
+        return {'id': run_id, 'created': created, 'name': name, 'results_path': results_path,
+                'plan_path': plan_path, 'plan_hash': digest, 'git_rev': git_rev,
+                'profile': json.loads(profile) if profile else None, 'samples': samples,
+                'tags': json.loads(tags) if tags else {}, 'baseline_for': baselines}
+
+    def run(self, run_id: int) -> Dict[str, Any]:
+        row = self.db.execute('SELECT id, created, name, results_path, plan_path, plan_hash, git_rev, profile, '
+                              'samples, tags FROM runs WHERE id = ?', (run_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown run #{run_id}")
+        baselines = [name for (name,) in self.db.execute('SELECT name FROM baselines WHERE run_id = ?', (run_id,))]
+        return self._run(row, baselines)
+
+    def label_stats(self, run_id: int) -> Dict[str, LabelStats]:
+        return {label: LabelStats.from_dict(json.loads(stats)) for label, stats in
+                self.db.execute('SELECT label, stats FROM labels WHERE run_id = ? ORDER BY rowid', (run_id,))}
+
+    def mark_baseline(self, run_id: int, name: str = 'default'):
+        """Remember a run as the named baseline"""
+        self.run(run_id)
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO baselines (name, run_id) VALUES (?, ?)', (name, run_id))
+
+    def resolve(self, reference: Any, candidate: Optional[int] = None) -> int:
+        """Run id for a reference: an id, 'latest', 'previous' (the run before the
+        candidate with the same plan, else any earlier run) or a baseline name"""
+        if isinstance(reference, int) or (isinstance(reference, str) and reference.lstrip('#').isdigit()):
+            run_id = int(str(reference).lstrip('#'))
+            self.run(run_id)
+            return run_id
+        if reference == 'latest':
+            row = self.db.execute('SELECT MAX(id) FROM runs').fetchone()
+        elif reference == 'previous':
+            if candidate is None:
+                candidate = self.resolve('latest')
+            digest = self.run(candidate)['plan_hash']
+            row = self.db.execute('SELECT MAX(id) FROM runs WHERE id < ? AND plan_hash IS ?',
+                                  (candidate, digest)).fetchone()
+            if row[0] is None:
+                row = self.db.execute('SELECT MAX(id) FROM runs WHERE id < ?', (candidate,)).fetchone()
+        else:
+            row = self.db.execute('SELECT run_id FROM baselines WHERE name = ?', (reference,)).fetchone()
+            if row is None:
+                raise ValueError(f"Unknown run or baseline '{reference}'")
+        if row is None or row[0] is None:
+            raise ValueError(f"No run matches '{reference}'")
+        return row[0]
+
+    def compare(self, baseline: Any = None, candidate: Any = 'latest', **options) -> Dict[str, Any]:
+        """Compare two recorded runs; the baseline defaults to the 'default' mark, else the previous run"""
+        candidate_id = self.resolve(candidate)
+        if baseline is None:
+            has_default = self.db.execute("SELECT 1 FROM baselines WHERE name = 'default'").fetchone()
+            baseline = 'default' if has_default else 'previous'
+        baseline_id = self.resolve(baseline, candidate_id)
+        result = compare_stats(self.label_stats(baseline_id), self.label_stats(candidate_id), **options)
+        result['baseline'] = self.run(baseline_id)
+        result['candidate'] = self.run(candidate_id)
+        result['same_plan'] = result['baseline']['plan_hash'] == result['candidate']['plan_hash']
+        return result
+
+    def close(self):
+        if self.db is None:
+            return
+        self.db.close()
+        self.db = None
+
+
+def _percentile_interval(histogram: LatencyHistogram, p: float, z: float) -> Tuple[float, float, float]:
+    """(low, estimate, high) of a percentile from the order statistics around its rank"""
+    n = histogram.count
+    q = p / 100
+    spread = z * math.sqrt(n * q * (1 - q))
+    low = histogram.value_at_rank(math.floor(n * q - spread))
+    high = histogram.value_at_rank(math.ceil(n * q + spread) + 1)
+    return low, histogram.percentile(p), high
+
+
+def _relative(before: float, after: float) -> Optional[float]:
+    return (after - before) / before if before else None
+
+
+def _verdict(significant: bool, worse: bool) -> str:
+    if not significant:
+        return 'unchanged'
+    return 'regression' if worse else 'improvement'
+
+
+def compare_label(baseline: LabelStats, candidate: LabelStats, percentiles=COMPARED_PERCENTILES,
+                  confidence: float = CONFIDENCE, min_change: float = MIN_CHANGE,
+                  min_samples: int = MIN_SAMPLES) -> List[Dict[str, Any]]:
+    """Metric-by-metric comparison of one label in two runs"""
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    alpha = 1 - confidence
+    enough = baseline.samples >= min_samples and candidate.samples >= min_samples
+    metrics: List[Dict[str, Any]] = []
+
+    before_h, after_h = baseline.timings['elapsed'], candidate.timings['elapsed']
+    for p in percentiles:
+        metric = {'metric': f'p{p:g}', 'baseline': before_h.percentile(p), 'candidate': after_h.percentile(p)}
+        if not enough or not before_h.count or not after_h.count:
+            metric['verdict'] = 'insufficient data'
+        else:
+            before_low, before, before_high = _percentile_interval(before_h, p, z)
+            after_low, after, after_high = _percentile_interval(after_h, p, z)
+            change = _relative(before, after)
+            metric['change'] = change
+            metric['baseline_interval'] = [before_low, before_high]
+            metric['candidate_interval'] = [after_low, after_high]
+            apart = after_low > before_high or after_high < before_low
+            large = change is None or abs(change) >= min_change
+            metric['verdict'] = _verdict(apart and large and after != before, after > before)
+        metrics.append(metric)
+
+    before_rate = baseline.errors / baseline.samples if baseline.samples else 0.0
+    after_rate = candidate.errors / candidate.samples if candidate.samples else 0.0
+    metric = {'metric': 'error_rate', 'baseline': before_rate, 'candidate': after_rate,
+              'change': after_rate - before_rate}
+    if not enough:
+        metric['verdict'] = 'insufficient data'
+    else:
+        pooled = (baseline.errors + candidate.errors) / (baseline.samples + candidate.samples)
+        deviation = math.sqrt(pooled * (1 - pooled) * (1 / baseline.samples + 1 / candidate.samples))
+        p_value = 2 * (1 - NormalDist().cdf(abs(after_rate - before_rate) / deviation)) if deviation else 1.0
+        metric['p_value'] = p_value
+        metric['verdict'] = _verdict(p_value < alpha, after_rate > before_rate)
+    metrics.append(metric)
+
+    before_duration, after_duration = baseline.duration, candidate.duration
+    before_tp = baseline.samples / before_duration if before_duration else 0.0
+    after_tp = candidate.samples / after_duration if after_duration else 0.0
+    metric = {'metric': 'throughput', 'baseline': before_tp, 'candidate': after_tp,
+              'change': _relative(before_tp, after_tp)}
+    if not enough or not before_duration or not after_duration:
+        metric['verdict'] = 'insufficient data'
+    else:
+        deviation = math.sqrt(baseline.samples / before_duration ** 2 + candidate.samples / after_duration ** 2)
+        p_value = 2 * (1 - NormalDist().cdf(abs(after_tp - before_tp) / deviation)) if deviation else 1.0
+        metric['p_value'] = p_value
+        large = metric['change'] is None or abs(metric['change']) >= min_change
+        metric['verdict'] = _verdict(p_value < alpha and large, after_tp < before_tp)
+    metrics.append(metric)
+    return metrics
+
+
+def compare_stats(baseline: Dict[str, LabelStats], candidate: Dict[str, LabelStats], **options) -> Dict[str, Any]:
+    """Compare the labels two runs share, plus their totals"""
+    labels = []
+    for label, stats in candidate.items():
+        if label in baseline:
+            labels.append({'label': label, 'metrics': compare_label(baseline[label], stats, **options)})
+
+    totals = []
+    for side in (baseline, candidate):
+        total = LabelStats('TOTAL')
+        for stats in side.values():
+            total.merge(stats)
+        totals.append(total)
+    labels.append({'label': 'TOTAL', 'metrics': compare_label(totals[0], totals[1], **options)})
+
+    verdicts = [metric['verdict'] for row in labels for metric in row['metrics']]
+    return {
+        'labels': labels,
+        'only_in_baseline': [label for label in baseline if label not in candidate],
+        'only_in_candidate': [label for label in candidate if label not in baseline],
+        'regressions': verdicts.count('regression'),
+        'improvements': verdicts.count('improvement'),
+    }
+
+
+def _describe_run(run: Dict[str, Any]) -> str:
+    created = time.strftime('%Y-%m-%d %H:%M', time.localtime(run['created']))
+    parts = [f"#{run['id']}", created]
+    if run['name']:
+        parts.append(run['name'])
+    parts.append(f"git {run['git_rev'] or '-'}")
+    parts.append(f"plan {(run['plan_hash'] or '-')[:8]}")
+    parts.append(f"{run['samples']} samples")
+    return ', '.join(parts)
+
+
+def _value(metric: str, value: Optional[float]) -> str:
+    if value is None:
+        return '-'
+    if metric == 'error_rate':
+        return f'{value * 100:.2f}%'
+    if metric == 'throughput':
+        return f'{value:.2f}/s'
+    return f'{value:.0f}ms'
+
+
+def _change(metric: Dict[str, Any]) -> str:
+    change = metric.get('change')
+    if change is None:
+        return '-'
+    if metric['metric'] == 'error_rate':
+        return f'{change * 100:+.2f}pt'
+    return f'{change * 100:+.1f}%'
+
+
+def format_comparison(result: Dict[str, Any], show_all: bool = False) -> str:
+    """Plain-text comparison; only flagged metrics unless show_all"""
+    lines = [f"Baseline:  {_describe_run(result['baseline'])}",
+             f"Candidate: {_describe_run(result['candidate'])}"]
+    if not result['same_plan']:
+        lines.append('⚠ The runs used different plans')
+    if result['baseline']['profile'] != result['candidate']['profile']:
+        lines.append(f"⚠ Load profiles differ: {result['baseline']['profile']} -> {result['candidate']['profile']}")
+
+    rows = [(row['label'], metric) for row in result['labels'] for metric in row['metrics']
+            if show_all or metric['verdict'] in ('regression', 'improvement')]
+    if rows:
+        width = max(len(label) for label, _ in rows)
+        width = min(max(width, 5), 60)
+        lines.append('')
+        lines.append(f"{'Label':<{width}}  {'Metric':<10}  {'Baseline':>10}  {'Candidate':>10}  {'Change':>9}  Verdict")
+        for label, metric in rows:
+            label = label if len(label) <= width else label[:width - 1] + '…'
+            lines.append(f"{label:<{width}}  {metric['metric']:<10}  {_value(metric['metric'], metric['baseline']):>10}  "
+                         f"{_value(metric['metric'], metric['candidate']):>10}  {_change(metric):>9}  {metric['verdict']}")
+    for key, text in (('only_in_baseline', 'Only in baseline'), ('only_in_candidate', 'Only in candidate')):
+        if result[key]:
+            lines.append(f"{text}: {', '.join(result[key])}")
+
+    lines.append('')
+    if result['regressions']:
+        lines.append(f"✗ {result['regressions']} significant regression(s), {result['improvements']} improvement(s)")
+    elif result['improvements']:
+        lines.append(f"✓ No regressions, {result['improvements']} significant improvement(s)")
+    else:
+        lines.append('✓ No significant changes')
+    return '\n'.join(lines)
+
+
+def format_runs(runs: List[Dict[str, Any]]) -> str:
+    lines = []
+    for run in runs:
+        marks = f" [baseline: {', '.join(run['baseline_for'])}]" if run['baseline_for'] else ''
+        lines.append(_describe_run(run) + marks + (f" -> {run['results_path']}" if run['results_path'] else ''))
+    return '\n'.join(lines) or 'No runs recorded'
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Record load test runs and compare them against a baseline',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python run_history.py record data/output/results.csv --plan data/output/sample.jmx --name nightly
+  python run_history.py list
+  python run_history.py baseline 3
+  python run_history.py compare                      # latest run vs the baseline (or the previous run)
+  python run_history.py compare --baseline 3 --candidate 5 --all --fail-on-regression
+        '''
+    )
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help=f'History file (default: {DEFAULT_HISTORY})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='Analyze results file(s) and store them as one run')
+    record.add_argument('results', nargs='+', help='JMeter CSV results file(s); several files are merged')
+    record.add_argument('--plan', help='JMX plan or collection the run used (hashed; JMX thread group settings are kept)')
+    record.add_argument('--name', help='Name for the run')
+    record.add_argument('--profile', help='Load profile name (from --profile-file) the run used')
+    record.add_argument('--profile-file', help='JSON file of named load profiles')
+    record.add_argument('--tag', action='append', default=[], metavar='KEY=VALUE', help='Extra tag (repeatable)')
+    record.add_argument('--baseline', nargs='?', const='default', metavar='NAME',
+                        help='Also mark the run as a baseline (default name: default)')
+
+    listing = commands.add_parser('list', help='List recorded runs, newest first')
+    listing.add_argument('--limit', type=int, default=20, help='Runs to show (default: 20)')
+    listing.add_argument('--plan', help='Only runs of this plan hash (prefix)')
+    listing.add_argument('--json', action='store_true', help='Print the runs as JSON')
+
+    baseline = commands.add_parser('baseline', help='Mark a run as a named baseline')
+    baseline.add_argument('run', help="Run id, or 'latest'")
+    baseline.add_argument('--name', default='default', help='Baseline name (default: default)')
+
+    compare = commands.add_parser('compare', help='Flag significant changes between two runs')
+    compare.add_argument('--baseline', help="Run id, baseline name or 'previous' (default: the 'default' "
+                                            "baseline, else the previous run of the same plan)")
+    compare.add_argument('--candidate', default='latest', help="Run id or baseline name (default: latest)")
+    compare.add_argument('--confidence', type=float, default=CONFIDENCE,
+                         help=f'Confidence level of the tests (default: {CONFIDENCE})')
+    compare.add_argument('--min-change', type=float, default=MIN_CHANGE * 100,
+                         help=f'Smallest relative change in percent worth flagging (default: {MIN_CHANGE * 100:g})')
+    compare.add_argument('--min-samples', type=int, default=MIN_SAMPLES,
+                         help=f'Labels with fewer samples are not compared (default: {MIN_SAMPLES})')
+    compare.add_argument('--all', action='store_true', help='Show every metric, not just flagged ones')
+    compare.add_argument('--json', action='store_true', help='Print the comparison as JSON')
+    compare.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on any regression')
+
+    args = parser.parse_args()
+
+    with RunHistory(args.history) as history:
+        try:
+            if args.command == 'record':
+                analyzer = ResultsAnalyzer()
+                for path in args.results:
+                    if not os.path.exists(path):
+                        print(f"Error: File '{path}' not found")
+                        sys.exit(1)
+                    analyzer.analyze(path)
+                profile = None
+                if args.profile or args.profile_file:
+                    profile = resolve_profile(args.profile, args.profile_file).to_dict()
+                tags = dict(tag.split('=', 1) for tag in args.tag if '=' in tag)
+                run_id = history.record(analyzer, args.results[0], args.plan, profile, args.name, tags)
+                if args.baseline:
+                    history.mark_baseline(run_id, args.baseline)
+                print(f"✓ Recorded {_describe_run(history.run(run_id))}")
+            elif args.command == 'list':
+                runs = history.runs(args.limit, args.plan)
+                print(json.dumps(runs, indent=2) if args.json else format_runs(runs))
+            elif args.command == 'baseline':
+                run_id = history.resolve(args.run)
+                history.mark_baseline(run_id, args.name)
+                print(f"✓ Baseline '{args.name}' is run #{run_id}")
+            else:
+                result = history.compare(args.baseline, args.candidate, confidence=args.confidence,
+                                         min_change=args.min_change / 100, min_samples=args.min_samples)
+                print(json.dumps(result, indent=2) if args.json else format_comparison(result, args.all))
+                if args.fail_on_regression and result['regressions']:
+                    sys.exit(1)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,99 +1,497 @@
 import asyncio
+import hashlib
 import json
 import tempfile
 import os
-import subprocess
+from typing import Any, Dict, Optional
 from mcp.server.fastmcp import FastMCP
 from mcp import types
 from mcp.types import TextContent, CallToolResult
-from convert_postman_to_jmx import PostmanToJMeterConverter
+from convert_postman_to_jmx import CORRELATION_HEADER, PostmanToJMeterConverter
+from feeders import Feeder
+import tracing
+from html_report import CHART_POINTS, write_report
+from jmeter_jobs import FINISHED_STATES, Job, JobManager, docker_command, template_command
+from jmeter_shards import run_sharded
+from live_monitor import WINDOW, LiveMonitor, Thresholds, format_snapshot, watch_job
+from load_profiles import resolve_profile
+from load_runner import run_collection
+from results_analyzer import ResultsAnalyzer, ResultsPager, format_summary
+from run_history import DEFAULT_HISTORY, RunHistory, format_comparison, format_runs
+from server_profile import DEFAULT_PROFILES, format_breakdown, join_results, read_profiles
 
 server = FastMCP('postman2jmx-server')
 
+# Rows per page of the jmeter://runs/{run_id}/samples/{page} resource
+SAMPLES_PAGE_SIZE = 500
+# Lines of JMeter's own output kept in tool responses
+OUTPUT_TAIL_LINES = 20
+
+# Results files summarized so far, by run id
+_runs: Dict[str, Dict[str, Any]] = {}
+
+# Finished runs are recorded in this history file (RUN_HISTORY= turns recording off)
+RUN_HISTORY = os.environ.get('RUN_HISTORY', DEFAULT_HISTORY)
+
+# TRACE_DIR writes a timing trace of every conversion, run and report tool call
+# there; TRACE_PROFILE (cpu, memory or all) adds cProfile/tracemalloc data
+TRACE_DIR = os.environ.get('TRACE_DIR', '')
+TRACE_PROFILE = os.environ.get('TRACE_PROFILE') or None
+
+# JMeter runs share one queue. JMETER_MAX_CONCURRENT bounds the parallel runs and
+# JMETER_COMMAND replaces the Docker engine, e.g.
+# "jmeter -n -t {jmx_path} -l {results_path} -Jsample_variables=correlation_id"
+jobs = JobManager(
+    max_concurrent=int(os.environ.get('JMETER_MAX_CONCURRENT', '1')),
+    command=template_command(os.environ['JMETER_COMMAND']) if os.environ.get('JMETER_COMMAND') else docker_command,
+)
+
+
+# Live monitors of JMeter jobs (by job id) and of other results files (by path)
+_monitors: Dict[str, LiveMonitor] = {}
+_file_monitors: Dict[str, LiveMonitor] = {}
+# Watchdog tasks aborting jobs whose thresholds are breached
+_watchdogs = set()
+
+
+def _trace(tool: str, **attrs):
+    """Trace one tool call (a no-op unless TRACE_DIR is set)"""
+    return tracing.trace_run(tool, TRACE_DIR, TRACE_PROFILE, **attrs)
+
+
+def _tail(text: str, lines: int = OUTPUT_TAIL_LINES) -> str:
+    kept = text.strip().splitlines()[-lines:]
+    return '\n'.join(kept)
+
+
+def register_results(results_path: str, plan_path: Optional[str] = None,
+                     profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Summarize a results file (once per version of the file) and make its samples browsable
+
+    Results of a known plan are also recorded once in the run history.
+    """
+    path = os.path.abspath(results_path)
+    run_id = hashlib.sha1(path.encode('utf-8')).hexdigest()[:12]
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    run = _runs.get(run_id)
+    if run is None or run['version'] != version:
+        with tracing.span('results.analyze', bytes=stat.st_size):
+            analyzer = ResultsAnalyzer().analyze(path)
+        run = {
+            'run_id': run_id,
+            'path': path,
+            'version': version,
+            'analyzer': analyzer,
+            'summary': analyzer.summary(),
+            'pager': ResultsPager(path, SAMPLES_PAGE_SIZE),
+        }
+        _runs[run_id] = run
+    if plan_path and RUN_HISTORY and 'history_id' not in run:
+        with tracing.span('history.record'), RunHistory(RUN_HISTORY) as history:
+            run['history_id'] = history.record(run['analyzer'], path, plan_path, profile)
+    return run
+
+
+def describe_results(run: Dict[str, Any], output_format: str = 'text') -> str:
+    """Compact summary of a registered run plus where to fetch the raw samples"""
+    summary = run['summary']
+    rows = summary['total']['samples'] + summary['skipped_rows']
+    pages = -(-rows // SAMPLES_PAGE_SIZE)
+    links = (f"Raw samples: {rows} rows in {pages} pages of {SAMPLES_PAGE_SIZE} at "
+             f"jmeter://runs/{run['run_id']}/samples/{{page}} (page 0 to {max(pages - 1, 0)}); "
+             f"full summary at jmeter://runs/{run['run_id']}/summary")
+    if run.get('history_id'):
+        links += f"\nRecorded as run #{run['history_id']} in the run history (compare with compare_runs)"
+    if output_format == 'json':
+        return json.dumps({'run_id': run['run_id'], 'results_path': run['path'],
+                           'history_id': run.get('history_id'), **summary})
+    return f"{format_summary(summary)}\n\n{links}"
+
 @server.tool(name='postman_to_jmx', description='Convert postman collection json into Jmeter jmx xml')
 def postman_to_jmx(args: dict):
     try:
         collection_json = args.get('collection')
         environment_json = args.get('environment')
         output_path = args.get('output', os.path.join('data', 'output', 'output.jmx'))
+        variable_mode = args.get('variables', 'resolve')
+        # A named profile from profile_file, with load_profile fields on top
+        load_profile = resolve_profile(args.get('profile'), args.get('profile_file'), args.get('load_profile'))
+        feeders = [Feeder.from_dict(feeder) for feeder in args.get('feeders', [])]
 
         if not collection_json:
             return CallToolResult(content=[TextContent(type="text", text="Error: missing collection argument")])
 
-        # Write collection to temp file
-        temp_collection = None
-        temp_env = None
-        try:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-                f.write(collection_json)
-                temp_collection = f.name
-
-            if environment_json:
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-                    f.write(environment_json)
-                    temp_env = f.name
-
-            # ensure output directory exists
-            out_dir = os.path.dirname(output_path)
-            if out_dir and not os.path.exists(out_dir):
-                os.makedirs(out_dir, exist_ok=True)
-
-            converter = PostmanToJMeterConverter()
-            success = converter.convert(temp_collection, output_path, temp_env)
-
-            if success:
-                with open(output_path, 'r', encoding='utf-8') as f:
-                    jmx_text = f.read()
-                return CallToolResult(content=[TextContent(type="text", text=jmx_text)])
-            else:
-                return CallToolResult(content=[TextContent(type="text", text="Error: Conversion failed")])
-        finally:
-            # Clean up temp files
-            if temp_collection and os.path.exists(temp_collection):
-                os.unlink(temp_collection)
-            if temp_env and os.path.exists(temp_env):
-                os.unlink(temp_env)
+        with _trace('postman_to_jmx', output=output_path):
+            # Write collection to temp file
+            temp_collection = None
+            temp_env = None
+            try:
+                with tracing.span('server.temp_files', bytes=len(collection_json)):
+                    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+                        f.write(collection_json)
+                        temp_collection = f.name
+
+                    if environment_json:
+                        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+                            f.write(environment_json)
+                            temp_env = f.name
+
+                # ensure output directory exists
+                out_dir = os.path.dirname(output_path)
+                if out_dir and not os.path.exists(out_dir):
+                    os.makedirs(out_dir, exist_ok=True)
+
+                converter = PostmanToJMeterConverter(variable_mode=variable_mode, load_profile=load_profile,
+                                                     shared_config=args.get('shared_config', True),
+                                                     feeders=feeders,
+                                                     correlation_header=args.get('correlation_header',
+                                                                                 CORRELATION_HEADER) or None)
+                with tracing.span('server.convert'):
+                    success = converter.convert(temp_collection, output_path, temp_env)
+
+                if success:
+                    with tracing.span('server.read_output'), open(output_path, 'r', encoding='utf-8') as f:
+                        jmx_text = f.read()
+                    return CallToolResult(content=[TextContent(type="text", text=jmx_text)])
+                else:
+                    return CallToolResult(content=[TextContent(type="text", text="Error: Conversion failed")])
+            finally:
+                # Clean up temp files
+                with tracing.span('server.cleanup'):
+                    if temp_collection and os.path.exists(temp_collection):
+                        os.unlink(temp_collection)
+                    if temp_env and os.path.exists(temp_env):
+                        os.unlink(temp_env)
     except Exception as e:
         return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
 
-@server.tool(name='run_jmeter', description='Run JMeter performance test on a JMX file')
-def run_jmeter(args: dict):
+def _job_args(args: dict):
+    jmx_path = args.get('jmx_path')
+    results_path = args.get('results_path', os.path.join('data', 'output', 'results.csv'))
+    return jmx_path, results_path
+
+
+def submit_job(jmx_path: str, results_path: str, args: dict) -> Job:
+    """Queue a run with a live monitor; abort_on thresholds start a watchdog that cancels it early"""
+    thresholds = Thresholds.from_dict(args.get('abort_on') or {})
+    job = jobs.submit(jmx_path, results_path)
+    for job_id in [job_id for job_id in _monitors if job_id not in jobs.jobs]:
+        del _monitors[job_id]
+    monitor = _monitors[job.id] = LiveMonitor(results_path, int(args.get('window', WINDOW)), thresholds)
+    if thresholds.active:
+        task = asyncio.get_running_loop().create_task(
+            watch_job(job, jobs, monitor, float(args.get('poll_interval', 2.0))))
+        _watchdogs.add(task)
+        task.add_done_callback(_watchdogs.discard)
+    return job
+
+
+async def describe_job(job: Job, output_format: str = 'text') -> str:
+    """Status of a job; finished jobs include the output tail and the results summary"""
+    status = job.to_dict()
+    status['queue_position'] = jobs.queue_position(job)
+    stdout = _tail('\n'.join(job.stdout))
+    stderr = _tail('\n'.join(job.stderr))
+    run = None
+    if job.status == 'succeeded' and os.path.exists(job.results_path):
+        run = await asyncio.to_thread(register_results, job.results_path, job.jmx_path)
+        status['run_id'] = run['run_id']
+        status['history_id'] = run.get('history_id')
+
+    if output_format == 'json':
+        if run:
+            status['summary'] = run['summary']
+        if job.status in FINISHED_STATES:
+            status['stdout_tail'] = stdout
+            status['stderr_tail'] = stderr
+        return json.dumps(status)
+
+    text = (f"Job {job.id}: {job.status}"
+            + (f" ({status['queue_position']} ahead in queue)" if job.status == 'queued' else '')
+            + f", {status['samples']} samples, {status['running_seconds']}s running")
+    if job.status not in FINISHED_STATES:
+        return text
+    text += f"\nReturn Code: {job.returncode}\nJMeter output (last {OUTPUT_TAIL_LINES} lines):\n{stdout}\n"
+    if job.error:
+        text += f"Error: {job.error}\n"
+    if job.status == 'failed':
+        text += f"JMeter error: {stderr}"
+    elif run:
+        text += "JMeter run successful. Summary:\n" + describe_results(run, output_format)
+    elif job.status == 'succeeded':
+        text += "JMeter run successful, but results file not found."
+    return text
+
+
+@server.tool(name='run_jmeter', description='Run JMeter performance test on a JMX file and wait for it to finish')
+async def run_jmeter(args: dict):
     try:
-        jmx_path = args.get('jmx_path')
-        results_path = args.get('results_path', os.path.join('data', 'output', 'results.csv'))
+        jmx_path, results_path = _job_args(args)
+        output_format = args.get('format', 'text')
+
+        if not jmx_path:
+            return CallToolResult(content=[TextContent(type="text", text="Error: missing jmx_path argument")])
+
+        with _trace('run_jmeter', jmx=jmx_path):
+            job = submit_job(jmx_path, results_path, args)
+            await jobs.wait(job.id, args.get('timeout'))
+            return CallToolResult(content=[TextContent(type="text", text=await describe_job(job, output_format))])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='start_jmeter', description='Queue a JMeter run and return its job id without waiting')
+async def start_jmeter(args: dict):
+    try:
+        jmx_path, results_path = _job_args(args)
 
         if not jmx_path:
             return CallToolResult(content=[TextContent(type="text", text="Error: missing jmx_path argument")])
 
-        # ensure directories exist for output/results
-        results_dir = os.path.dirname(results_path)
-        if results_dir and not os.path.exists(results_dir):
-            os.makedirs(results_dir, exist_ok=True)
-
-        # Run JMeter via Docker
-        result = subprocess.run([
-            'docker', 'run', '--rm',
-            '-v', f'{os.getcwd()}:/jmeter',
-            '-w', '/jmeter',
-            'justb4/jmeter:latest',
-            '-n', '-t', jmx_path, '-l', results_path
-        ], capture_output=True, text=True)
-
-        output = f"STDOUT: {result.stdout}\nSTDERR: {result.stderr}\nReturn Code: {result.returncode}\n"
-
-        if result.returncode == 0:
-            # Read results
-            if os.path.exists(results_path):
-                with open(results_path, 'r') as f:
-                    results = f.read()
-                return CallToolResult(content=[TextContent(type="text", text=output + f"JMeter run successful. Results:\n{results}")])
+        job = submit_job(jmx_path, results_path, args)
+        return CallToolResult(content=[TextContent(type="text", text=json.dumps({'job_id': job.id, 'status': job.status, 'queue_position': jobs.queue_position(job)}))])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='job_status', description='Status and progress of a JMeter job')
+async def job_status(args: dict):
+    try:
+        job = jobs.get(args.get('job_id'))
+        return CallToolResult(content=[TextContent(type="text", text=await describe_job(job, args.get('format', 'text')))])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='wait_job', description='Wait for a JMeter job to finish, up to timeout seconds')
+async def wait_job(args: dict):
+    try:
+        job = await jobs.wait(args.get('job_id'), args.get('timeout'))
+        return CallToolResult(content=[TextContent(type="text", text=await describe_job(job, args.get('format', 'text')))])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='monitor_job', description='Live rolling-window throughput, error rate and percentiles of a running job or results file')
+async def monitor_job(args: dict):
+    try:
+        if args.get('job_id'):
+            job = jobs.get(args['job_id'])
+            monitor = _monitors.get(job.id)
+            if monitor is None:
+                monitor = _monitors[job.id] = LiveMonitor(job.results_path, int(args.get('window', WINDOW)))
+            header = f"Job {job.id}: {job.status}, {job.to_dict()['running_seconds']}s running"
+            if job.error:
+                header += f" ({job.error})"
+        elif args.get('results_path'):
+            path = os.path.abspath(args['results_path'])
+            monitor = _file_monitors.get(path)
+            if monitor is None:
+                monitor = _file_monitors[path] = LiveMonitor(path, int(args.get('window', WINDOW)))
+            header = f"Results file {path}"
+        else:
+            return CallToolResult(content=[TextContent(type="text", text="Error: missing job_id or results_path argument")])
+
+        await asyncio.to_thread(monitor.poll)
+        snapshot = monitor.snapshot()
+        if args.get('format', 'text') == 'json':
+            text = json.dumps({'job_id': args.get('job_id'), **snapshot})
+        else:
+            text = f"{header}\n{format_snapshot(snapshot)}"
+        return CallToolResult(content=[TextContent(type="text", text=text)])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='cancel_job', description='Cancel a queued or running JMeter job')
+async def cancel_job(args: dict):
+    try:
+        job = await jobs.cancel(args.get('job_id'))
+        return CallToolResult(content=[TextContent(type="text", text=await describe_job(job, args.get('format', 'text')))])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='list_jobs', description='List queued, running and recent JMeter jobs')
+async def list_jobs(args: dict):
+    try:
+        listing = []
+        for job in jobs.list():
+            status = job.to_dict()
+            status['queue_position'] = jobs.queue_position(job)
+            listing.append(status)
+        return CallToolResult(content=[TextContent(type="text", text=json.dumps(listing))])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='run_jmeter_distributed', description='Run a JMX file on several JMeter engines at once and merge their results')
+async def run_jmeter_distributed(args: dict):
+    try:
+        jmx_path, results_path = _job_args(args)
+        engines = int(args.get('engines', 2))
+        output_format = args.get('format', 'text')
+
+        if not jmx_path:
+            return CallToolResult(content=[TextContent(type="text", text="Error: missing jmx_path argument")])
+
+        with _trace('run_jmeter_distributed', jmx=jmx_path, engines=engines):
+            # The engines wait in the shared queue until they can all start together
+            with tracing.span('jmeter.distributed', engines=engines):
+                result = await run_sharded(jmx_path, results_path, engines, jobs)
+            run = await asyncio.to_thread(register_results, results_path, jmx_path)
+            engine_lines = '\n'.join(
+                f"engine{index + 1}: {engine['status']} (return code {engine['returncode']}), "
+                f"{engine['samples']} samples, {engine['running_seconds']}s -> {engine['results_path']}"
+                for index, engine in enumerate(result['engines'])
+            )
+            if output_format == 'json':
+                text = json.dumps({'run_id': run['run_id'], 'results_path': results_path,
+                                   'history_id': run.get('history_id'), 'engines': result['engines'],
+                                   **run['summary']})
+            else:
+                text = f"{engine_lines}\nMerged {result['samples']} samples. Summary:\n{describe_results(run)}"
+            return CallToolResult(content=[TextContent(type="text", text=text)])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='run_collection', description='Run a Postman collection as a load test without JMeter (native asyncio runner)')
+async def run_collection_tool(args: dict):
+    try:
+        collection_path = args.get('collection_path')
+        results_path = args.get('results_path', os.path.join('data', 'output', 'results.csv'))
+        output_format = args.get('format', 'text')
+        load_profile = resolve_profile(args.get('profile'), args.get('profile_file'), args.get('load_profile'))
+        feeders = [Feeder.from_dict(feeder) for feeder in args.get('feeders', [])]
+
+        if not collection_path:
+            return CallToolResult(content=[TextContent(type="text", text="Error: missing collection_path argument")])
+
+        with _trace('run_collection', collection=collection_path):
+            with tracing.span('load_runner.run'):
+                result = await run_collection(collection_path, results_path, args.get('environment_path'), load_profile,
+                                              feeders, float(args.get('timeout', 30)), args.get('insecure', False))
+            run = await asyncio.to_thread(register_results, results_path, collection_path, load_profile.to_dict())
+            if output_format == 'json':
+                text = json.dumps({'run_id': run['run_id'], 'results_path': results_path,
+                                   'history_id': run.get('history_id'), 'samples': result['samples'],
+                                   'seconds': result['seconds'], 'connections': result['connections'], **run['summary']})
             else:
-                return CallToolResult(content=[TextContent(type="text", text=output + "JMeter run successful, but results file not found.")])
+                text = (f"{load_profile.describe()}: {result['samples']} samples in {result['seconds']}s. "
+                        f"Summary:\n{describe_results(run)}")
+            return CallToolResult(content=[TextContent(type="text", text=text)])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='summarize_results', description='Summarize an existing JMeter CSV results file (per-label counts, percentiles, errors)')
+def summarize_results(args: dict):
+    try:
+        results_path = args.get('results_path', os.path.join('data', 'output', 'results.csv'))
+        output_format = args.get('format', 'text')
+
+        if not os.path.exists(results_path):
+            return CallToolResult(content=[TextContent(type="text", text=f"Error: results file '{results_path}' not found")])
+
+        with _trace('summarize_results', results=results_path):
+            run = register_results(results_path)
+            return CallToolResult(content=[TextContent(type="text", text=describe_results(run, output_format))])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='html_report', description='Write a self-contained HTML report (charts and percentile tables) for a results file')
+async def html_report(args: dict):
+    try:
+        results_path = args.get('results_path', os.path.join('data', 'output', 'results.csv'))
+        output_path = args.get('output_path') or os.path.join(os.path.dirname(results_path), 'report.html')
+
+        if not os.path.exists(results_path):
+            return CallToolResult(content=[TextContent(type="text", text=f"Error: results file '{results_path}' not found")])
+
+        with _trace('html_report', results=results_path), tracing.span('report.write'):
+            report = await asyncio.to_thread(write_report, [results_path], output_path, args.get('title'),
+                                             int(args.get('points', CHART_POINTS)))
+        return CallToolResult(content=[TextContent(type="text", text=json.dumps(report))])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='server_profile', description='Break JMeter response times down into the demo app\'s view, SQL and template time per label')
+async def server_profile(args: dict):
+    try:
+        results_path = args.get('results_path', os.path.join('data', 'output', 'results.csv'))
+        profiles_path = args.get('profiles_path', DEFAULT_PROFILES)
+
+        for path in (results_path, profiles_path):
+            if not os.path.exists(path):
+                return CallToolResult(content=[TextContent(type="text", text=f"Error: file '{path}' not found")])
+
+        profiles = await asyncio.to_thread(read_profiles, profiles_path)
+        result = await asyncio.to_thread(join_results, [results_path], profiles, args.get('samples_path'),
+                                         int(args.get('slowest', 10)))
+        text = json.dumps(result) if args.get('format', 'text') == 'json' else format_breakdown(result)
+        return CallToolResult(content=[TextContent(type="text", text=text)])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='list_history', description='List load test runs recorded in the run history, newest first')
+def list_history(args: dict):
+    try:
+        with RunHistory(args.get('history', RUN_HISTORY)) as history:
+            runs = history.runs(int(args.get('limit', 20)), args.get('plan_hash'))
+        text = json.dumps(runs) if args.get('format', 'text') == 'json' else format_runs(runs)
+        return CallToolResult(content=[TextContent(type="text", text=text)])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='mark_baseline', description='Mark a recorded run as a named baseline for compare_runs')
+def mark_baseline(args: dict):
+    try:
+        name = args.get('name', 'default')
+        with RunHistory(args.get('history', RUN_HISTORY)) as history:
+            run_id = history.resolve(args.get('run', 'latest'))
+            history.mark_baseline(run_id, name)
+        return CallToolResult(content=[TextContent(type="text", text=f"Baseline '{name}' is run #{run_id}")])
+    except Exception as e:
+        return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
+
+@server.tool(name='compare_runs', description='Flag significant p95/p99, throughput and error rate changes of a run against a baseline')
+def compare_runs(args: dict):
+    try:
+        options = {'confidence': float(args.get('confidence', 0.95)),
+                   'min_change': float(args.get('min_change', 5)) / 100,
+                   'min_samples': int(args.get('min_samples', 30))}
+        with RunHistory(args.get('history', RUN_HISTORY)) as history:
+            result = history.compare(args.get('baseline'), args.get('candidate', 'latest'), **options)
+        if args.get('format', 'text') == 'json':
+            text = json.dumps(result)
         else:
-            return CallToolResult(content=[TextContent(type="text", text=output + f"JMeter error: {result.stderr}")])
+            text = format_comparison(result, args.get('all', False))
+        return CallToolResult(content=[TextContent(type="text", text=text)])
     except Exception as e:
         return CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")])
 
+@server.resource('jmeter://runs', name='runs', description='Results files summarized by this server', mime_type='application/json')
+def list_runs() -> str:
+    return json.dumps([
+        {'run_id': run['run_id'], 'results_path': run['path'], 'samples': run['summary']['total']['samples'],
+         'summary': f"jmeter://runs/{run['run_id']}/summary",
+         'samples_page': f"jmeter://runs/{run['run_id']}/samples/{{page}}"}
+        for run in _runs.values()
+    ])
+
+@server.resource('jmeter://runs/{run_id}/summary', name='run_summary', description='Aggregated summary of a run', mime_type='application/json')
+def run_summary(run_id: str) -> str:
+    run = _runs.get(run_id)
+    if run is None:
+        raise ValueError(f"Unknown run '{run_id}'")
+    return json.dumps(run['summary'])
+
+@server.resource('jmeter://runs/{run_id}/samples/{page}', name='run_samples', description=f'Raw samples of a run as CSV, {SAMPLES_PAGE_SIZE} rows per page', mime_type='text/csv')
+def run_samples(run_id: str, page: str) -> str:
+    run = _runs.get(run_id)
+    if run is None:
+        raise ValueError(f"Unknown run '{run_id}'")
+    number = int(page)
+    pager = run['pager']
+    if not pager.pages:
+        raise ValueError(f"Run '{run_id}' has no samples")
+    if number < 0 or number >= pager.pages:
+        raise ValueError(f"Page {number} out of range (0 to {pager.pages - 1})")
+    return pager.page(number)
+
 async def main():
     pass
 
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Server-side breakdown of JMeter samples
+Joins a JMeter CSV results file with the request profiles written by the
+demo app's ProfilingMiddleware (demo_app/demo/profiling.py). Plans from the
+converter send a fresh id with every sample in the correlation header; with
+-Jsample_variables=correlation_id JMeter saves it as a results column and the
+middleware logs it with the view's wall time, SQL and template time. Per label
+this shows how much of the client-side response time was spent in SQL, in
+templates, in the rest of the view and outside the server (network, queueing).
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import os
+import sys
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from convert_postman_to_jmx import CORRELATION_VARIABLE
+from results_analyzer import LatencyHistogram
+
+DEFAULT_PROFILES = os.path.join('demo_app', 'profiling.jsonl')
+
+# Profile fields kept per correlation id
+Profile = Tuple[Optional[str], float, int, float, float]  # view, wall_ms, sql_count, sql_ms, template_ms
+
+SAMPLE_FIELDS = ['timeStamp', 'label', 'elapsed', 'success', CORRELATION_VARIABLE, 'view', 'wall_ms',
+                 'sql_count', 'sql_ms', 'template_ms', 'outside_ms']
+
+
+def read_profiles(path: str) -> Dict[str, Profile]:
+    """Request profiles by correlation id (records without an id are skipped)"""
+    profiles = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            correlation_id = record.get('correlation_id')
+            if correlation_id:
+                profiles[correlation_id] = (record.get('view'), float(record.get('wall_ms', 0)),
+                                            int(record.get('sql_count', 0)), float(record.get('sql_ms', 0)),
+                                            float(record.get('template_ms', 0)))
+    return profiles
+
+
+class Breakdown:
+    """Client and server timings of the samples of one label"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.samples = 0
+        self.joined = 0
+        self.client = LatencyHistogram()
+        self.server = LatencyHistogram()
+        self.elapsed_ms = 0.0
+        self.wall_ms = 0.0
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.views: Counter = Counter()
+
+    def add(self, elapsed: int, profile: Optional[Profile]):
+        self.samples += 1
+        if profile is None:
+            return
+        view, wall_ms, sql_count, sql_ms, template_ms = profile
+        self.joined += 1
+        self.client.record(elapsed)
+        self.server.record(int(round(wall_ms)))
+        self.elapsed_ms += elapsed
+        self.wall_ms += wall_ms
+        self.sql_count += sql_count
+        self.sql_ms += sql_ms
+        self.template_ms += template_ms
+        self.views[view] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Means per joined sample; view_code is wall time outside SQL and templates"""
+        joined = self.joined or 1
+        return {
+            'label': self.label,
+            'samples': self.samples,
+            'joined': self.joined,
+            'views': [view for view, _ in self.views.most_common()],
+            'client': self.client.summary((50, 95)),
+            'server': self.server.summary((50, 95)),
+            'sql_queries': round(self.sql_count / joined, 2),
+            'sql_ms': round(self.sql_ms / joined, 3),
+            'template_ms': round(self.template_ms / joined, 3),
+            'view_code_ms': round((self.wall_ms - self.sql_ms - self.template_ms) / joined, 3),
+            'outside_ms': round((self.elapsed_ms - self.wall_ms) / joined, 3),
+        }
+
+
+def join_results(results_paths: List[str], profiles: Dict[str, Profile], samples_path: Optional[str] = None,
+                 slowest: int = 10) -> Dict[str, Any]:
+    """Join results rows with profiles by correlation id; optionally write every joined sample to a CSV"""
+    labels: Dict[str, Breakdown] = {}
+    total = Breakdown('TOTAL')
+    matched = set()
+    worst: List[Tuple[int, int, Dict[str, Any]]] = []
+    sequence = 0
+    out = open(samples_path, 'w', newline='', encoding='utf-8') if samples_path else None
+    try:
+        writer = csv.writer(out) if out else None
+        if writer:
+            writer.writerow(SAMPLE_FIELDS)
+        for path in results_paths:
+            with open(path, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                fields = next(reader, None) or []
+                if CORRELATION_VARIABLE not in fields:
+                    raise ValueError(f"'{path}' has no {CORRELATION_VARIABLE} column; run JMeter with "
+                                     f"-Jsample_variables={CORRELATION_VARIABLE}")
+                column = {name: i for i, name in enumerate(fields)}
+                for row in reader:
+                    if len(row) != len(fields):
+                        continue
+                    try:
+                        elapsed = int(row[column['elapsed']])
+                    except ValueError:
+                        continue
+                    label = row[column['label']]
+                    correlation_id = row[column[CORRELATION_VARIABLE]]
+                    profile = profiles.get(correlation_id)
+                    stats = labels.get(label)
+                    if stats is None:
+                        stats = labels[label] = Breakdown(label)
+                    stats.add(elapsed, profile)
+                    total.add(elapsed, profile)
+                    if profile is None:
+                        if writer:
+                            writer.writerow([row[column['timeStamp']], label, elapsed, row[column['success']],
+                                             correlation_id] + [''] * 6)
+                        continue
+                    matched.add(correlation_id)
+                    view, wall_ms, sql_count, sql_ms, template_ms = profile
+                    sample = {'timeStamp': row[column['timeStamp']], 'label': label, 'elapsed': elapsed,
+                              'success': row[column['success']], CORRELATION_VARIABLE: correlation_id,
+                              'view': view, 'wall_ms': wall_ms, 'sql_count': sql_count, 'sql_ms': sql_ms,
+                              'template_ms': template_ms, 'outside_ms': round(elapsed - wall_ms, 3)}
+                    if writer:
+                        writer.writerow([sample[name] for name in SAMPLE_FIELDS])
+                    if slowest:
+                        sequence += 1
+                        entry = (elapsed, -sequence, sample)
+                        if len(worst) < slowest:
+                            heapq.heappush(worst, entry)
+                        elif entry > worst[0]:
+                            heapq.heapreplace(worst, entry)
+    finally:
+        if out:
+            out.close()
+    return {
+        'labels': [labels[label].summary() for label in sorted(labels)],
+        'total': total.summary(),
+        'slowest': [sample for _, _, sample in sorted(worst, reverse=True)],
+        'unmatched_profiles': len(profiles) - len(matched),
+    }
+
+
+def _ms(value: Optional[float]) -> str:
+    return '-' if value is None else f'{value:.0f}'
+
+
+def format_breakdown(result: Dict[str, Any]) -> str:
+    """Plain-text table of where each label's time went"""
+    rows = result['labels'] + [result['total']]
+    width = max([len(row['label']) for row in rows] + [5])
+    lines = [f"{'Label':<{width}}  {'Joined':>13}  {'Client p50/p95':>14}  {'Server p50/p95':>14}  "
+             f"{'SQL ms (n)':>12}  {'Tmpl ms':>7}  {'View ms':>7}  {'Outside':>7}  View"]
+    for row in rows:
+        client, server = row['client'], row['server']
+        lines.append(
+            f"{row['label']:<{width}}  {str(row['joined']) + '/' + str(row['samples']):>13}  "
+            f"{_ms(client['p50']) + '/' + _ms(client['p95']):>14}  {_ms(server['p50']) + '/' + _ms(server['p95']):>14}  "
+            f"{row['sql_ms']:>6.1f} ({row['sql_queries']:>3g})  {row['template_ms']:>7.1f}  "
+            f"{row['view_code_ms']:>7.1f}  {row['outside_ms']:>7.1f}  {', '.join(str(view) for view in row['views'])}"
+        )
+    if result['slowest']:
+        lines.append('')
+        lines.append('Slowest samples:')
+        for sample in result['slowest']:
+            lines.append(f"  {sample['elapsed']:>7} ms  {sample['label']} ({sample['view']}): server "
+                         f"{sample['wall_ms']:.0f} ms, SQL {sample['sql_ms']:.1f} ms in {sample['sql_count']} "
+                         f"queries, templates {sample['template_ms']:.1f} ms  [{sample[CORRELATION_VARIABLE]}]")
+    if result['total']['samples'] and not result['total']['joined']:
+        lines.append('')
+        lines.append('⚠ No sample matched a server profile; was the plan converted with the correlation header '
+                     'and the app run with ProfilingMiddleware?')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Break JMeter response times down into server-side view, SQL and template time',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python server_profile.py data/output/results.csv
+  python server_profile.py data/output/results.csv --profiles demo_app/profiling.jsonl --slowest 20
+  python server_profile.py engine1.csv engine2.csv --samples data/output/joined.csv --json
+
+Results need the correlation_id column: run JMeter with -Jsample_variables=correlation_id
+(the MCP server's Docker command does).
+        '''
+    )
+    parser.add_argument('results', nargs='+', help='JMeter CSV results file(s)')
+    parser.add_argument('--profiles', default=DEFAULT_PROFILES,
+                        help=f'Request profiles written by the demo app (default: {DEFAULT_PROFILES})')
+    parser.add_argument('--samples', metavar='CSV', help='Also write every sample with its server timings')
+    parser.add_argument('--slowest', type=int, default=10, help='Slowest joined samples listed (default: 10)')
+    parser.add_argument('--json', action='store_true', help='Print the breakdown as JSON')
+
+    args = parser.parse_args()
+
+    try:
+        profiles = read_profiles(args.profiles)
+        result = join_results(args.results, profiles, args.samples, args.slowest)
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(format_breakdown(result))
+
+
+if __name__ == '__main__':
+    main()
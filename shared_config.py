@@ -0,0 +1,71 @@
+"""
+Shared configuration for generated plans
+Finds the values that many samplers would otherwise repeat, so they can be
+declared once: the most common protocol/domain/port becomes an HTTP Request
+Defaults element of the thread group, and headers sent by every request of a
+folder (or of the whole collection) move to one Header Manager at that level.
+Samplers then only keep what differs.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+Header = Tuple[str, str]
+Target = Tuple[str, str, str]
+
+# A shared element only pays off when at least this many samplers use it
+MIN_SHARED = 2
+
+
+class SharedConfig:
+    """HTTP defaults and shared headers worked out from a pass over the requests
+
+    Scopes are numbered in the order they start: 0 is the thread group, then
+    every folder in collection order, which is also the order the converter
+    writes them in.
+    """
+
+    def __init__(self):
+        self.defaults: Optional[Target] = None
+        # Headers sent by every request of a scope, in first-seen order
+        self.headers: Dict[int, List[Header]] = {}
+
+    def observe(self, events: Iterable[Tuple[str, Dict[str, Any]]],
+                describe: Callable[[Dict[str, Any]], Tuple[Target, List[Header]]]):
+        """Collect targets and header sets from folder/request events"""
+        targets: Dict[Target, int] = {}
+        # Per open scope: [number, request count, first request's headers, common headers]
+        scopes: List[list] = [[0, 0, [], None]]
+        folders = 0
+        for event, item in events:
+            if event == 'folder':
+                folders += 1
+                scopes.append([folders, 0, [], None])
+            elif event == 'request':
+                target, headers = describe(item)
+                targets[target] = targets.get(target, 0) + 1
+                names = [name.lower() for name, _ in headers]
+                # A header name used twice in one request stays with the request
+                unique = [header for header, name in zip(headers, names) if names.count(name) == 1]
+                for scope in scopes:
+                    if scope[3] is None:
+                        scope[2], scope[3] = unique, set(unique)
+                    else:
+                        scope[3].intersection_update(unique)
+                    scope[1] += 1
+            else:
+                self._close_scope(scopes.pop())
+        self._close_scope(scopes.pop())
+
+        if targets:
+            target, count = max(targets.items(), key=lambda entry: entry[1])
+            if count >= MIN_SHARED:
+                self.defaults = target
+
+    def _close_scope(self, scope: list):
+        number, requests, first, common = scope
+        if requests >= MIN_SHARED and common:
+            self.headers[number] = [header for header in first if header in common]
+
+    def lifted(self, number: int, inherited: Set[Header]) -> List[Header]:
+        """Headers to declare at a scope that no enclosing scope declares already"""
+        return [header for header in self.headers.get(number, []) if header not in inherited]
@@ -0,0 +1,320 @@
+"""
+Next-action suggestions for the crawler
+A suggester looks at a page and proposes one action ("click link /users/",
+"fill form ... and submit" or "stop"). Two backends are available:
+- OpenAISuggester asks a chat model (needs the openai package and OPENAI_API_KEY)
+- RuleBasedSuggester decides locally and deterministically, for offline runs and tests
+
+Pages with the same structure get the same suggestion, so CachedSuggester keeps
+suggestions in a small SQLite file keyed by a fingerprint of the page outline:
+tag paths, forms and link patterns, with ids in URLs generalized. Every
+/users/<pk>/ detail page then costs one model call in total, not one each.
+Link URLs in cached suggestions are stored as patterns too and bound to the
+matching link of the page at hand when the suggestion is reused.
+Entries expire after a TTL and the least recently used ones are evicted
+beyond max_entries.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import tracing
+
+DEFAULT_MODEL = 'gpt-3.5-turbo'
+
+# Elements without an end tag
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+             'source', 'track', 'wbr'}
+# Deeper tag paths are cut to their last MAX_DEPTH tags
+MAX_DEPTH = 8
+
+# URL segments that are ids rather than names
+_ID_SEGMENT_RE = re.compile(r'^(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{16,})$', re.I)
+
+# The URL of a "click link <url>" suggestion (the first word after it, as agent.perform_action reads it)
+_CLICK_RE = re.compile(r'click link\s+["\']?([^\s"\']+)', re.I)
+
+PROMPT = """
+Analyze this HTML page from {url}. What is this page (e.g., homepage, user list)?
+Suggest ONE next action to explore the app. Examples:
+- "click link /users/" (if there's a link to /users/)
+- "fill form with name: Test User, email: test@example.com and submit" (if there's a form)
+- "click link /users/create/" (if there's a create link)
+Be concise and specific. If no actions, say "stop".
+"""
+
+
+def url_pattern(url: str) -> str:
+    """Path with id-like segments replaced and only the query parameter names kept"""
+    parts = urlsplit(url)
+    segments = ['{id}' if _ID_SEGMENT_RE.match(segment) else segment for segment in parts.path.split('/')]
+    query = '&'.join(sorted({pair.split('=', 1)[0] for pair in parts.query.split('&') if pair}))
+    return '/'.join(segments) + (f'?{query}' if query else '')
+
+
+def _replace_link(suggestion: str, match, url: str) -> str:
+    return suggestion[:match.start(1)] + url + suggestion[match.end(1):]
+
+
+def generalize_action(suggestion: str, outline: 'PageOutline') -> str:
+    """Suggestion with the clicked link's own-site URL replaced by its pattern, so similar pages can reuse it"""
+    match = _CLICK_RE.search(suggestion)
+    if match is None or '/' not in match.group(1):
+        return suggestion
+    link = urljoin(outline.url, match.group(1))
+    if urlsplit(link).netloc.lower() != outline.host:
+        return suggestion
+    return _replace_link(suggestion, match, url_pattern(link))
+
+
+def bind_action(suggestion: str, outline: 'PageOutline') -> Optional[str]:
+    """A generalized suggestion applied to this page's first link matching its pattern; None if none does"""
+    match = _CLICK_RE.search(suggestion)
+    if match is None or '/' not in match.group(1):
+        return suggestion
+    pattern = match.group(1)
+    for link in outline.site_links():
+        if url_pattern(link) == pattern:
+            parts = urlsplit(link)
+            return _replace_link(suggestion, match, parts.path + (f'?{parts.query}' if parts.query else ''))
+    # Patterns without ids or query parameters are plain paths already
+    return suggestion if '{id}' not in pattern.split('/') and '?' not in pattern else None
+
+
+class PageOutline(HTMLParser):
+    """Structure of a page without its text: tag paths, forms and links"""
+
+    def __init__(self, html: str, url: str):
+        super().__init__(convert_charrefs=True)
+        self.url = url
+        self.host = urlsplit(url).netloc.lower()
+        self.tag_paths = set()
+        self.forms: List[Dict[str, Any]] = []
+        self.links: List[str] = []
+        self._stack: List[str] = []
+        self._form: Optional[Dict[str, Any]] = None
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        values = dict(attrs)
+        self.tag_paths.add('>'.join((self._stack + [tag])[-MAX_DEPTH:]))
+        if tag == 'a' and values.get('href'):
+            self.links.append(urljoin(self.url, values['href']))
+        elif tag == 'form':
+            self._form = {'method': (values.get('method') or 'get').lower(),
+                          'action': urljoin(self.url, values.get('action') or ''), 'fields': []}
+            self.forms.append(self._form)
+        elif tag in ('input', 'select', 'textarea', 'button') and self._form is not None:
+            field_type = values.get('type') or tag
+            if values.get('name') or field_type == 'submit':
+                self._form['fields'].append((values.get('name') or '', field_type))
+        if tag not in VOID_TAGS:
+            self._stack.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self._stack.pop()
+
+    def handle_endtag(self, tag: str):
+        if tag == 'form':
+            self._form = None
+        if tag in self._stack:
+            # Close anything left open inside it
+            while self._stack.pop() != tag:
+                pass
+
+    def site_links(self) -> List[str]:
+        """Links to the page's own host, in document order"""
+        return [link for link in self.links
+                if urlsplit(link).scheme in ('http', 'https') and urlsplit(link).netloc.lower() == self.host]
+
+    def fingerprint(self) -> str:
+        """Hash of the outline; pages differing only in text or ids share it"""
+        outline = {
+            'page': url_pattern(self.url),
+            'tags': sorted(self.tag_paths),
+            'forms': sorted([form['method'], url_pattern(form['action']), sorted(form['fields'])]
+                            for form in self.forms),
+            'links': sorted({url_pattern(link) for link in self.site_links()}),
+            'hosts': sorted({urlsplit(link).netloc.lower() for link in self.links} - {self.host, ''}),
+        }
+        return hashlib.blake2b(json.dumps(outline, sort_keys=True).encode('utf-8'), digest_size=20).hexdigest()
+
+
+class OpenAISuggester:
+    """Suggestions from an OpenAI chat model"""
+
+    def __init__(self, model: str = DEFAULT_MODEL, api_key: Optional[str] = None):
+        from openai import OpenAI
+
+        api_key = api_key or os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            raise ValueError('Set OPENAI_API_KEY environment variable.')
+        self.client = OpenAI(api_key=api_key)
+        self.model = model
+        self.name = f'openai:{model}'
+
+    def suggest(self, html: str, url: str, outline: Optional[PageOutline] = None) -> str:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": PROMPT.format(url=url) + "\n\nHTML:\n" + html[:3000]}],
+            max_tokens=100
+        )
+        return response.choices[0].message.content.strip()
+
+
+class RuleBasedSuggester:
+    """Deterministic local suggestions: submit the first form with fields, else follow the first new link"""
+
+    name = 'rules:1'
+
+    def suggest(self, html: str, url: str, outline: Optional[PageOutline] = None) -> str:
+        outline = outline or PageOutline(html, url)
+        for form in outline.forms:
+            names = [name for name, field_type in form['fields'] if name and field_type not in ('hidden', 'submit')]
+            if names:
+                values = ', '.join(f'{name}: {"test@example.com" if "mail" in name else "Test User"}'
+                                   for name in names)
+                return f'fill form with {values} and submit'
+        current = urlsplit(url).path
+        for link in outline.site_links():
+            path = urlsplit(link).path
+            if path and path != current:
+                return f'click link {path}'
+        return 'stop'
+
+
+class SuggestionCache:
+    """SQLite store of suggestions by page fingerprint, with a TTL and LRU eviction"""
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_entries: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+        # Crawl workers are threads sharing one connection
+        self.db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS suggestions ('
+            'key TEXT PRIMARY KEY, suggestion TEXT NOT NULL, '
+            'created REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        self.db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self.db.execute('SELECT suggestion, created FROM suggestions WHERE key = ?', (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                return None
+            with self.db:
+                self.db.execute('UPDATE suggestions SET last_used = ? WHERE key = ?', (now, key))
+            return row[0]
+
+    def put(self, key: str, suggestion: str):
+        now = time.time()
+        with self._lock, self.db:
+            self.db.execute('INSERT OR REPLACE INTO suggestions (key, suggestion, created, last_used) '
+                            'VALUES (?, ?, ?, ?)', (key, suggestion, now, now))
+
+    def evict(self):
+        """Drop expired entries and the least recently used ones beyond max_entries"""
+        with self._lock, self.db:
+            self.db.execute('DELETE FROM suggestions WHERE created < ?', (time.time() - self.ttl,))
+            self.db.execute(
+                'DELETE FROM suggestions WHERE key IN ('
+                ' SELECT key FROM suggestions ORDER BY last_used DESC, key LIMIT -1 OFFSET ?'
+                ')',
+                (self.max_entries,),
+            )
+
+    def entries(self) -> int:
+        with self._lock:
+            return self.db.execute('SELECT COUNT(*) FROM suggestions').fetchone()[0]
+
+    def close(self):
+        if self.db is None:
+            return
+        self.evict()
+        self.db.close()
+        self.db = None
+
+
+class CachedSuggester:
+    """A backend behind a suggestion cache; concurrent misses for one page structure share one call"""
+
+    def __init__(self, backend, cache: Optional[SuggestionCache] = None):
+        self.backend = backend
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def suggest(self, html: str, url: str) -> str:
+        with tracing.span('suggest.outline'):
+            outline = PageOutline(html, url)
+        if self.cache is None:
+            return self._ask(html, url, outline) or 'stop'
+
+        # The backend is part of the key: a model change must not reuse old answers
+        key = hashlib.blake2b(f'{self.backend.name}\0{outline.fingerprint()}'.encode('utf-8'),
+                              digest_size=20).hexdigest()
+        while True:
+            suggestion = self.cache.get(key)
+            if suggestion is not None:
+                # The stored link is a pattern; click this page's own link of that kind
+                suggestion = bind_action(suggestion, outline)
+            with self._lock:
+                if suggestion is not None:
+                    self.hits += 1
+                    tracing.count('suggest.cache_hits')
+                    return suggestion
+                waiting = self._inflight.get(key)
+                if waiting is None:
+                    self.misses += 1
+                    self._inflight[key] = threading.Event()
+                    break
+            # Another worker is asking about the same structure; use its answer
+            with tracing.span('suggest.wait_inflight'):
+                waiting.wait()
+
+        try:
+            suggestion = self._ask(html, url, outline)
+            if suggestion is not None:
+                self.cache.put(key, generalize_action(suggestion, outline))
+            return suggestion or 'stop'
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hits and misses of this run (a miss is one backend call) and the cache size"""
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': self.cache.entries() if self.cache is not None else 0}
+
+    def _ask(self, html: str, url: str, outline: PageOutline) -> Optional[str]:
+        """Backend suggestion, or None when the backend failed (failures are not cached)"""
+        tracing.count('suggest.backend_calls')
+        try:
+            with tracing.span('suggest.backend', backend=self.backend.name):
+                return self.backend.suggest(html, url, outline)
+        except Exception as e:
+            print(f"LLM error: {e}")
+            tracing.count('suggest.backend_errors')
+            return None
@@ -0,0 +1,83 @@
+"""Batch conversion of several collections"""
+
+import json
+import os
+
+import pytest
+
+from convert_postman_to_jmx import convert_batch
+
+
+def write_collection(path, name, url='http://localhost:8000/users/'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        'info': {'name': name},
+        'item': [{'name': 'List', 'request': {'method': 'GET', 'url': url}}],
+        'variable': [],
+    }), encoding='utf-8')
+    return str(path)
+
+
+def by_input(results):
+    return {os.path.basename(os.path.dirname(result['input'])) + '/' + os.path.basename(result['input']): result
+            for result in results}
+
+
+def test_same_output_name_fails_instead_of_overwriting(tmp_path):
+    first = write_collection(tmp_path / 'teamA' / 'orders.json', 'A orders')
+    second = write_collection(tmp_path / 'teamB' / 'orders.json', 'B orders')
+    other = write_collection(tmp_path / 'teamB' / 'users.json', 'B users')
+    out = tmp_path / 'plans'
+
+    results = by_input(convert_batch([first, second, other], str(out), jobs=2))
+
+    assert results['teamA/orders.json']['status'] == 'failed'
+    assert results['teamB/orders.json']['status'] == 'failed'
+    assert 'same output as' in results['teamA/orders.json']['message']
+    assert results['teamB/users.json']['status'] == 'converted'
+    assert sorted(os.listdir(out)) == ['users.jmx', 'users.jmx.settings']
+
+
+def test_directory_input_skips_environment_files(tmp_path):
+    collection = write_collection(tmp_path / 'in' / 'shop.postman_collection.json', 'Shop')
+    (tmp_path / 'in' / 'shop.postman_environment.json').write_text(json.dumps({
+        'id': '1', 'name': 'Local', 'values': [{'key': 'baseUrl', 'value': 'http://localhost:8000'}],
+        '_postman_variable_scope': 'environment',
+    }), encoding='utf-8')
+
+    results = convert_batch([str(tmp_path / 'in')], str(tmp_path / 'plans'))
+
+    assert [(result['input'], result['status']) for result in results] == [(collection, 'converted')]
+
+
+def test_second_run_skips_up_to_date_plans(tmp_path):
+    inputs = [write_collection(tmp_path / 'in' / 'users.json', 'Users'),
+              write_collection(tmp_path / 'in' / 'orders.json', 'Orders', 'http://localhost:8000/orders/')]
+    out = tmp_path / 'plans'
+    settings = {'variables': 'resolve', 'shared_config': True}
+
+    first = convert_batch(inputs, str(out), jobs=2, settings=settings)
+    assert [result['status'] for result in first] == ['converted', 'converted']
+    assert sorted(os.listdir(out)) == ['orders.jmx', 'orders.jmx.settings', 'users.jmx', 'users.jmx.settings']
+    assert '/orders/' in (out / 'orders.jmx').read_text(encoding='utf-8')
+    assert '/users/' in (out / 'users.jmx').read_text(encoding='utf-8')
+
+    second = convert_batch(inputs, str(out), jobs=2, settings=settings)
+    assert [result['status'] for result in second] == ['skipped', 'skipped']
+
+    # Same sources, different settings: the plans are stale
+    third = convert_batch(inputs, str(out), jobs=2, settings={**settings, 'shared_config': False})
+    assert [result['status'] for result in third] == ['converted', 'converted']
+
+
+def test_changed_feeder_makes_plans_stale(tmp_path):
+    collection = write_collection(tmp_path / 'in' / 'users.json', 'Users', 'http://localhost:8000/users/{{user}}/')
+    feeder = tmp_path / 'users.csv'
+    feeder.write_text('user\n1\n', encoding='utf-8')
+    settings = {'feeders': [{'path': str(feeder), 'variables': None}]}
+
+    assert convert_batch([collection], str(tmp_path / 'plans'), settings=settings)[0]['status'] == 'converted'
+    assert convert_batch([collection], str(tmp_path / 'plans'), settings=settings)[0]['status'] == 'skipped'
+    later = os.path.getmtime(tmp_path / 'plans' / 'users.jmx') + 10
+    os.utime(feeder, (later, later))
+    assert convert_batch([collection], str(tmp_path / 'plans'), settings=settings)[0]['status'] == 'converted'
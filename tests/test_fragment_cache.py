@@ -0,0 +1,64 @@
+"""Incremental re-conversion through the fragment cache"""
+
+import json
+import os
+
+import pytest
+
+from convert_postman_to_jmx import PostmanToJMeterConverter, converter_version
+from fragment_cache import FragmentCache
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'collection.json')
+
+
+@pytest.fixture
+def collection(tmp_path):
+    path = tmp_path / 'collection.json'
+    path.write_text(open(FIXTURE, encoding='utf-8').read(), encoding='utf-8')
+    return path
+
+
+def convert(collection, tmp_path, output='plan.jmx'):
+    """One conversion with a fresh cache handle on the same file; returns the output and the cache stats"""
+    with FragmentCache(str(tmp_path / 'cache.sqlite'), version=converter_version()) as cache:
+        converter = PostmanToJMeterConverter(cache=cache)
+        assert converter.convert(str(collection), str(tmp_path / output))
+        return (tmp_path / output).read_text(encoding='utf-8'), cache.stats(), converter.variables.unresolved
+
+
+def test_second_conversion_hits_the_cache(collection, tmp_path):
+    first, stats, _ = convert(collection, tmp_path, 'first.jmx')
+    assert stats['hits'] == 0
+    requests = stats['misses']
+    assert requests == 6
+
+    second, stats, _ = convert(collection, tmp_path, 'second.jmx')
+    assert (stats['hits'], stats['misses']) == (requests, 0)
+    assert second == first
+
+
+def test_changed_request_misses_the_cache(collection, tmp_path):
+    convert(collection, tmp_path, 'first.jmx')
+    data = json.loads(collection.read_text(encoding='utf-8'))
+    data['item'][1]['request']['url'] = 'https://api.example.com:8443/v2/users'
+    collection.write_text(json.dumps(data), encoding='utf-8')
+
+    output, stats, _ = convert(collection, tmp_path, 'second.jmx')
+    assert (stats['hits'], stats['misses']) == (5, 1)
+    assert '/v2/users' in output and '/v1/users' not in output
+
+
+def test_cache_hit_keeps_unresolved_variables(collection, tmp_path, capsys):
+    # Only seen while rendering the body (headers are also read by the shared config pass)
+    data = json.loads(collection.read_text(encoding='utf-8'))
+    data['item'][2]['request']['body']['formdata'][0]['value'] = '{{uploadToken}}'
+    collection.write_text(json.dumps(data), encoding='utf-8')
+
+    _, _, unresolved = convert(collection, tmp_path, 'first.jmx')
+    assert unresolved == {'token', 'uploadToken'}
+    capsys.readouterr()
+
+    _, stats, unresolved = convert(collection, tmp_path, 'second.jmx')
+    assert stats['misses'] == 0
+    assert unresolved == {'token', 'uploadToken'}
+    assert 'variables left for JMeter to resolve: token, uploadToken' in capsys.readouterr().out
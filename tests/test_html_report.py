@@ -0,0 +1,20 @@
+"""Timeline bucketing of the HTML report"""
+
+from html_report import Timeline
+
+DAY = 24 * 3600 * 1000
+
+
+def test_timeline_series_stays_bounded_across_a_long_gap():
+    timeline = Timeline(max_buckets=4000)
+    start = 1700000000000
+    timeline.add_rows([[str(start), '12', 'home', 'true'], [str(start + 30 * DAY), '15', 'home', 'false']],
+                       ['timeStamp', 'elapsed', 'label', 'success'])
+
+    series = timeline.series()
+
+    assert len(series['throughput']) <= 4000
+    assert len(series['mean']) == 2
+    # The gap still reads as no traffic, and the last sample keeps its place in time
+    assert series['throughput'][1][1] == 0.0
+    assert abs(series['mean'][-1][0] - 30 * DAY / 1000) <= timeline.width / 1000
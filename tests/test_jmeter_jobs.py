@@ -0,0 +1,210 @@
+"""JobManager driven by a shell stub in place of the Docker JMeter engine"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+import jmeter_jobs
+from jmeter_jobs import JobManager, template_command
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='needs a POSIX shell')
+
+# Sleeps for the number of seconds written in the "plan", then writes a results file
+STUB = '''#!/bin/sh
+echo "starting $1"
+sleep "$(cat "$1")"
+printf 'timeStamp,elapsed,label,success\\n1700000000000,12,home,true\\n1700000000100,15,home,true\\n' > "$2"
+echo done
+'''
+
+
+@pytest.fixture
+def stub(tmp_path):
+    path = tmp_path / 'jmeter.sh'
+    path.write_text(STUB)
+    path.chmod(0o755)
+    return template_command(f'{path} {{jmx_path}} {{results_path}}')
+
+
+def plan(tmp_path, name, seconds):
+    path = tmp_path / f'{name}.jmx'
+    path.write_text(str(seconds))
+    return str(path)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_job_runs_to_completion(tmp_path, stub):
+    async def scenario():
+        manager = JobManager(command=stub)
+        job = manager.submit(plan(tmp_path, 'a', 0), str(tmp_path / 'out' / 'a.csv'))
+        await manager.wait(job.id)
+        return job
+
+    job = run(scenario())
+    assert job.status == 'succeeded'
+    assert job.returncode == 0
+    assert list(job.stdout)[-1] == 'done'
+    assert job.samples == 2
+
+
+def test_jobs_queue_past_the_concurrency_limit(tmp_path, stub):
+    async def scenario():
+        manager = JobManager(max_concurrent=1, command=stub)
+        first = manager.submit(plan(tmp_path, 'a', 0.5), str(tmp_path / 'a.csv'))
+        second = manager.submit(plan(tmp_path, 'b', 0), str(tmp_path / 'b.csv'))
+        third = manager.submit(plan(tmp_path, 'c', 0), str(tmp_path / 'c.csv'))
+        await asyncio.sleep(0.2)
+        states = [first.status, second.status, third.status]
+        positions = [manager.queue_position(job) for job in (first, second, third)]
+        await asyncio.gather(*(manager.wait(job.id) for job in (first, second, third)))
+        return states, positions, first, second, third
+
+    states, positions, first, second, third = run(scenario())
+    assert states == ['running', 'queued', 'queued']
+    assert positions == [0, 0, 1]
+    assert [job.status for job in (first, second, third)] == ['succeeded'] * 3
+    # Queued jobs start in submission order, each after the previous one finished
+    assert first.finished <= second.started <= third.started
+
+
+def test_semaphore_bounds_running_jobs(tmp_path, stub):
+    async def scenario():
+        manager = JobManager(max_concurrent=2, command=stub)
+        jobs = [manager.submit(plan(tmp_path, str(n), 0.3), str(tmp_path / f'{n}.csv')) for n in range(5)]
+        most = 0
+        while not all(job.done.is_set() for job in jobs):
+            most = max(most, sum(job.status == 'running' for job in jobs))
+            await asyncio.sleep(0.02)
+        return most, jobs
+
+    most, jobs = run(scenario())
+    assert most == 2
+    assert all(job.status == 'succeeded' for job in jobs)
+
+
+def test_submit_refuses_the_results_file_of_an_unfinished_job(tmp_path, stub):
+    async def scenario():
+        manager = JobManager(max_concurrent=2, command=stub)
+        first = manager.submit(plan(tmp_path, 'a', 0.2), str(tmp_path / 'results.csv'))
+        with pytest.raises(ValueError, match=first.id):
+            manager.submit(plan(tmp_path, 'b', 0), os.path.join(str(tmp_path), '.', 'results.csv'))
+        await manager.wait(first.id)
+        # Free again once the first job finished
+        second = manager.submit(plan(tmp_path, 'b', 0), str(tmp_path / 'results.csv'))
+        await manager.wait(second.id)
+        return first, second, manager
+
+    first, second, manager = run(scenario())
+    assert [first.status, second.status] == ['succeeded', 'succeeded']
+    assert len(manager.list()) == 2
+
+
+def test_group_waits_until_all_its_runs_can_start(tmp_path, stub):
+    async def scenario():
+        manager = JobManager(max_concurrent=2, command=stub)
+        single = manager.submit(plan(tmp_path, 'a', 0.4), str(tmp_path / 'a.csv'))
+        group = manager.submit_group([(plan(tmp_path, f'e{n}', 0.1), str(tmp_path / f'e{n}.csv')) for n in (1, 2)])
+        await asyncio.sleep(0.2)
+        states = [job.status for job in group]
+        await asyncio.gather(*(manager.wait(job.id) for job in [single] + group))
+        return states, single, group
+
+    states, single, group = run(scenario())
+    # One slot was free, but the group only starts once it can take both
+    assert states == ['queued', 'queued']
+    assert all(job.status == 'succeeded' for job in group)
+    assert all(job.started >= single.finished for job in group)
+
+
+def test_group_larger_than_the_limit_is_rejected(tmp_path, stub):
+    async def scenario():
+        manager = JobManager(max_concurrent=1, command=stub)
+        with pytest.raises(ValueError, match='cannot start together'):
+            manager.submit_group([(plan(tmp_path, f'e{n}', 0), str(tmp_path / f'e{n}.csv')) for n in (1, 2)])
+        return manager
+
+    assert run(scenario()).list() == []
+
+
+def test_cancel_queued_job(tmp_path, stub):
+    async def scenario():
+        manager = JobManager(max_concurrent=1, command=stub)
+        running = manager.submit(plan(tmp_path, 'a', 0.5), str(tmp_path / 'a.csv'))
+        queued = manager.submit(plan(tmp_path, 'b', 0), str(tmp_path / 'b.csv'))
+        await asyncio.sleep(0.1)
+        await manager.cancel(queued.id)
+        await manager.wait(running.id)
+        return running, queued
+
+    running, queued = run(scenario())
+    assert queued.status == 'cancelled'
+    assert queued.started is None
+    assert queued.done.is_set()
+    assert not os.path.exists(queued.results_path)
+    assert running.status == 'succeeded'
+
+
+def test_cancel_running_job(tmp_path, stub):
+    async def scenario():
+        manager = JobManager(command=stub)
+        job = manager.submit(plan(tmp_path, 'a', 30), str(tmp_path / 'a.csv'))
+        await asyncio.sleep(0.3)
+        status = job.status
+        started = asyncio.get_running_loop().time()
+        await manager.cancel(job.id)
+        return status, asyncio.get_running_loop().time() - started, job
+
+    status, seconds, job = run(scenario())
+    assert status == 'running'
+    assert job.status == 'cancelled'
+    assert job.returncode is not None and job.returncode != 0
+    assert seconds < 10
+
+
+def test_cancel_while_the_process_starts(tmp_path, stub, monkeypatch):
+    spawn = asyncio.create_subprocess_exec
+
+    async def slow_spawn(*args, **kwargs):
+        await asyncio.sleep(0.3)
+        return await spawn(*args, **kwargs)
+
+    monkeypatch.setattr(jmeter_jobs.asyncio, 'create_subprocess_exec', slow_spawn)
+
+    async def scenario():
+        manager = JobManager(command=stub)
+        job = manager.submit(plan(tmp_path, 'a', 30), str(tmp_path / 'a.csv'))
+        await asyncio.sleep(0.1)
+        state = (job.status, job._process)
+        started = asyncio.get_running_loop().time()
+        await manager.cancel(job.id)
+        return state, asyncio.get_running_loop().time() - started, job
+
+    state, seconds, job = run(scenario())
+    assert state == ('running', None)
+    assert job.status == 'cancelled'
+    assert job.returncode is not None and job.returncode != 0
+    assert seconds < 10
+
+
+def test_wait_returns_on_timeout_and_job_keeps_running(tmp_path, stub):
+    async def scenario():
+        manager = JobManager(command=stub)
+        job = manager.submit(plan(tmp_path, 'a', 0.6), str(tmp_path / 'a.csv'))
+        await manager.wait(job.id, timeout=0.1)
+        status = job.status
+        await manager.wait(job.id, timeout=10)
+        return status, job
+
+    status, job = run(scenario())
+    assert status == 'running'
+    assert job.status == 'succeeded'
+
+
+def test_unknown_job(tmp_path, stub):
+    with pytest.raises(ValueError):
+        JobManager(command=stub).get('missing')
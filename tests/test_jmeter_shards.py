@@ -0,0 +1,127 @@
+"""Sharded runs: per-engine plans and merged results"""
+
+import asyncio
+import csv
+import os
+import stat
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from jmeter_jobs import JobManager, template_command
+import jmeter_shards
+from jmeter_shards import run_sharded, shard_plan
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='engine stub is a shell script')
+
+PLAN = """<?xml version="1.0" encoding="UTF-8"?>
+<jmeterTestPlan version="1.2">
+  <hashTree>
+    <ThreadGroup testname="Users">
+      <stringProp name="ThreadGroup.num_threads">5</stringProp>
+    </ThreadGroup>
+    <hashTree>
+      <CSVDataSet testname="Feeder">
+        <stringProp name="filename">data/users.csv</stringProp>
+      </CSVDataSet>
+      <hashTree/>
+    </hashTree>
+  </hashTree>
+</jmeterTestPlan>
+"""
+
+# Fails unless the plan's CSV Data Set file resolves against the plan's directory, as in JMeter
+STUB = """#!/bin/sh
+file=$(sed -n 's|.*<stringProp name="filename">\\(.*\\)</stringProp>.*|\\1|p' "$1")
+threads=$(sed -n 's|.*<stringProp name="ThreadGroup.num_threads">\\(.*\\)</stringProp>.*|\\1|p' "$1")
+test -f "$(dirname "$1")/$file" || { echo "missing $file" >&2; exit 3; }
+printf 'timeStamp,elapsed,label,success,threadName\\n' > "$2"
+i=0
+while [ $i -lt $threads ]; do
+  printf '%s,5,Get,true,Users 1-%s\\n' $((1000 + i)) $((i + 1)) >> "$2"
+  i=$((i + 1))
+done
+"""
+
+
+@pytest.fixture
+def plan(tmp_path):
+    plans = tmp_path / 'plans'
+    (plans / 'data').mkdir(parents=True)
+    (plans / 'data' / 'users.csv').write_text('user\nann\n', encoding='utf-8')
+    path = plans / 'plan.jmx'
+    path.write_text(PLAN, encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def stub(tmp_path):
+    path = tmp_path / 'engine.sh'
+    path.write_text(STUB, encoding='utf-8')
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return template_command(f'{path} {{jmx_path}} {{results_path}}')
+
+
+def test_shard_plan_splits_threads(plan, tmp_path):
+    paths = shard_plan(str(plan), 2, str(tmp_path / 'plan.run'))
+    assert [os.path.basename(path) for path in paths] == ['plan.run.engine1.jmx', 'plan.run.engine2.jmx']
+    shares = [open(path, encoding='utf-8').read().count('>3<') for path in paths]
+    assert shares == [1, 0]
+
+
+def test_shard_plan_keeps_setup_and_teardown_groups_whole(tmp_path):
+    path = tmp_path / 'plan.jmx'
+    path.write_text(PLAN.replace('<hashTree>\n    <ThreadGroup', """<hashTree>
+    <SetupThreadGroup testname="Login">
+      <stringProp name="ThreadGroup.num_threads">1</stringProp>
+    </SetupThreadGroup>
+    <hashTree/>
+    <PostThreadGroup testname="Cleanup">
+      <stringProp name="ThreadGroup.num_threads">2</stringProp>
+    </PostThreadGroup>
+    <hashTree/>
+    <ThreadGroup""", 1), encoding='utf-8')
+
+    paths = shard_plan(str(path), 2, str(tmp_path / 'plan.run'))
+
+    for engine in paths:
+        root = ET.parse(engine).getroot()
+        assert root.find('.//SetupThreadGroup/stringProp').text == '1'
+        assert root.find('.//PostThreadGroup/stringProp').text == '2'
+    assert [ET.parse(engine).getroot().find('.//ThreadGroup/stringProp').text for engine in paths] == ['3', '2']
+
+
+def test_sharded_run_keeps_relative_paths_working(plan, stub, tmp_path):
+    results = tmp_path / 'out' / 'results.csv'
+    manager = JobManager(max_concurrent=2, command=stub)
+
+    result = asyncio.run(run_sharded(str(plan), str(results), 2, manager))
+
+    assert [engine['status'] for engine in result['engines']] == ['succeeded', 'succeeded']
+    assert sorted(os.listdir(plan.parent)) == ['data', 'plan.jmx', 'plan.results.engine1.jmx',
+                                               'plan.results.engine2.jmx']
+    assert result['samples'] == 5
+    with open(results, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert sorted(row['threadName'] for row in rows) == ['engine1-Users 1-1', 'engine1-Users 1-2', 'engine1-Users 1-3',
+                                                        'engine2-Users 1-1', 'engine2-Users 1-2']
+
+
+def test_merge_closes_engine_files_when_columns_differ(tmp_path, monkeypatch):
+    first = tmp_path / 'results.engine1.csv'
+    first.write_text('timeStamp,elapsed,label\n1000,5,Get\n', encoding='utf-8')
+    second = tmp_path / 'results.engine2.csv'
+    second.write_text('timeStamp,label\n1000,Get\n', encoding='utf-8')
+    opened = []
+
+    def tracking_open(*args, **kwargs):
+        opened.append(open(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(jmeter_shards, 'open', tracking_open, raising=False)
+
+    with pytest.raises(ValueError, match='different columns'):
+        jmeter_shards.merge_results([str(first), str(second)], str(tmp_path / 'results.csv'))
+    assert len(opened) == 2
+    assert all(f.closed for f in opened)
@@ -0,0 +1,61 @@
+"""The streaming writer against the minidom pretty-printing it replaced"""
+
+import json
+import os
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+
+import pytest
+
+from convert_postman_to_jmx import PostmanToJMeterConverter
+from jmx_writer import JMXWriter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = [os.path.join(HERE, 'fixtures', 'collection.json'),
+            os.path.join(HERE, '..', 'data', 'output', 'sample.postman_collection.json')]
+
+
+def prettify(root: ET.Element) -> str:
+    """The converter's old output: minidom's toprettyxml with blank lines removed"""
+    xml_str = minidom.parseString(ET.tostring(root, encoding='unicode')).toprettyxml(indent='  ')
+    return '\n'.join([line for line in xml_str.split('\n') if line.strip()])
+
+
+def minidom_plan(path: str, variable_mode: str) -> str:
+    """Build the whole plan in memory, as the converter did before streaming"""
+    with open(path, 'r', encoding='utf-8') as f:
+        collection = json.load(f)
+    converter = PostmanToJMeterConverter(variable_mode=variable_mode, shared_config=False)
+    converter.set_collection_variables(collection)
+    converter.create_jmx_structure(collection['info']['name'])
+    converter.add_user_defined_variables(converter.variables.user_defined_variables())
+    thread_group_tree = converter.add_thread_group(f"{collection['info']['name']} - Thread Group")
+    converter.process_items(collection['item'], thread_group_tree)
+    return prettify(converter.jmx_root)
+
+
+@pytest.mark.parametrize('variable_mode', ['resolve', 'jmeter'])
+@pytest.mark.parametrize('fixture', FIXTURES, ids=os.path.basename)
+def test_streamed_plan_matches_minidom_output(tmp_path, fixture, variable_mode):
+    output = tmp_path / 'plan.jmx'
+    converter = PostmanToJMeterConverter(variable_mode=variable_mode, shared_config=False)
+    assert converter.convert(fixture, str(output))
+
+    assert output.read_text(encoding='utf-8') == minidom_plan(fixture, variable_mode)
+
+
+def test_writer_matches_minidom_for_nested_elements(tmp_path):
+    root = ET.Element('root', {'a': 'x & "y" <z>'})
+    tree = ET.SubElement(root, 'hashTree')
+    ET.SubElement(tree, 'stringProp', {'name': 'n'}).text = 'line one\n\n   \nline two & <three>'
+    ET.SubElement(tree, 'boolProp', {'name': 'empty'})
+    ET.SubElement(tree, 'hashTree')
+    ET.SubElement(tree, 'stringProp', {'name': 'crlf'}).text = 'a\r\nb\rc'
+
+    path = tmp_path / 'out.xml'
+    with open(path, 'w', encoding='utf-8') as f:
+        writer = JMXWriter(f)
+        writer.write(root)
+        writer.close()
+
+    assert path.read_text(encoding='utf-8') == prettify(root)
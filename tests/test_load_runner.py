@@ -0,0 +1,120 @@
+"""The native load runner against a local http.server stub"""
+
+import asyncio
+import csv
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from feeders import Feeder
+from load_profiles import LoadProfile
+from load_runner import LoadRunner, load_requests
+from results_analyzer import DEFAULT_FIELDS
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """200 for /ok/..., 404 for anything else; remembers every path it served"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        status = 200 if self.path.startswith('/ok/') else 404
+        body = b'{"ok": true}' if status == 200 else b'not found'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    httpd.paths = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def write_collection(tmp_path, port):
+    status_test = [{'listen': 'test', 'script': {'exec': ['pm.response.to.have.status(200)']}}]
+    collection = {
+        'info': {'name': 'Stub'},
+        'item': [
+            {'name': 'User', 'request': {'method': 'GET', 'url': f'http://127.0.0.1:{port}/ok/{{{{user}}}}'},
+             'event': status_test},
+            {'name': 'Missing', 'request': {'method': 'GET', 'url': f'http://127.0.0.1:{port}/missing/'},
+             'event': status_test},
+        ],
+        'variable': [],
+    }
+    path = tmp_path / 'collection.json'
+    path.write_text(json.dumps(collection), encoding='utf-8')
+    return str(path)
+
+
+def read_results(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def test_runner_writes_jmeter_samples(server, tmp_path):
+    feeder_path = tmp_path / 'users.csv'
+    feeder_path.write_text('user\nann\nbob\n', encoding='utf-8')
+    feeder = Feeder(str(feeder_path))
+    _, requests = load_requests(write_collection(tmp_path, server.server_port), feeders=[feeder])
+    results_path = str(tmp_path / 'results.csv')
+
+    runner = LoadRunner(requests, results_path, LoadProfile(threads=1, loops=3), [feeder], 'Stub - Thread Group')
+    result = asyncio.run(runner.run())
+
+    rows = read_results(results_path)
+    assert rows[0] == DEFAULT_FIELDS
+    samples = [dict(zip(rows[0], row)) for row in rows[1:]]
+    assert len(samples) == result['samples'] == 6
+    assert all(len(row) == len(DEFAULT_FIELDS) for row in rows)
+    assert result['connections']['opened'] == 1
+
+    users = [sample for sample in samples if sample['label'] == 'User']
+    assert [sample['success'] for sample in users] == ['true'] * 3
+    assert [sample['responseCode'] for sample in users] == ['200'] * 3
+    assert all(sample['threadName'] == 'Stub - Thread Group 1-1' for sample in samples)
+    assert all(int(sample['elapsed']) >= 0 and int(sample['timeStamp']) > 0 for sample in samples)
+
+    # The feeder moves on one row per iteration and starts over at the end of the file
+    assert [path for path in server.paths if path.startswith('/ok/')] == ['/ok/ann', '/ok/bob', '/ok/ann']
+
+
+def test_assertion_failures_fail_samples(server, tmp_path):
+    _, requests = load_requests(write_collection(tmp_path, server.server_port))
+    results_path = str(tmp_path / 'results.csv')
+
+    result = asyncio.run(LoadRunner(requests, results_path, LoadProfile(threads=2, ramp_up=0, loops=2)).run())
+
+    samples = [dict(zip(DEFAULT_FIELDS, row)) for row in read_results(results_path)[1:]]
+    missing = [sample for sample in samples if sample['label'] == 'Missing']
+    assert len(missing) == 4
+    assert all(sample['success'] == 'false' and sample['responseCode'] == '404' for sample in missing)
+    assert all(sample['failureMessage'] == 'Response Code: expected 200, received 404' for sample in missing)
+    assert result['summary']['total']['errors'] == 4
+
+
+def test_connection_errors_are_failed_samples(tmp_path):
+    with ThreadingHTTPServer(('127.0.0.1', 0), StubHandler) as httpd:
+        port = httpd.server_port
+    _, requests = load_requests(write_collection(tmp_path, port))
+    results_path = str(tmp_path / 'results.csv')
+
+    asyncio.run(LoadRunner(requests[:1], results_path, timeout=5).run())
+
+    sample = dict(zip(DEFAULT_FIELDS, read_results(results_path)[1]))
+    assert sample['success'] == 'false'
+    assert sample['responseCode'].startswith('Non HTTP response code: ')
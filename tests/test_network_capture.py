@@ -0,0 +1,48 @@
+"""Idle detection of the network capture, fed with performance log entries"""
+
+import json
+
+from network_capture import NetworkCapture
+
+
+class Browser:
+    """Stands in for a WebDriver: get_log returns whatever was queued since the last call"""
+
+    def __init__(self):
+        self.log = []
+
+    def event(self, method, **params):
+        self.log.append({'message': json.dumps({'message': {'method': method, 'params': params}})})
+
+    def get_log(self, kind):
+        entries, self.log = self.log, []
+        return entries
+
+
+def test_only_request_lifecycle_events_count_as_activity():
+    browser = Browser()
+    capture = NetworkCapture(browser, ['app.test'])
+    browser.event('Network.requestWillBeSent', requestId='1', type='XHR',
+                  request={'url': 'http://app.test/api/users', 'method': 'GET', 'headers': {}})
+    browser.event('Network.dataReceived', requestId='1', dataLength=100)
+    browser.event('Page.frameNavigated', frame={})
+    assert capture.drain() == 1
+
+    browser.event('Network.dataReceived', requestId='1', dataLength=100)
+    browser.event('Page.loadEventFired', timestamp=1.0)
+    assert capture.drain() == 0
+    assert capture.busy()
+
+    browser.event('Network.loadingFinished', requestId='1')
+    assert capture.drain() == 1
+    assert not capture.busy()
+
+
+def test_page_events_do_not_keep_the_page_busy():
+    browser = Browser()
+    # Timers and animations keep logging page events, but no request starts
+    browser.get_log = lambda kind: [{'message': json.dumps({'message': {'method': 'Page.lifecycleEvent',
+                                                                        'params': {}}})}]
+    capture = NetworkCapture(browser, ['app.test'])
+
+    assert capture.wait_for_idle(quiet=0.1, timeout=2.0, poll=0.01)
@@ -0,0 +1,57 @@
+"""Percentile accuracy of the latency histograms"""
+
+import math
+import random
+
+import pytest
+
+from results_analyzer import PERCENTILES, LatencyHistogram
+
+DISTRIBUTIONS = {
+    'uniform': lambda rng: rng.randint(0, 120000),
+    'lognormal': lambda rng: int(rng.lognormvariate(5, 1.5)),
+    'bimodal': lambda rng: int(rng.gauss(40, 5)) if rng.random() < 0.9 else int(rng.gauss(3000, 400)),
+    'heavy_tail': lambda rng: int(rng.paretovariate(1.2) * 20),
+}
+
+
+def exact_percentile(ordered, p):
+    """Nearest-rank percentile of sorted values"""
+    return ordered[max(1, math.ceil(len(ordered) * p / 100)) - 1]
+
+
+@pytest.mark.parametrize('name', sorted(DISTRIBUTIONS))
+def test_percentiles_within_relative_error(name):
+    rng = random.Random(name)
+    values = [max(0, DISTRIBUTIONS[name](rng)) for _ in range(50000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    ordered = sorted(values)
+    for p in PERCENTILES + (0.1, 1, 25, 75, 100):
+        exact = exact_percentile(ordered, p)
+        assert abs(histogram.percentile(p) - exact) <= 0.01 * exact, (p, exact)
+    assert (histogram.min, histogram.max, histogram.count) == (ordered[0], ordered[-1], len(values))
+
+
+def test_small_values_are_exact():
+    values = list(range(128)) * 3
+    histogram = LatencyHistogram()
+    histogram.record_many(values)
+    ordered = sorted(values)
+    for p in range(1, 101):
+        assert histogram.percentile(p) == exact_percentile(ordered, p)
+
+
+def test_merged_histograms_match_one_histogram():
+    rng = random.Random(7)
+    values = [int(rng.lognormvariate(6, 1)) for _ in range(20000)]
+    whole, merged = LatencyHistogram(), LatencyHistogram()
+    whole.record_many(values)
+    for start in range(0, len(values), 5000):
+        part = LatencyHistogram()
+        part.record_many(values[start:start + 5000])
+        merged.merge(LatencyHistogram.from_dict(part.to_dict()))
+
+    assert merged.summary() == whole.summary()
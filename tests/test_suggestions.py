@@ -0,0 +1,59 @@
+"""Cached crawler suggestions and their reuse across pages of one structure"""
+
+import pytest
+
+from suggestions import CachedSuggester, PageOutline, RuleBasedSuggester, SuggestionCache, bind_action, generalize_action
+
+DETAIL = """<html><body><h1>User {pk}</h1>
+<a href="/users/{pk}/update/">Edit</a> <a href="https://docs.example.org/help">Help</a>
+</body></html>"""
+
+
+class CountingSuggester(RuleBasedSuggester):
+    name = 'counting'
+
+    def __init__(self):
+        self.calls = 0
+
+    def suggest(self, html, url, outline=None):
+        self.calls += 1
+        return super().suggest(html, url, outline)
+
+
+@pytest.fixture
+def suggester(tmp_path):
+    cache = SuggestionCache(str(tmp_path / 'suggestions.sqlite'))
+    yield CachedSuggester(CountingSuggester(), cache)
+    cache.close()
+
+
+def page(pk):
+    return DETAIL.format(pk=pk), f'http://localhost:8000/users/{pk}/'
+
+
+def test_cached_link_is_bound_to_the_current_page(suggester):
+    assert suggester.suggest(*page(3)) == 'click link /users/3/update/'
+    assert suggester.suggest(*page(5)) == 'click link /users/5/update/'
+    assert suggester.suggest(*page(3)) == 'click link /users/3/update/'
+    assert (suggester.backend.calls, suggester.hits, suggester.misses) == (1, 2, 1)
+
+
+def test_cache_stores_the_link_pattern(suggester):
+    suggester.suggest(*page(3))
+    assert [row[0] for row in suggester.cache.db.execute('SELECT suggestion FROM suggestions')] == \
+        ['click link /users/{id}/update/']
+
+
+def test_generalize_and_bind():
+    outline = PageOutline(*page(7))
+    assert generalize_action('Click link "/users/7/update/" to edit', outline) == \
+        'Click link "/users/{id}/update/" to edit'
+    assert bind_action('Click link "/users/{id}/update/" to edit', outline) == 'Click link "/users/7/update/" to edit'
+    # Other hosts, plain paths and other actions stay as they are
+    assert generalize_action('click link https://docs.example.org/help', outline) == \
+        'click link https://docs.example.org/help'
+    assert bind_action('click link /users/', outline) == 'click link /users/'
+    assert bind_action('fill form with name: Test User and submit', outline) == \
+        'fill form with name: Test User and submit'
+    # No link of that kind on this page: not reusable
+    assert bind_action('click link /groups/{id}/', outline) is None
@@ -0,0 +1,34 @@
+"""Variable translation in "resolve" and "jmeter" mode"""
+
+from variables import VariableResolver
+
+VALUES = {'baseUrl': 'https://postman-echo.com', 'api': 'http://{{host}}:8080/api/', 'host': 'localhost',
+          'name': 'Ann'}
+
+
+def test_jmeter_mode_declares_base_url_parts():
+    variables = VariableResolver(VALUES, mode='jmeter').user_defined_variables()
+    assert variables['baseUrl'] == 'https://postman-echo.com'
+    assert [variables[f'baseUrl_{part}'] for part in ('protocol', 'host', 'port', 'path')] == \
+        ['https', 'postman-echo.com', '443', '']
+    assert [variables[f'api_{part}'] for part in ('protocol', 'host', 'port', 'path')] == \
+        ['http', '${host}', '8080', '/api']
+    assert 'name_host' not in variables
+
+
+def test_split_base_url_only_for_url_variables_in_jmeter_mode():
+    resolver = VariableResolver(VALUES, mode='jmeter')
+    parts, rest = resolver.split_base_url('{{baseUrl}}/get')
+    assert parts == {'protocol': '${baseUrl_protocol}', 'host': '${baseUrl_host}', 'port': '${baseUrl_port}',
+                     'path': '${baseUrl_path}'}
+    assert rest == '/get'
+    assert resolver.split_base_url('{{name}}/get') is None
+    assert resolver.split_base_url('{{unknown}}/get') is None
+    assert VariableResolver(VALUES).split_base_url('{{baseUrl}}/get') is None
+
+
+def test_resolve_mode_substitutes_values():
+    resolver = VariableResolver(VALUES)
+    assert resolver.replace('{{api}}users/{{missing}}') == 'http://localhost:8080/api/users/${missing}'
+    assert resolver.unresolved == {'missing'}
+    assert resolver.user_defined_variables() == {}
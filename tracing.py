@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Timing instrumentation
+Named spans and counters around the stages of the converter, the MCP server
+and the crawler, written as one JSON trace file per run (one conversion, one
+tool call, one crawl). Each file holds a per-stage summary (count, total and
+self time, i.e. time not spent in nested spans) and the individual spans in
+Chrome's trace event format, so it also opens in Perfetto or chrome://tracing.
+
+Nothing is recorded unless a run is started with trace_run and a directory
+(or with collect, which keeps the trace in memory, as the benchmark does);
+otherwise span() hands back a shared no-op object. The current run and span
+live in context variables, so concurrent server tool calls, asyncio tasks and
+threads started with a copied context (see crawl_pool.py) each report to
+their own run. Stages of parallel workers are summed, so their totals can
+exceed the run's duration.
+
+Optional capture modes:
+- cpu: cProfile of the thread that started the run (and of threads wrapped in
+  profile_thread); the top functions go into the trace, the full profile to
+  a .prof file next to it
+- memory: tracemalloc peak and top allocation sites
+"""
+
+import argparse
+import contextvars
+import cProfile
+import io
+import itertools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+PROFILE_MODES = ('cpu', 'memory', 'all')
+# Spans kept as individual events per run; later ones only count in the summary
+MAX_EVENTS = 100000
+# Functions / allocation sites listed in a trace
+TOP_ENTRIES = 30
+# Stack depth tracemalloc keeps per allocation
+MEMORY_FRAMES = 5
+
+_tracer: contextvars.ContextVar = contextvars.ContextVar('tracer', default=None)
+_span: contextvars.ContextVar = contextvars.ContextVar('span', default=None)
+_sequence = itertools.count(1)
+
+
+class _NullSpan:
+    """Stand-in for a span while nothing is traced"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed stage; nested spans subtract from their parent's self time"""
+
+    def __init__(self, tracer: 'Tracer', name: str, attrs: Dict[str, Any], event: bool = True):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.event = event
+        self.children = 0.0
+        self.parent: Optional['Span'] = None
+        self.start = 0.0
+        self._token = None
+
+    def __enter__(self):
+        self.parent = _span.get()
+        self._token = _span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        _span.reset(self._token)
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        duration = end - self.start
+        if self.parent is not None and self.parent.tracer is self.tracer:
+            self.parent.children += duration
+        self.tracer.add(self.name, self.start, duration, duration - self.children, self.attrs, self.event)
+        return False
+
+    def set(self, **attrs):
+        """Attach details known only once the stage is under way"""
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Spans, counters and optional profiles of one run"""
+
+    def __init__(self, name: str, profile: Optional[str] = None, attrs: Optional[Dict[str, Any]] = None):
+        if profile is not None and profile not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{profile}' (use {', '.join(PROFILE_MODES)})")
+        self.name = name
+        self.profile = profile
+        self.attrs = dict(attrs or {})
+        self.status = 'ok'
+        self.counters: Dict[str, float] = {}
+        # span name -> [count, total, self, max] in seconds
+        self.stages: Dict[str, List[float]] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self.threads: Dict[int, str] = {}
+        self.started = 0.0
+        self.duration: Optional[float] = None
+        self.path: Optional[str] = None
+        self._origin = 0.0
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+        self._profiler: Optional[cProfile.Profile] = None
+        self._own_tracemalloc = False
+        self._memory: Optional[Dict[str, Any]] = None
+
+    @property
+    def cpu(self) -> bool:
+        return self.profile in ('cpu', 'all')
+
+    @property
+    def memory(self) -> bool:
+        return self.profile in ('memory', 'all')
+
+    def start(self):
+        self.started = time.time()
+        self._origin = time.perf_counter()
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(MEMORY_FRAMES)
+                self._own_tracemalloc = True
+            else:
+                tracemalloc.reset_peak()
+        if self.cpu:
+            self._profiler = self.start_profiler()
+
+    def start_profiler(self) -> Optional[cProfile.Profile]:
+        """Profile the calling thread until stop_profiler (None if another profiler is active)"""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None
+        return profiler
+
+    def stop_profiler(self, profiler: Optional[cProfile.Profile]):
+        if profiler is None:
+            return
+        profiler.disable()
+        with self._lock:
+            self._profiles.append(profiler)
+
+    def stop(self):
+        self.duration = time.perf_counter() - self._origin
+        self.stop_profiler(self._profiler)
+        self._profiler = None
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if self._own_tracemalloc:
+                tracemalloc.stop()
+            top = snapshot.statistics('lineno')[:TOP_ENTRIES]
+            self._memory = {
+                'current_bytes': current,
+                'peak_bytes': peak,
+                'top': [{'location': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+                         'bytes': stat.size, 'blocks': stat.count} for stat in top],
+            }
+
+    def span(self, name: str, **attrs) -> Span:
+        return Span(self, name, attrs)
+
+    def add(self, name: str, start: float, duration: float, self_time: Optional[float] = None,
+            attrs: Optional[Dict[str, Any]] = None, event: bool = True):
+        """Record a finished stage (start is a perf_counter value); event=False only updates the summary"""
+        if self.duration is not None:
+            return  # the run is over; late spans of background work are dropped
+        self_time = duration if self_time is None else self_time
+        thread = threading.current_thread()
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                self.stages[name] = [1, duration, self_time, duration]
+            else:
+                stage[0] += 1
+                stage[1] += duration
+                stage[2] += self_time
+                if duration > stage[3]:
+                    stage[3] = duration
+            if not event:
+                return
+            if len(self.events) >= MAX_EVENTS:
+                self.dropped += 1
+                return
+            self.threads.setdefault(thread.ident, thread.name)
+            event = {'name': name, 'ph': 'X', 'ts': round((start - self._origin) * 1e6, 1),
+                     'dur': round(duration * 1e6, 1), 'pid': os.getpid(), 'tid': thread.ident}
+            if attrs:
+                event['args'] = {key: value if isinstance(value, (str, int, float, bool)) or value is None
+                                 else str(value) for key, value in attrs.items()}
+            self.events.append(event)
+
+    def count(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Stages by self time, largest first"""
+        total = self.duration or 0.0
+        rows = [{'name': name, 'count': int(count), 'total': round(spent, 6), 'self': round(own, 6),
+                 'max': round(longest, 6), 'self_share': round(own / total, 4) if total else 0.0}
+                for name, (count, spent, own, longest) in self.stages.items()]
+        return sorted(rows, key=lambda row: -row['self'])
+
+    def _cpu_profile(self, prof_path: str) -> Optional[Dict[str, Any]]:
+        if not self._profiles:
+            return None
+        stats = pstats.Stats(self._profiles[0], stream=io.StringIO())
+        for profiler in self._profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(prof_path)
+        top = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in sorted(
+                stats.stats.items(), key=lambda entry: -entry[1][3])[:TOP_ENTRIES]:
+            top.append({'function': f'{filename}:{line}({function})', 'calls': calls,
+                        'self': round(own, 6), 'cumulative': round(cumulative, 6)})
+        return {'file': prof_path, 'threads': len(self._profiles), 'top': top}
+
+    def to_dict(self, prof_path: Optional[str] = None) -> Dict[str, Any]:
+        profile: Dict[str, Any] = {}
+        if self.cpu and prof_path:
+            profile['cpu'] = self._cpu_profile(prof_path)
+        if self._memory is not None:
+            profile['memory'] = self._memory
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': ident, 'args': {'name': name}}
+                    for ident, name in self.threads.items()]
+        return {
+            'name': self.name,
+            'attrs': self.attrs,
+            'status': self.status,
+            'started': self.started,
+            'duration': round(self.duration or 0.0, 6),
+            'pid': os.getpid(),
+            'summary': self.summary(),
+            'counters': self.counters,
+            'dropped_events': self.dropped,
+            'profile': profile,
+            'displayTimeUnit': 'ms',
+            'traceEvents': metadata + self.events,
+        }
+
+    def write(self, directory: str) -> str:
+        """Write the trace as <directory>/<name>-<time>-<pid>-<n>.json"""
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))
+        base = os.path.join(directory, f'{self.name}-{stamp}-{os.getpid()}-{next(_sequence)}')
+        data = self.to_dict(base + '.prof' if self.cpu else None)
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        self.path = base + '.json'
+        return self.path
+
+
+def current() -> Optional[Tracer]:
+    """The tracer of the run in progress, if any"""
+    return _tracer.get()
+
+
+def span(name: str, **attrs):
+    """Time a stage of the current run: `with span('convert.write'): ...`"""
+    tracer = _tracer.get()
+    return tracer.span(name, **attrs) if tracer is not None else NULL_SPAN
+
+
+def step(name: str):
+    """Like span() for work done once per item (a request, a row): summarized, not kept as events"""
+    tracer = _tracer.get()
+    return Span(tracer, name, {}, event=False) if tracer is not None else NULL_SPAN
+
+
+def count(name: str, value: float = 1):
+    """Add to a counter of the current run"""
+    tracer = _tracer.get()
+    if tracer is not None:
+        tracer.count(name, value)
+
+
+def record(name: str, start: float, end: float, **attrs):
+    """Record a stage timed elsewhere (perf_counter values), e.g. across callbacks
+
+    The stage counts as nested in the current span, so record it before that span ends.
+    """
+    tracer = _tracer.get()
+    if tracer is not None:
+        tracer.add(name, start, end - start, None, attrs)
+        parent = _span.get()
+        if parent is not None and parent.tracer is tracer:
+            parent.children += end - start
+
+
+def timed_iter(name: str, iterable: Iterable) -> Iterator:
+    """Iterate while timing only the time spent producing items (e.g. parsing)
+
+    Items are usually too many for one event each, so the time is added to the
+    stage summary as a single span when the iteration ends.
+    """
+    tracer = _tracer.get()
+    if tracer is None:
+        return iter(iterable)
+    return _timed_items(tracer, name, iter(iterable))
+
+
+def _timed_items(tracer: Tracer, name: str, iterator: Iterator) -> Iterator:
+    spent = 0.0
+    produced = 0
+    first = time.perf_counter()
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                spent += time.perf_counter() - start
+                break
+            spent += time.perf_counter() - start
+            produced += 1
+            yield item
+    finally:
+        tracer.add(name, first, spent, spent, {'items': produced})
+        parent = _span.get()
+        if parent is not None and parent.tracer is tracer:
+            parent.children += spent
+
+
+@contextmanager
+def profile_thread():
+    """Include the calling (worker) thread in the run's CPU profile"""
+    tracer = _tracer.get()
+    if tracer is None or not tracer.cpu:
+        yield
+        return
+    profiler = tracer.start_profiler()
+    try:
+        yield
+    finally:
+        tracer.stop_profiler(profiler)
+
+
+@contextmanager
+def collect(name: str, profile: Optional[str] = None, **attrs):
+    """Trace one run in memory; the tracer is finished (but not written) when the block ends"""
+    tracer = Tracer(name, profile, attrs)
+    token = _tracer.set(tracer)
+    tracer.start()
+    try:
+        yield tracer
+    except BaseException as e:
+        tracer.status = f'error: {type(e).__name__}'
+        raise
+    finally:
+        tracer.stop()
+        _tracer.reset(token)
+
+
+@contextmanager
+def trace_run(name: str, directory: Optional[str], profile: Optional[str] = None, **attrs):
+    """Trace one run into a file in directory; does nothing when directory is empty"""
+    if not directory:
+        yield None
+        return
+    tracer = None
+    try:
+        with collect(name, profile, **attrs) as tracer:
+            yield tracer
+    finally:
+        if tracer is not None:
+            tracer.write(directory)
+
+
+def _seconds(value: float) -> str:
+    return f'{value * 1000:.1f}ms' if value < 1 else f'{value:.2f}s'
+
+
+def format_trace(data: Dict[str, Any], limit: int = 15) -> str:
+    """Plain-text stage table of a trace file"""
+    attrs = ', '.join(f'{key}={value}' for key, value in data['attrs'].items())
+    lines = [f"{data['name']} ({attrs}): {_seconds(data['duration'])}, {data['status']}" if attrs
+             else f"{data['name']}: {_seconds(data['duration'])}, {data['status']}"]
+    rows = data['summary'][:limit]
+    if rows:
+        width = max(max(len(row['name']) for row in rows), 5)
+        lines.append(f"  {'Stage':<{width}}  {'Count':>7}  {'Total':>9}  {'Self':>9}  {'Self %':>6}  {'Max':>9}")
+        for row in rows:
+            lines.append(f"  {row['name']:<{width}}  {row['count']:>7}  {_seconds(row['total']):>9}  "
+                         f"{_seconds(row['self']):>9}  {row['self_share'] * 100:>6.1f}  {_seconds(row['max']):>9}")
+    if data['counters']:
+        lines.append('  Counters: ' + ', '.join(f'{key}={value:g}' for key, value in sorted(data['counters'].items())))
+    cpu = data['profile'].get('cpu')
+    if cpu:
+        lines.append(f"  CPU profile ({cpu['file']}), by cumulative time:")
+        for entry in cpu['top'][:5]:
+            lines.append(f"    {_seconds(entry['cumulative']):>9}  {entry['calls']:>8} calls  {entry['function']}")
+    memory = data['profile'].get('memory')
+    if memory:
+        lines.append(f"  Memory: peak {memory['peak_bytes'] / 1024 / 1024:.1f} MB; top allocation sites:")
+        for entry in memory['top'][:5]:
+            lines.append(f"    {entry['bytes'] / 1024:>9.0f} KB  {entry['location']}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Show which stages dominate in trace files written with --trace / TRACE_DIR',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python tracing.py data/traces/convert-20250101-120000-4242-1.json
+  python tracing.py data/traces/*.json --limit 5
+
+Trace files also open in https://ui.perfetto.dev or chrome://tracing.
+        '''
+    )
+    parser.add_argument('traces', nargs='+', help='Trace JSON file(s)')
+    parser.add_argument('--limit', type=int, default=15, help='Stages shown per trace (default: 15)')
+
+    args = parser.parse_args()
+
+    for path in args.traces:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot read '{path}': {e}")
+            sys.exit(1)
+        print(format_trace(data, args.limit))
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Postman variable resolution
+Translates Postman {{variable}} references for JMeter. In "resolve" mode the
+values known from the environment and collection are substituted at conversion
+time; in "jmeter" mode references become ${variable} and the known values are
+emitted as User Defined Variables so they can still be changed in the plan.
+Unknown variables always fall back to a ${variable} reference, and so do
+variables bound to a CSV feeder, whose values change while the test runs.
+"""
+
+import re
+from contextlib import contextmanager
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+VARIABLE_MODES = ('resolve', 'jmeter')
+
+# Postman dynamic variables with a JMeter function equivalent
+DYNAMIC_VARIABLES = {
+    '$guid': '${__UUID()}',
+    '$randomUUID': '${__UUID()}',
+    '$timestamp': '${__time(/1000,)}',
+    '$randomInt': '${__Random(0,1000)}',
+}
+
+_VARIABLE_RE = re.compile(r'\{\{([^}]+)\}\}')
+# A whole base URL such as https://api.example.com:8443/v1 (JMeter references allowed in the host and port)
+_BASE_URL_RE = re.compile(r'^(https?)://([^/:?#]+)(?::(\d+|\$\{[^}]+\}))?(/[^?#]*)?$', re.I)
+
+# Parts of a URL-valued variable, declared as <name>_<part> in "jmeter" mode
+URL_PARTS = ('protocol', 'host', 'port', 'path')
+
+
+class VariableResolver:
+    """Replace {{variable}} references, memoizing repeated strings"""
+
+    def __init__(self, values: Optional[Dict[str, str]] = None, mode: str = 'resolve',
+                 memo_size: int = 10000, bound: Iterable[str] = ()):
+        if mode not in VARIABLE_MODES:
+            raise ValueError(f"Unknown variable mode '{mode}' (expected one of {', '.join(VARIABLE_MODES)})")
+        self.mode = mode
+        self.bound = set(bound)
+        self.values = {key: '' if value is None else str(value) for key, value in (values or {}).items()
+                       if key not in self.bound}
+        self.memo_size = memo_size
+        self.unresolved = set()
+        self._memo: Dict[str, Tuple[str, FrozenSet[str]]] = {}
+        self._collector: Optional[Set[str]] = None
+
+        # Values may refer to each other ({{baseUrl}} -> https://{{host}}); expand them once
+        self._resolved: Dict[str, str] = {}
+        if mode == 'resolve':
+            for key in self.values:
+                self._resolved[key] = self._expand(key, [])
+
+    def _expand(self, key: str, seen: List[str]) -> str:
+        if key in self._resolved:
+            return self._resolved[key]
+        if key in seen:
+            # Circular reference: leave it for JMeter
+            return '${' + key + '}'
+
+        def lookup(match):
+            name = match.group(1)
+            if name in self.values:
+                return self._expand(name, seen + [key])
+            return self._fallback(name)
+
+        return _VARIABLE_RE.sub(lookup, self.values[key])
+
+    def _fallback(self, name: str, missing: Optional[Set[str]] = None) -> str:
+        if name in DYNAMIC_VARIABLES:
+            return DYNAMIC_VARIABLES[name]
+        if name not in self.values and name not in self.bound:
+            (self.unresolved if missing is None else missing).add(name)
+        return '${' + name + '}'
+
+    def _substitute(self, match, missing: Optional[Set[str]] = None) -> str:
+        name = match.group(1)
+        if self.mode == 'resolve' and name in self._resolved:
+            return self._resolved[name]
+        return self._fallback(name, missing)
+
+    def replace(self, text: str) -> str:
+        """Translate every {{variable}} in text"""
+        if not text or '{{' not in text:
+            return text
+        entry = self._memo.get(text)
+        if entry is None:
+            missing: Set[str] = set()
+            entry = (_VARIABLE_RE.sub(lambda match: self._substitute(match, missing), text), frozenset(missing))
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[text] = entry
+        result, missing = entry
+        if missing:
+            self.unresolved.update(missing)
+            if self._collector is not None:
+                self._collector.update(missing)
+        return result
+
+    @contextmanager
+    def collect_unresolved(self) -> Iterator[Set[str]]:
+        """Yield a set that receives the unresolved names replaced inside the block"""
+        outer = self._collector
+        self._collector = names = set()
+        try:
+            yield names
+        finally:
+            self._collector = outer
+            if outer is not None:
+                outer.update(names)
+
+    def url_parts(self, name: str) -> Optional[Dict[str, str]]:
+        """Protocol, host, port and path prefix of a variable holding a base URL (None for other values)"""
+        if name not in self.values or name in self.bound:
+            return None
+        match = _BASE_URL_RE.match(_VARIABLE_RE.sub(self._substitute, self.values[name]))
+        if match is None:
+            return None
+        protocol, host, port, path = match.groups()
+        protocol = protocol.lower()
+        return {'protocol': protocol, 'host': host, 'port': port or ('443' if protocol == 'https' else '80'),
+                'path': (path or '').rstrip('/')}
+
+    def split_base_url(self, text: str) -> Optional[Tuple[Dict[str, str], str]]:
+        """In "jmeter" mode, references to the parts of a leading base URL variable and the rest of text
+
+        A sampler's domain field cannot hold a whole URL, so {{baseUrl}}/users
+        becomes ${baseUrl_protocol}, ${baseUrl_host}, ${baseUrl_port} and the
+        path ${baseUrl_path}/users; the parts are declared next to baseUrl.
+        """
+        if self.mode != 'jmeter':
+            return None
+        match = _VARIABLE_RE.match(text)
+        if match is None or self.url_parts(match.group(1)) is None:
+            return None
+        name = match.group(1)
+        return {part: '${' + f'{name}_{part}' + '}' for part in URL_PARTS}, text[match.end():]
+
+    def user_defined_variables(self) -> Dict[str, str]:
+        """Variables to declare in the test plan (only needed in "jmeter" mode)"""
+        if self.mode != 'jmeter':
+            return {}
+        variables = {key: _VARIABLE_RE.sub(self._substitute, value) for key, value in self.values.items()}
+        for key in list(variables):
+            parts = self.url_parts(key)
+            if parts is not None:
+                variables.update((f'{key}_{part}', value) for part, value in parts.items())
+        return variables